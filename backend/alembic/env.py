@@ -32,6 +32,18 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = SQLModel.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Keep autogenerate off the per-dialect search objects of app.models.vets."""
+    # SQLite's FTS5 table and its shadow tables are created by DDL listeners, not metadata
+    if type_ == "table" and name.startswith("vets_fts"):
+        return False
+    # Declared with ddl_if(dialect="postgresql"), which autogenerate does not honour
+    if type_ == "index" and name == "ix_vets_search":
+        return context.get_context().dialect.name == "postgresql"
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -57,6 +69,7 @@ def run_migrations_offline() -> None:
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
         compare_server_default=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -77,6 +90,7 @@ def run_migrations_online() -> None:
             connection=connection, target_metadata=target_metadata,
             compare_type=True,
             compare_server_default=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,33 @@
+"""vets city specialty index
+
+Revision ID: a6e0d4b8c215
+Revises: f2b7c9e41d6a
+Create Date: 2026-10-18 20:12:09.554871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6e0d4b8c215'
+down_revision: Union[str, Sequence[str], None] = 'f2b7c9e41d6a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_vets_active_city_specialty', 'vets', [sa.text('lower(city)'), 'specialty'],
+        postgresql_where=sa.text('is_active'),
+        sqlite_where=sa.text('is_active = 1'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_vets_active_city_specialty', table_name='vets')
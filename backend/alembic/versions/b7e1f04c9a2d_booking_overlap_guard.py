@@ -0,0 +1,42 @@
+"""booking overlap guard
+
+Revision ID: b7e1f04c9a2d
+Revises: 2363493ee52f
+Create Date: 2026-10-18 10:12:31.540218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e1f04c9a2d'
+down_revision: Union[str, Sequence[str], None] = '2363493ee52f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (vet_id, start_at) index used by the overlap check and range queries on every dialect
+    op.create_index('ix_bookings_vet_id_start_at', 'bookings', ['vet_id', 'start_at'])
+
+    # On Postgres the database itself rejects overlapping active bookings for a vet.
+    # Existing overlapping rows must be cleaned up before this runs.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+        op.execute(
+            "ALTER TABLE bookings ADD CONSTRAINT ex_bookings_vet_no_overlap "
+            "EXCLUDE USING gist (vet_id WITH =, tstzrange(start_at, end_at, '[)') WITH &&) "
+            "WHERE (booking_status <> 'CANCELLED')"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ALTER TABLE bookings DROP CONSTRAINT ex_bookings_vet_no_overlap')
+    op.drop_index('ix_bookings_vet_id_start_at', table_name='bookings')
@@ -0,0 +1,30 @@
+"""bookings user start index
+
+Revision ID: c41a9e7d2b5f
+Revises: b7e1f04c9a2d
+Create Date: 2026-10-18 14:02:09.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41a9e7d2b5f'
+down_revision: Union[str, Sequence[str], None] = 'b7e1f04c9a2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pages of an owner's bookings; the vet side uses ix_bookings_vet_id_start_at
+    op.create_index('ix_bookings_user_id_start_at', 'bookings', ['user_id', 'start_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bookings_user_id_start_at', table_name='bookings')
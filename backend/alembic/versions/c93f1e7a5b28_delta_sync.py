@@ -0,0 +1,60 @@
+"""delta sync
+
+Revision ID: c93f1e7a5b28
+Revises: a6e0d4b8c215
+Create Date: 2026-10-18 21:02:44.310527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c93f1e7a5b28'
+down_revision: Union[str, Sequence[str], None] = 'a6e0d4b8c215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tombstones',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('collection', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('entity_id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=True),
+    sa.Column('vet_id', sa.Uuid(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstones_user_id_deleted_at', 'tombstones', ['user_id', 'deleted_at'])
+    op.create_index('ix_tombstones_vet_id_deleted_at', 'tombstones', ['vet_id', 'deleted_at'])
+    op.create_index('ix_tombstones_deleted_at', 'tombstones', ['deleted_at'])
+
+    op.create_index('ix_bookings_user_id_updated_at', 'bookings', ['user_id', 'updated_at'])
+    op.create_index('ix_bookings_vet_id_updated_at', 'bookings', ['vet_id', 'updated_at'])
+    op.create_index('ix_vet_time_off_vet_id_updated_at', 'vet_time_off', ['vet_id', 'updated_at'])
+    # The (scope, updated_at) indexes also serve every lookup the single-column ones did
+    op.create_index('ix_pets_user_id_updated_at', 'pets', ['user_id', 'updated_at'])
+    op.drop_index('ix_pets_user_id', table_name='pets')
+    op.create_index('ix_vet_working_hours_vet_id_updated_at', 'vet_working_hours', ['vet_id', 'updated_at'])
+    op.drop_index('ix_vet_working_hours_vet_id', table_name='vet_working_hours')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_vet_working_hours_vet_id', 'vet_working_hours', ['vet_id'])
+    op.drop_index('ix_vet_working_hours_vet_id_updated_at', table_name='vet_working_hours')
+    op.create_index('ix_pets_user_id', 'pets', ['user_id'])
+    op.drop_index('ix_pets_user_id_updated_at', table_name='pets')
+    op.drop_index('ix_vet_time_off_vet_id_updated_at', table_name='vet_time_off')
+    op.drop_index('ix_bookings_vet_id_updated_at', table_name='bookings')
+    op.drop_index('ix_bookings_user_id_updated_at', table_name='bookings')
+
+    op.drop_index('ix_tombstones_deleted_at', table_name='tombstones')
+    op.drop_index('ix_tombstones_vet_id_deleted_at', table_name='tombstones')
+    op.drop_index('ix_tombstones_user_id_deleted_at', table_name='tombstones')
+    op.drop_table('tombstones')
@@ -0,0 +1,49 @@
+"""secondary indexes
+
+Revision ID: d5f2a8c3e917
+Revises: c41a9e7d2b5f
+Create Date: 2026-10-18 15:27:44.602195
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f2a8c3e917'
+down_revision: Union[str, Sequence[str], None] = 'c41a9e7d2b5f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # bookings.vet_id / bookings.user_id are already covered by the leading column of
+    # ix_bookings_vet_id_start_at and ix_bookings_user_id_start_at.
+    op.create_index(
+        'ix_bookings_vet_active_start_at', 'bookings', ['vet_id', 'start_at', 'end_at'],
+        postgresql_where=sa.text("booking_status <> 'CANCELLED'"),
+        sqlite_where=sa.text("booking_status <> 'CANCELLED'"),
+    )
+    op.create_index('ix_bookings_pet_id', 'bookings', ['pet_id'])
+    op.create_index('ix_pets_user_id', 'pets', ['user_id'])
+    op.create_index('ix_vet_working_hours_vet_id', 'vet_working_hours', ['vet_id'])
+    op.create_index('ix_vet_time_off_vet_id_start_at', 'vet_time_off', ['vet_id', 'start_at'])
+    op.create_index(
+        'ix_vets_active_full_name', 'vets', ['full_name', 'id'],
+        postgresql_where=sa.text('is_active'),
+        sqlite_where=sa.text('is_active = 1'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_vets_active_full_name', table_name='vets')
+    op.drop_index('ix_vet_time_off_vet_id_start_at', table_name='vet_time_off')
+    op.drop_index('ix_vet_working_hours_vet_id', table_name='vet_working_hours')
+    op.drop_index('ix_pets_user_id', table_name='pets')
+    op.drop_index('ix_bookings_pet_id', table_name='bookings')
+    op.drop_index('ix_bookings_vet_active_start_at', table_name='bookings')
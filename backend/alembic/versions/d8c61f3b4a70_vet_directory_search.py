@@ -0,0 +1,64 @@
+"""vet directory search
+
+Revision ID: d8c61f3b4a70
+Revises: d5f2a8c3e917
+Create Date: 2026-10-18 16:48:12.930512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8c61f3b4a70'
+down_revision: Union[str, Sequence[str], None] = 'd5f2a8c3e917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same expression as app.models.vets.SEARCH_DOCUMENT, which spells it as Postgres prints it
+SEARCH_DOCUMENT = (
+    "to_tsvector('simple', coalesce(full_name, '') || ' ' || "
+    "coalesce(clinic_name, '') || ' ' || coalesce(bio, ''))"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(f"CREATE INDEX ix_vets_search ON vets USING gin (({SEARCH_DOCUMENT}))")
+    elif dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE vets_fts USING fts5(vet_id UNINDEXED, full_name, clinic_name, bio)")
+        op.execute(
+            "CREATE TRIGGER vets_fts_ai AFTER INSERT ON vets BEGIN "
+            "INSERT INTO vets_fts (vet_id, full_name, clinic_name, bio) "
+            "VALUES (new.id, new.full_name, new.clinic_name, new.bio); END"
+        )
+        op.execute(
+            "CREATE TRIGGER vets_fts_ad AFTER DELETE ON vets BEGIN "
+            "DELETE FROM vets_fts WHERE vet_id = old.id; END"
+        )
+        op.execute(
+            "CREATE TRIGGER vets_fts_au AFTER UPDATE OF full_name, clinic_name, bio ON vets BEGIN "
+            "UPDATE vets_fts SET full_name = new.full_name, clinic_name = new.clinic_name, bio = new.bio "
+            "WHERE vet_id = old.id; END"
+        )
+        op.execute(
+            "INSERT INTO vets_fts (vet_id, full_name, clinic_name, bio) "
+            "SELECT id, full_name, clinic_name, bio FROM vets"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_vets_search', table_name='vets')
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER vets_fts_au")
+        op.execute("DROP TRIGGER vets_fts_ad")
+        op.execute("DROP TRIGGER vets_fts_ai")
+        op.execute("DROP TABLE vets_fts")
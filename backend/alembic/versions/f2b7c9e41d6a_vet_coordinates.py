@@ -0,0 +1,39 @@
+"""vet coordinates
+
+Revision ID: f2b7c9e41d6a
+Revises: d8c61f3b4a70
+Create Date: 2026-10-18 19:05:37.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7c9e41d6a'
+down_revision: Union[str, Sequence[str], None] = 'd8c61f3b4a70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('vets', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('vets', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('vets', sa.Column('grid_cell', sa.Integer(), nullable=True))
+    op.create_index(
+        'ix_vets_active_grid_cell', 'vets', ['grid_cell'],
+        postgresql_where=sa.text('is_active'),
+        sqlite_where=sa.text('is_active = 1'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_vets_active_grid_cell', table_name='vets')
+    op.drop_column('vets', 'grid_cell')
+    op.drop_column('vets', 'longitude')
+    op.drop_column('vets', 'latitude')
@@ -0,0 +1,95 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.auth_cache import Principal
+from app.core.availability import FreeSlotIndex, earliest_slots, to_naive_utc
+from app.core.security import get_current_principal
+from app.crud.bookings import list_active_bookings_for_vets_between
+from app.crud.vet_time_off import get_time_off_for_vets_between
+from app.crud.vet_working_hours import get_working_hours_for_vets
+from app.crud.vets import list_bookable_vets
+from app.models.enums import VetSpecialty
+from app.schema.availability import EarliestSlot
+from app.schema.database import get_session
+
+router = APIRouter(tags=["availability"])
+
+# Windows tried in turn; a wider one is only read when the narrower has too few slots
+SEARCH_WINDOWS = (timedelta(days=1), timedelta(days=3), timedelta(days=7), timedelta(days=14))
+SLOT_ALIGNMENT = timedelta(minutes=15)
+MAX_EARLIEST_SLOTS = 20
+
+
+def _align(value: datetime) -> datetime:
+    """Round a naive UTC time up to the next SLOT_ALIGNMENT boundary."""
+    remainder = (value - datetime.min) % SLOT_ALIGNMENT
+    return value + (SLOT_ALIGNMENT - remainder) if remainder else value
+
+
+@router.get("/availability/earliest", response_model=List[EarliestSlot])
+async def read_earliest_availability(
+    specialties: Optional[List[VetSpecialty]] = Query(None, alias="specialty"),
+    city: Optional[str] = Query(None),
+    duration: int = Query(30, ge=5, le=480, description="Slot length in minutes"),
+    after: Optional[datetime] = Query(None, description="Earliest start (naive values are UTC); defaults to now"),
+    limit: int = Query(5, ge=1, le=MAX_EARLIEST_SLOTS),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """The soonest free slots with any active vet matching the filters, earliest first."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    not_before = _align(max(to_naive_utc(after), now) if after is not None else now)
+    slot_length = timedelta(minutes=duration)
+
+    vets = {row["id"]: row for row in await list_bookable_vets(session=session, specialties=specialties, city=city)}
+    if not vets:
+        return []
+    rules = defaultdict(list)
+    for rule in await get_working_hours_for_vets(session=session, vet_ids=list(vets)):
+        rules[rule.vet_id].append(rule)
+    # Vets without a schedule can never have a slot
+    vet_ids = list(rules)
+    if not vet_ids:
+        return []
+
+    found: List[Tuple[datetime, datetime, UUID]] = []
+    for span in SEARCH_WINDOWS:
+        window_end = not_before + span
+        busy: Dict[UUID, list] = defaultdict(list)
+        for period in await get_time_off_for_vets_between(
+            session=session, vet_ids=vet_ids, start_at=not_before, end_at=window_end
+        ):
+            busy[period.vet_id].append((period.start_at, period.end_at))
+        for booking in await list_active_bookings_for_vets_between(
+            session=session,
+            vet_ids=vet_ids,
+            start_at=not_before.replace(tzinfo=timezone.utc),
+            end_at=window_end.replace(tzinfo=timezone.utc),
+        ):
+            busy[booking.vet_id].append((booking.start_at, booking.end_at))
+
+        indexes = {
+            vet_id: FreeSlotIndex.build(rules[vet_id], busy[vet_id], not_before, window_end) for vet_id in vet_ids
+        }
+        # Slots are clipped to the window, so any found in it precede those beyond it
+        found = earliest_slots(indexes, slot_length, limit, not_before=not_before)
+        if len(found) >= limit:
+            break
+
+    return [
+        EarliestSlot(
+            vet_id=vet_id,
+            full_name=vets[vet_id]["full_name"],
+            specialty=vets[vet_id]["specialty"],
+            clinic_name=vets[vet_id]["clinic_name"],
+            city=vets[vet_id]["city"],
+            start_at=start.replace(tzinfo=timezone.utc),
+            end_at=end.replace(tzinfo=timezone.utc),
+        )
+        for start, end, vet_id in found
+    ]
@@ -1,24 +1,48 @@
-from typing import List
+import csv
+import io
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, AsyncIterator, FrozenSet, List, Optional, Tuple
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlmodel import Session, select
-
-from app.core.security import get_current_user, get_current_vet_profile
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.availability import FreeSlotIndex, to_naive_utc
+from app.core.auth_cache import Principal
+from app.core.pagination import PageParams, decode_cursor, page_params, paginate, set_next_cursor
+from app.core.security import get_current_principal, get_current_vet_id
+from app.core.serialization import ORJSON_OPTIONS, models_response, rows_response, schema_columns
+from app.core.unit_of_work import commit
 from app.crud.bookings import (
+    EXPORT_COLUMNS,
+    BookingConflictError,
     create_booking,
     delete_booking,
     get_booking_by_id,
     get_booking_by_id_for_vet,
     list_bookings_for_user,
     list_bookings_for_vet,
+    stream_bookings_for_vet,
     update_booking,
+    update_booking_status,
+    update_booking_statuses,
 )
+from app.crud.vet_time_off import get_time_off_for_vet_between
+from app.crud.vet_working_hours import get_working_hours_by_vet
+from app.models.bookings import Bookings
+from app.models.enums import BookingStatus
 from app.models.pets import Pets
-from app.models.users import Users
 from app.models.vets import Vets
 from app.schema.bookings import (
+    BookingBatchItemResult,
+    BookingBatchStatusUpdate,
     BookingCreate,
+    BookingExpandedResponse,
     BookingResponse,
     BookingUpdate,
     VetBookingDetailResponse,
@@ -26,64 +50,260 @@ from app.schema.bookings import (
     PetSummary,
     OwnerSummary,
 )
-from app.schema.database import get_session
+from app.schema.database import async_session_factory, get_session
 
 
 router = APIRouter(tags=["bookings"])
 
+MAX_STATUS_BATCH = 200
+# Plain (unexpanded) listings read only the columns BookingResponse serializes
+BOOKING_COLUMNS = schema_columns(Bookings, BookingResponse)
+
+
+def _slot_taken() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="The vet already has a booking during this time.",
+    )
+
+
+async def _ensure_within_schedule(session: AsyncSession, vet_id: UUID, start_at: datetime, end_at: datetime) -> None:
+    working_hours = await get_working_hours_by_vet(session=session, vet_id=vet_id)
+    time_off = await get_time_off_for_vet_between(
+        session=session, vet_id=vet_id, start_at=to_naive_utc(start_at), end_at=to_naive_utc(end_at)
+    )
+    index = FreeSlotIndex.build(working_hours, [(t.start_at, t.end_at) for t in time_off], start_at, end_at)
+    if not index.covers(start_at, end_at):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Requested time is outside the vet's working hours or during time off.",
+        )
+
+
+@dataclass(frozen=True)
+class BookingFilters:
+    statuses: Optional[List[BookingStatus]]
+    start_from: Optional[datetime]
+    start_to: Optional[datetime]
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    return to_naive_utc(value).replace(tzinfo=timezone.utc) if value is not None else None
+
+
+def booking_filters(
+    statuses: Optional[List[BookingStatus]] = Query(None, alias="status"),
+    from_: Optional[datetime] = Query(None, alias="from", description="Only bookings starting at or after this time"),
+    to: Optional[datetime] = Query(None, description="Only bookings starting before this time"),
+) -> BookingFilters:
+    return BookingFilters(statuses=statuses, start_from=_as_utc(from_), start_to=_as_utc(to))
+
+
+EXPANDABLE = ("pet", "owner")
+
+
+def booking_expand(
+    expand: Optional[str] = Query(None, description="Comma-separated related rows to include: pet, owner"),
+) -> FrozenSet[str]:
+    fields = frozenset(part.strip() for part in (expand or "").split(",") if part.strip())
+    unknown = fields.difference(EXPANDABLE)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot expand: {', '.join(sorted(unknown))}. Allowed: {', '.join(EXPANDABLE)}.",
+        )
+    return fields
 
-@router.get("/bookings", response_model=List[BookingResponse])
+
+def _expanded(booking: Bookings, expand: FrozenSet[str]) -> BookingExpandedResponse:
+    # Built field by field so an unrequested relationship is never touched
+    # (lazy loads are not allowed on an AsyncSession). The booking's own columns
+    # come from the database as-is and are not validated again.
+    return BookingExpandedResponse.model_construct(
+        **{name: getattr(booking, name) for name in BookingResponse.model_fields},
+        pet=PetSummary.model_validate(booking.pet) if "pet" in expand else None,
+        owner=OwnerSummary.model_validate(booking.user) if "owner" in expand else None,
+    )
+
+
+async def _apply_status_batch(
+    session: AsyncSession,
+    batch: BookingBatchStatusUpdate,
+    vet_id: Optional[UUID] = None,
+    user_id: Optional[UUID] = None,
+) -> List[BookingBatchItemResult]:
+    if not batch.items or len(batch.items) > MAX_STATUS_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch must contain between 1 and {MAX_STATUS_BATCH} items.",
+        )
+    changes = {item.booking_id: item.booking_status for item in batch.items}
+    if len(changes) != len(batch.items):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Each booking may appear only once.")
+
+    current, updated = await update_booking_statuses(session=session, changes=changes, vet_id=vet_id, user_id=user_id)
+    await commit(session)
+    by_id = {booking.id: booking for booking in updated}
+    results = []
+    for item in batch.items:
+        if item.booking_id in by_id:
+            results.append(BookingBatchItemResult(
+                booking_id=item.booking_id,
+                status_code=status.HTTP_200_OK,
+                booking=BookingResponse.model_validate(by_id[item.booking_id]),
+            ))
+        elif item.booking_id in current:
+            results.append(BookingBatchItemResult(
+                booking_id=item.booking_id,
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Cancelled bookings must be reactivated individually.",
+            ))
+        else:
+            results.append(BookingBatchItemResult(
+                booking_id=item.booking_id, status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found."
+            ))
+    return results
+
+
+def _after(page: PageParams) -> Optional[Tuple[datetime, UUID]]:
+    if page.cursor is None:
+        return None
+    return decode_cursor(page.cursor, lambda value: datetime.fromisoformat(value).replace(tzinfo=timezone.utc), UUID)
+
+
+def _booking_key(booking: Bookings) -> Tuple[str, UUID]:
+    return to_naive_utc(booking.start_at).isoformat(), booking.id
+
+
+def _page_response(rows, page: PageParams, expand: FrozenSet[str]) -> Response:
+    bookings, next_cursor = paginate(rows, page.limit, _booking_key)
+    if expand:
+        response = models_response(List[BookingExpandedResponse], [_expanded(booking, expand) for booking in bookings])
+    else:
+        response = rows_response(row._mapping for row in bookings)
+    set_next_cursor(response, next_cursor)
+    return response
+
+
+@router.get("/bookings", response_model=List[BookingExpandedResponse])
 async def list_bookings(
-    session: Session = Depends(get_session),
-    current_user: Users = Depends(get_current_user),
+    filters: BookingFilters = Depends(booking_filters),
+    page: PageParams = Depends(page_params),
+    expand: FrozenSet[str] = Depends(booking_expand),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    return list_bookings_for_user(session=session, user_id=current_user.id)
+    rows = await list_bookings_for_user(
+        session=session,
+        user_id=current_user.id,
+        limit=page.limit,
+        statuses=filters.statuses,
+        start_from=filters.start_from,
+        start_to=filters.start_to,
+        after=_after(page),
+        with_pet="pet" in expand,
+        with_owner="owner" in expand,
+        columns=None if expand else BOOKING_COLUMNS,
+    )
+    return _page_response(rows, page, expand)
 
 
-@router.get("/bookings/vet", response_model=List[BookingResponse])
+@router.get("/bookings/vet", response_model=List[BookingExpandedResponse])
 async def list_vet_bookings(
-    session: Session = Depends(get_session),
-    vet: Vets = Depends(get_current_vet_profile),
+    filters: BookingFilters = Depends(booking_filters),
+    page: PageParams = Depends(page_params),
+    expand: FrozenSet[str] = Depends(booking_expand),
+    session: AsyncSession = Depends(get_session),
+    vet_id: UUID = Depends(get_current_vet_id),
+):
+    rows = await list_bookings_for_vet(
+        session=session,
+        vet_id=vet_id,
+        limit=page.limit,
+        statuses=filters.statuses,
+        start_from=filters.start_from,
+        start_to=filters.start_to,
+        after=_after(page),
+        with_pet="pet" in expand,
+        with_owner="owner" in expand,
+        columns=None if expand else BOOKING_COLUMNS,
+    )
+    return _page_response(rows, page, expand)
+
+
+@router.post("/bookings/vet/batch-status", response_model=List[BookingBatchItemResult])
+async def update_vet_booking_statuses(
+    batch: BookingBatchStatusUpdate,
+    session: AsyncSession = Depends(get_session),
+    vet_id: UUID = Depends(get_current_vet_id),
+):
+    return await _apply_status_batch(session, batch, vet_id=vet_id)
+
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    return value
+
+
+async def _export_chunks(vet_id: UUID, filters: BookingFilters, export_format: str) -> AsyncIterator[bytes]:
+    # The request's session is closed once the handler returns, before the body
+    # is streamed, so the export reads through a session of its own.
+    async with async_session_factory() as session:
+        if export_format == "csv":
+            yield (",".join(column.key for column in EXPORT_COLUMNS) + "\r\n").encode()
+        async for batch in stream_bookings_for_vet(
+            session=session,
+            vet_id=vet_id,
+            statuses=filters.statuses,
+            start_from=filters.start_from,
+            start_to=filters.start_to,
+        ):
+            if export_format == "ndjson":
+                yield b"".join(orjson.dumps(row._asdict(), option=ORJSON_OPTIONS) + b"\n" for row in batch)
+            else:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows([_csv_cell(value) for value in row] for row in batch)
+                yield buffer.getvalue().encode()
+
+
+@router.get("/bookings/vet/export")
+async def export_vet_bookings(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    filters: BookingFilters = Depends(booking_filters),
+    vet_id: UUID = Depends(get_current_vet_id),
 ):
-    return list_bookings_for_vet(session=session, vet_id=vet.id)
+    """The vet's whole booking history with pet and owner names, streamed oldest first."""
+    return StreamingResponse(
+        _export_chunks(vet_id, filters, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="bookings.{export_format}"'},
+    )
 
 
 @router.get("/bookings/vet/{booking_id}", response_model=VetBookingDetailResponse)
 async def get_vet_booking_detail(
     booking_id: UUID,
-    session: Session = Depends(get_session),
-    vet: Vets = Depends(get_current_vet_profile),
+    session: AsyncSession = Depends(get_session),
+    vet_id: UUID = Depends(get_current_vet_id),
 ):
-    booking = get_booking_by_id_for_vet(session=session, booking_id=booking_id, vet_id=vet.id)
+    booking = await get_booking_by_id_for_vet(
+        session=session, booking_id=booking_id, vet_id=vet_id, with_details=True
+    )
     if not booking:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found.")
 
-    pet = session.exec(select(Pets).where(Pets.id == booking.pet_id)).first()
-    owner = session.exec(select(Users).where(Users.id == booking.user_id)).first()
-
     return VetBookingDetailResponse(
-        id=booking.id,
-        pet_id=booking.pet_id,
-        vet_id=booking.vet_id,
-        user_id=booking.user_id,
-        start_at=booking.start_at,
-        end_at=booking.end_at,
-        reason=booking.reason,
-        booking_status=booking.booking_status,
-        pet=PetSummary(
-            id=pet.id,
-            name=pet.name,
-            species=pet.species,
-            breed=pet.breed,
-            date_of_birth=str(pet.date_of_birth) if pet.date_of_birth else None,
-            sex=pet.sex,
-            notes=pet.notes,
-        ),
-        owner=OwnerSummary(
-            id=owner.id,
-            full_name=owner.full_name,
-            email=owner.email,
-        ),
+        **BookingResponse.model_validate(booking).model_dump(),
+        pet=PetSummary.model_validate(booking.pet),
+        owner=OwnerSummary.model_validate(booking.user),
     )
 
 
@@ -91,27 +311,37 @@ async def get_vet_booking_detail(
 async def update_vet_booking_status(
     booking_id: UUID,
     status_in: VetBookingStatusUpdate,
-    session: Session = Depends(get_session),
-    vet: Vets = Depends(get_current_vet_profile),
+    session: AsyncSession = Depends(get_session),
+    vet_id: UUID = Depends(get_current_vet_id),
 ):
-    booking = get_booking_by_id_for_vet(session=session, booking_id=booking_id, vet_id=vet.id)
+    booking = await get_booking_by_id_for_vet(session=session, booking_id=booking_id, vet_id=vet_id)
     if not booking:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found.")
 
-    booking.booking_status = status_in.booking_status
-    session.add(booking)
-    session.commit()
-    session.refresh(booking)
+    try:
+        booking = await update_booking_status(session=session, booking=booking, booking_status=status_in.booking_status)
+    except BookingConflictError:
+        raise _slot_taken()
+    await commit(session)
     return booking
 
 
+@router.post("/bookings/batch-status", response_model=List[BookingBatchItemResult])
+async def update_booking_statuses_endpoint(
+    batch: BookingBatchStatusUpdate,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
+):
+    return await _apply_status_batch(session, batch, user_id=current_user.id)
+
+
 @router.get("/bookings/{booking_id}", response_model=BookingResponse)
 async def get_booking(
     booking_id: UUID,
-    session: Session = Depends(get_session),
-    current_user: Users = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    booking = get_booking_by_id(session=session, booking_id=booking_id, user_id=current_user.id)
+    booking = await get_booking_by_id(session=session, booking_id=booking_id, user_id=current_user.id)
     if not booking:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found.")
     return booking
@@ -120,8 +350,8 @@ async def get_booking(
 @router.post("/bookings", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_booking(
     booking_in: BookingCreate,
-    session: Session = Depends(get_session),
-    current_user: Users = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
 ):
     if booking_in.start_at >= booking_in.end_at:
         raise HTTPException(
@@ -129,17 +359,23 @@ async def create_new_booking(
             detail="start_at must be before end_at.",
         )
 
-    pet = session.exec(
+    pet = (await session.exec(
         select(Pets).where(Pets.id == booking_in.pet_id, Pets.user_id == current_user.id)
-    ).first()
+    )).first()
     if not pet:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pet not found.")
 
-    vet = session.exec(select(Vets).where(Vets.id == booking_in.vet_id, Vets.is_active == True)).first()
+    vet = (await session.exec(select(Vets).where(Vets.id == booking_in.vet_id, Vets.is_active == True))).first()
     if not vet:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vet not found or inactive.")
 
-    booking = create_booking(session=session, booking_in=booking_in, user_id=current_user.id)
+    await _ensure_within_schedule(session, vet.id, booking_in.start_at, booking_in.end_at)
+
+    try:
+        booking = await create_booking(session=session, booking_in=booking_in, user_id=current_user.id)
+    except BookingConflictError:
+        raise _slot_taken()
+    await commit(session)
     return booking
 
 
@@ -147,22 +383,22 @@ async def create_new_booking(
 async def update_existing_booking(
     booking_id: UUID,
     booking_in: BookingUpdate,
-    session: Session = Depends(get_session),
-    current_user: Users = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    booking = get_booking_by_id(session=session, booking_id=booking_id, user_id=current_user.id)
+    booking = await get_booking_by_id(session=session, booking_id=booking_id, user_id=current_user.id)
     if not booking:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found.")
 
     if booking_in.pet_id:
-        pet = session.exec(
+        pet = (await session.exec(
             select(Pets).where(Pets.id == booking_in.pet_id, Pets.user_id == current_user.id)
-        ).first()
+        )).first()
         if not pet:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pet not found.")
 
     if booking_in.vet_id:
-        vet = session.exec(select(Vets).where(Vets.id == booking_in.vet_id, Vets.is_active == True)).first()
+        vet = (await session.exec(select(Vets).where(Vets.id == booking_in.vet_id, Vets.is_active == True))).first()
         if not vet:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vet not found or inactive.")
 
@@ -174,19 +410,33 @@ async def update_existing_booking(
             detail="start_at must be before end_at.",
         )
 
-    return update_booking(session=session, booking=booking, booking_in=booking_in)
+    reschedules = booking_in.vet_id or booking_in.start_at or booking_in.end_at
+    reactivates = (
+        booking.booking_status == BookingStatus.CANCELLED
+        and booking_in.booking_status not in (None, BookingStatus.CANCELLED)
+    )
+    if reschedules or reactivates:
+        await _ensure_within_schedule(session, booking_in.vet_id or booking.vet_id, next_start, next_end)
+
+    try:
+        booking = await update_booking(session=session, booking=booking, booking_in=booking_in)
+    except BookingConflictError:
+        raise _slot_taken()
+    await commit(session)
+    return booking
 
 
 @router.delete("/bookings/{booking_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_booking_endpoint(
     booking_id: UUID,
-    session: Session = Depends(get_session),
-    current_user: Users = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    booking = get_booking_by_id(session=session, booking_id=booking_id, user_id=current_user.id)
+    booking = await get_booking_by_id(session=session, booking_id=booking_id, user_id=current_user.id)
     if not booking:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found.")
 
-    delete_booking(session=session, booking=booking)
+    await delete_booking(session=session, booking=booking)
+    await commit(session)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+
+from app.core.auth_cache import Principal
+from app.core.config import get_settings
+from app.core.profiling import Profile, profiles
+from app.core.security import get_current_principal
+
+router = APIRouter(tags=["debug"])
+
+
+async def require_profiling_user(principal: Principal = Depends(get_current_principal)) -> Principal:
+    if str(principal.id) not in get_settings().profiling_allowed_users:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Profiling is not enabled for this user.")
+    return principal
+
+
+def _profile(profile_id: str) -> Profile:
+    profile = profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found or expired.")
+    return profile
+
+
+@router.get("/debug/profiles/{profile_id}")
+async def read_profile_summary(profile_id: str, principal: Principal = Depends(require_profiling_user)):
+    return _profile(profile_id).summary
+
+
+@router.get("/debug/profiles/{profile_id}/report")
+async def read_profile_report(profile_id: str, principal: Principal = Depends(require_profiling_user)):
+    profile = _profile(profile_id)
+    return Response(content=profile.report, media_type=profile.media_type)
@@ -0,0 +1,42 @@
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.core.events import RETRY_FRAME, event_hub, user_topic, vet_topic
+from app.core.security import AuthContext, get_stream_auth_context
+from app.models.enums import UserRole
+
+router = APIRouter(tags=["events"])
+
+
+async def _event_stream(topic: str, expires_at: Optional[float]) -> AsyncIterator[bytes]:
+    # Subscribed here rather than in the handler, so the subscription is
+    # released however the stream ends (client gone, server shutting down)
+    with event_hub.subscribe([topic]) as subscription:
+        yield RETRY_FRAME
+        # Ends when the token expires; the EventSource reconnects and authenticates again
+        async for frame in subscription.frames(event_hub.heartbeat_seconds, until=expires_at):
+            yield frame
+
+
+@router.get("/events/bookings")
+async def stream_booking_events(ctx: AuthContext = Depends(get_stream_auth_context)):
+    """Server-sent booking.created / booking.updated / booking.deleted events.
+
+    Vets receive the events of their bookings, owners those of their own. The
+    stream closes when the access token expires.
+    """
+    principal = ctx.principal
+    if principal.role == UserRole.VET:
+        if principal.vet_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vet profile not found")
+        topic = vet_topic(principal.vet_id)
+    else:
+        topic = user_topic(principal.id)
+    return StreamingResponse(
+        _event_stream(topic, ctx.expires_at),
+        media_type="text/event-stream",
+        # X-Accel-Buffering stops nginx from holding frames back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,40 +1,47 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 from app.schema.database import get_session
-from app.core.security import get_current_user, require_owner
+from app.core.auth_cache import Principal
+from app.core.security import require_owner
+from app.core.serialization import rows_response, schema_columns
+from app.core.unit_of_work import commit
 from app.schema.pets import PetCreate, PetResponse, PetUpdate
-from app.models.users import Users
 from app.crud.pets import create_pet, get_pets_by_user, get_pet_by_id, update_pet, delete_pet
+from app.models.pets import Pets
 from uuid import UUID
 
 router = APIRouter(tags=["pets"])
 
+PET_COLUMNS = schema_columns(Pets, PetResponse)
+
 @router.post("/pets/", status_code=status.HTTP_201_CREATED, response_model=PetResponse)
 async def create_new_pet(
     pet_data : PetCreate,
-    current_user : Users = Depends(require_owner),
-    session : Session = Depends(get_session)
+    current_user : Principal = Depends(require_owner),
+    session : AsyncSession = Depends(get_session)
 ):
-    new_pet = create_pet(session=session, pet_data=pet_data, user_id=current_user.id)
+    new_pet = await create_pet(session=session, pet_data=pet_data, user_id=current_user.id)
+    await commit(session)
     return new_pet
 
 
 @router.get("/pets", response_model=List[PetResponse])
 async def list_pets(
-    current_user: Users = Depends(require_owner),
-    session: Session = Depends(get_session),
+    current_user: Principal = Depends(require_owner),
+    session: AsyncSession = Depends(get_session),
 ):
-    return get_pets_by_user(session=session, user_id=current_user.id)
+    rows = await get_pets_by_user(session=session, user_id=current_user.id, columns=PET_COLUMNS)
+    return rows_response(row._mapping for row in rows)
 
 
 @router.get("/pets/{pet_id}", response_model=PetResponse)
 async def get_pet(
     pet_id: UUID,
-    current_user: Users = Depends(require_owner),
-    session: Session = Depends(get_session),
+    current_user: Principal = Depends(require_owner),
+    session: AsyncSession = Depends(get_session),
 ):
-    pet = get_pet_by_id(session=session, pet_id=pet_id, user_id=current_user.id)
+    pet = await get_pet_by_id(session=session, pet_id=pet_id, user_id=current_user.id)
     if not pet:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pet not found.")
     return pet
@@ -44,23 +51,26 @@ async def get_pet(
 async def update_existing_pet(
     pet_id: UUID,
     pet_data: PetUpdate,
-    current_user: Users = Depends(require_owner),
-    session: Session = Depends(get_session),
+    current_user: Principal = Depends(require_owner),
+    session: AsyncSession = Depends(get_session),
 ):
-    pet = get_pet_by_id(session=session, pet_id=pet_id, user_id=current_user.id)
+    pet = await get_pet_by_id(session=session, pet_id=pet_id, user_id=current_user.id)
     if not pet:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pet not found.")
-    return update_pet(session=session, pet=pet, pet_data=pet_data)
+    pet = await update_pet(session=session, pet=pet, pet_data=pet_data)
+    await commit(session)
+    return pet
 
 
 @router.delete("/pets/{pet_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_existing_pet(
     pet_id: UUID,
-    current_user: Users = Depends(require_owner),
-    session: Session = Depends(get_session),
+    current_user: Principal = Depends(require_owner),
+    session: AsyncSession = Depends(get_session),
 ):
-    pet = get_pet_by_id(session=session, pet_id=pet_id, user_id=current_user.id)
+    pet = await get_pet_by_id(session=session, pet_id=pet_id, user_id=current_user.id)
     if not pet:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pet not found.")
-    delete_pet(session=session, pet=pet)
+    await delete_pet(session=session, pet=pet)
+    await commit(session)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,147 @@
+import base64
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.auth_cache import Principal
+from app.core.config import get_settings
+from app.core.security import get_current_principal
+from app.core.serialization import ORJSON_OPTIONS, schema_columns
+from app.crud.sync import BOOKINGS, PETS, TIME_OFF, WORKING_HOURS, Position, get_changed_since
+from app.models.bookings import Bookings
+from app.models.enums import UserRole
+from app.models.pets import Pets
+from app.models.tombstones import Tombstones
+from app.models.vet_time_off import VetTimeOff
+from app.models.vet_working_hours import VetWorkingHours
+from app.schema.bookings import BookingResponse
+from app.schema.database import get_session
+from app.schema.pets import PetResponse
+from app.schema.sync import SyncResponse
+from app.schema.vet_time_off import VetTimeOffResponse
+from app.schema.vet_working_hours import VetWorkingHoursResponse
+
+router = APIRouter(tags=["sync"])
+
+settings = get_settings()
+
+SYNC_PAGE_SIZE = 500
+MAX_SYNC_PAGE_SIZE = 2000
+# updated_at is stamped at flush, so a row can commit after a later-stamped row
+# has been read. Positions stay this far behind the clock so such a row is
+# still ahead of the next token. Rows in that margin may come twice, and
+# clients upsert by id.
+SYNC_SETTLE = timedelta(seconds=30)
+DELETED = "deleted"
+_START = UUID(int=0)
+
+PET_COLUMNS = schema_columns(Pets, PetResponse)
+BOOKING_COLUMNS = schema_columns(Bookings, BookingResponse)
+WORKING_HOUR_COLUMNS = schema_columns(VetWorkingHours, VetWorkingHoursResponse)
+TIME_OFF_COLUMNS = schema_columns(VetTimeOff, VetTimeOffResponse)
+TOMBSTONE_COLUMNS = (Tombstones.collection, Tombstones.entity_id.label("id"))
+
+
+@dataclass(frozen=True)
+class _Stream:
+    """One collection of the response and the rows of it the caller syncs."""
+    name: str
+    columns: Tuple[Any, ...]
+    changed_at: Any
+    key: Any
+    scope: Any
+
+
+def _streams(principal: Principal) -> List[_Stream]:
+    if principal.role == UserRole.VET:
+        if principal.vet_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vet profile not found")
+        vet_id = principal.vet_id
+        return [
+            _Stream(BOOKINGS, BOOKING_COLUMNS, Bookings.updated_at, Bookings.id, Bookings.vet_id == vet_id),
+            _Stream(WORKING_HOURS, WORKING_HOUR_COLUMNS, VetWorkingHours.updated_at, VetWorkingHours.id,
+                    VetWorkingHours.vet_id == vet_id),
+            _Stream(TIME_OFF, TIME_OFF_COLUMNS, VetTimeOff.updated_at, VetTimeOff.id, VetTimeOff.vet_id == vet_id),
+            _Stream(DELETED, TOMBSTONE_COLUMNS, Tombstones.deleted_at, Tombstones.id, Tombstones.vet_id == vet_id),
+        ]
+    return [
+        _Stream(PETS, PET_COLUMNS, Pets.updated_at, Pets.id, Pets.user_id == principal.id),
+        _Stream(BOOKINGS, BOOKING_COLUMNS, Bookings.updated_at, Bookings.id, Bookings.user_id == principal.id),
+        _Stream(DELETED, TOMBSTONE_COLUMNS, Tombstones.deleted_at, Tombstones.id, Tombstones.user_id == principal.id),
+    ]
+
+
+def _encode_token(user_id: UUID, positions: Dict[str, Position]) -> str:
+    raw = orjson.dumps({
+        "u": str(user_id),
+        "p": {name: [at.isoformat(), str(key)] for name, (at, key) in positions.items()},
+    })
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_token(token: str, user_id: UUID, names: Sequence[str]) -> Dict[str, Position]:
+    try:
+        data = orjson.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if data["u"] != str(user_id):
+            raise ValueError(token)
+        return {name: (datetime.fromisoformat(data["p"][name][0]), UUID(data["p"][name][1])) for name in names}
+    except (ValueError, KeyError, IndexError, TypeError):
+        # A token from another account or role is as unusable as a mangled one
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token.")
+
+
+@router.get("/sync", response_model=SyncResponse)
+async def sync_changes(
+    since: Optional[str] = Query(None, description="next_token of the previous sync; omit for a full sync"),
+    limit: int = Query(SYNC_PAGE_SIZE, ge=1, le=MAX_SYNC_PAGE_SIZE, description="Most rows per collection"),
+    session: AsyncSession = Depends(get_session),
+    principal: Principal = Depends(get_current_principal),
+):
+    """Rows created, updated or deleted since ``since``, and the token for the next sync.
+
+    While ``has_more`` is true, call again straight away with ``next_token``.
+    """
+    now = datetime.now()
+    settled = (now - SYNC_SETTLE, _START)
+    streams = _streams(principal)
+    if since is None:
+        positions = {stream.name: (datetime.min, _START) for stream in streams}
+        # A fresh copy has nothing to delete from before it was taken
+        positions[DELETED] = settled
+    else:
+        positions = _decode_token(since, principal.id, [stream.name for stream in streams])
+        if positions[DELETED][0] < now - timedelta(days=settings.sync_tombstone_retention_days):
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Sync token has expired; sync again without since.",
+            )
+
+    body: Dict[str, Any] = {PETS: [], BOOKINGS: [], WORKING_HOURS: [], TIME_OFF: [], DELETED: []}
+    has_more = False
+    for stream in streams:
+        rows = await get_changed_since(
+            session=session,
+            columns=stream.columns,
+            changed_at=stream.changed_at,
+            key=stream.key,
+            scope=stream.scope,
+            after=positions[stream.name],
+            limit=limit,
+        )
+        page = rows[:limit]
+        # The trailing (changed_at, key) pair is only for the token
+        body[stream.name] = [dict(zip(row._fields[:len(stream.columns)], row)) for row in page]
+        if len(rows) > limit:
+            has_more = True
+            positions[stream.name] = (page[-1][-2], page[-1][-1])
+        else:
+            positions[stream.name] = max(positions[stream.name], settled)
+
+    body["next_token"] = _encode_token(principal.id, positions)
+    body["has_more"] = has_more
+    return Response(content=orjson.dumps(body, option=ORJSON_OPTIONS), media_type="application/json")
@@ -1,66 +1,78 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 from app.schema.database import get_session
 from app.models.users import Users
-from passlib.context import CryptContext
-from app.core.security import create_access_token, get_current_user
+from app.core.passwords import PasswordHasherBusy, password_hasher
+from app.core.security import create_access_token, get_current_user, principal_claims
+from app.core.unit_of_work import commit
 from app.schema.users import UserCreate, UserUpdate, UserResponse, UserLogin
 from app.schema.vets import VetRegister, VetResponse, VetCreate
 from app.crud.users import get_user_by_email, create_user
-from app.crud.vets import create_vet
+from app.crud.vets import create_vet, get_vet_by_user_id
 from app.models.enums import UserRole
 
 
 router = APIRouter(tags =["users"])
 
 
-"""password hashing"""
-pwd_context = CryptContext(schemes=["bcrypt"],deprecated="auto")
-def hash_password(password:str) -> str:
-    return pwd_context.hash(password)
+"""password hashing (bcrypt runs on a bounded worker pool, see app.core.passwords)"""
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code = status.HTTP_429_TOO_MANY_REQUESTS,
+        detail = "Too many sign-in requests, please retry shortly",
+        headers = {"Retry-After" : "1"},
+    )
+
+async def hash_password(password:str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
 
 
 
 """API ENDPOINTS HERE"""
 
 @router.post("/users/register")
-async def user_register(user_data : UserCreate, session : Session = Depends(get_session)):
+async def user_register(user_data : UserCreate, session : AsyncSession = Depends(get_session)):
     
     #checking if the user already exists or not
-    existing_user = get_user_by_email(session,user_data.email)
+    existing_user = await get_user_by_email(session,user_data.email)
 
     if existing_user:
         raise HTTPException(status_code = status.HTTP_409_CONFLICT,detail  = "Email already registered")
 
     #hashing password
-    hashed_password=  hash_password(user_data.password)
+    hashed_password=  await hash_password(user_data.password)
 
     #Create a new user object
-    new_user = create_user(session, user_data, hashed_password, role=user_data.role)
+    new_user = await create_user(session, user_data, hashed_password, role=user_data.role)
+    await commit(session)
 
     return {"message" : "User registered succesfully", "id" : new_user.id}
 
 
 @router.post("/vets/register")
-async def vet_register(vet_data: VetRegister, session: Session = Depends(get_session)):
+async def vet_register(vet_data: VetRegister, session: AsyncSession = Depends(get_session)):
 
     #checking if the user already exists or not
-    existing_user = get_user_by_email(session, vet_data.email)
+    existing_user = await get_user_by_email(session, vet_data.email)
     if existing_user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
 
     #hashing password
-    hashed_password = hash_password(vet_data.password)
+    hashed_password = await hash_password(vet_data.password)
 
-    #create user account with vet role
+    #create user account with vet role (user and profile are committed together)
     user_create = UserCreate(
         email=vet_data.email,
         full_name=vet_data.full_name,
         password=vet_data.password,
         role=UserRole.VET,
     )
-    new_user = create_user(session, user_create, hashed_password, role=UserRole.VET)
+    new_user = await create_user(session, user_create, hashed_password, role=UserRole.VET)
 
     #create linked vet profile
     vet_profile_data = VetCreate(
@@ -74,21 +86,22 @@ async def vet_register(vet_data: VetRegister, session: Session = Depends(get_ses
         postal_code=vet_data.postal_code,
         country=vet_data.country,
     )
-    new_vet = create_vet(
+    new_vet = await create_vet(
         session=session,
         vet_data=vet_profile_data,
         user_id=new_user.id,
         full_name=new_user.full_name,
         email=new_user.email,
     )
+    await commit(session)
 
     return {"message": "Vet registered successfully", "user_id": new_user.id, "vet_id": new_vet.id}
 
 
 @router.post("/auth/login")
-async def user_login(user_data : UserLogin, session:Session = Depends(get_session)):
+async def user_login(user_data : UserLogin, session:AsyncSession = Depends(get_session)):
     #checking if the user exists or not
-    user = session.exec(select(Users).where(Users.email == user_data.email)).first()
+    user = (await session.exec(select(Users).where(Users.email == user_data.email))).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -96,15 +109,26 @@ async def user_login(user_data : UserLogin, session:Session = Depends(get_sessio
         )
 
     #verifying password
-    if not pwd_context.verify(user_data.password , user.password_hash):
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(user_data.password , user.password_hash)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    if not valid:
          raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail = "Incorrect email or password",
         )
 
-    #creating JWT token
+    #transparently upgrade hashes made with an old bcrypt cost factor
+    if new_hash:
+        user.password_hash = new_hash
+        session.add(user)
+        await commit(session)
+
+    #creating JWT token (role / vet_id claims let the auth hot path skip the DB)
+    vet = await get_vet_by_user_id(session, user.id) if user.role == UserRole.VET else None
     access_token = create_access_token(
-        data = {"sub" : str(user.id)}
+        data = principal_claims(user, vet)
     )
 
     #returning the access token to the client
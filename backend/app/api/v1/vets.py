@@ -1,39 +1,117 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlmodel import Session
-from typing import List
+from bisect import bisect_right
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Optional, Tuple
 from uuid import UUID
+from datetime import datetime, timedelta, timezone
 from app.schema.database import get_session
-from app.core.security import get_current_user, require_vet, get_current_vet_profile
-from app.schema.vets import VetResponse, VetUpdate
+from app.core.auth_cache import Principal
+from app.core.security import get_current_principal, get_current_vet_id, get_current_vet_profile
+from app.core.response_cache import DIRECTORY_SCOPE, response_cache, vet_scope
+from app.core.serialization import json_response, rows_response
+from app.core.unit_of_work import commit
+from app.core.pagination import PageParams, decode_cursor, page_params, paginate, set_next_cursor
+from app.models.enums import DayOfWeek, VetSpecialty
+from app.schema.vets import VetNearby, VetResponse, VetSummary, VetUpdate
 from app.schema.vet_working_hours import VetWorkingHoursCreate, VetWorkingHoursResponse
 from app.schema.vet_time_off import VetTimeOffCreate, VetTimeOffResponse
-from app.models.users import Users
+from app.schema.availability import AvailabilitySlot, VetAvailabilityResponse
+from app.core.availability import FreeSlotIndex, find_overlapping_rules, merge_intervals, to_naive_utc
 from app.models.vets import Vets
-from app.crud.vets import get_vets, get_vet_by_id, update_vet
+from app.crud.vets import find_vets_near, get_directory_rows, search_vets, get_vet_by_id, update_vet
 from app.crud.vet_working_hours import (
     create_working_hour,
+    replace_working_hours,
     get_working_hours_by_vet,
     get_working_hour_by_id,
     delete_working_hour,
 )
 from app.crud.vet_time_off import (
     create_time_off,
+    create_time_off_batch,
     get_time_off_by_vet,
+    get_time_off_for_vet_between,
     get_time_off_by_id,
     delete_time_off,
 )
+from app.crud.bookings import find_bookings_overlapping, list_active_bookings_for_vet_between
 
 router = APIRouter(tags=["vets"])
 
+MAX_AVAILABILITY_WINDOW = timedelta(days=90)
+MAX_SCHEDULE_RULES = 50
+MAX_TIME_OFF_BATCH = 200
+MAX_NEARBY_RADIUS_KM = 50
+
 
 # ── Public / any authenticated user ──────────────────────────────────────────
 
-@router.get("/vets", response_model=List[VetResponse])
+def _vet_key(vet) -> Tuple[str, UUID]:
+    return vet["full_name"], vet["id"]
+
+
+@router.get("/vets", response_model=List[VetSummary], response_model_exclude_unset=True)
 async def read_all_vets(
-    session: Session = Depends(get_session),
-    current_user: Users = Depends(get_current_user),
+    request: Request,
+    q: Optional[str] = Query(None, max_length=200, description="Prefix search over name, clinic and bio"),
+    specialties: Optional[List[VetSpecialty]] = Query(None, alias="specialty"),
+    city: Optional[str] = Query(None),
+    state_region: Optional[str] = Query(None),
+    postal_code: Optional[str] = Query(None),
+    country: Optional[str] = Query(None),
+    include_bio: bool = Query(False),
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    return get_vets(session=session)
+    async def build() -> Response:
+        rows = await search_vets(
+            session=session,
+            limit=page.limit,
+            q=q,
+            specialties=specialties,
+            city=city,
+            state_region=state_region,
+            postal_code=postal_code,
+            country=country,
+            after=decode_cursor(page.cursor, str, UUID) if page.cursor else None,
+            include_bio=include_bio,
+        )
+        # Rows carry only the selected columns, so bio is absent unless requested
+        vets, next_cursor = paginate(rows, page.limit, _vet_key)
+        response = rows_response(vets)
+        set_next_cursor(response, next_cursor)
+        return response
+
+    return await response_cache.respond(request, [DIRECTORY_SCOPE], build)
+
+
+@router.get("/vets/nearby", response_model=List[VetNearby])
+async def read_nearby_vets(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: float = Query(10, gt=0, le=MAX_NEARBY_RADIUS_KM, description="Kilometres"),
+    specialties: Optional[List[VetSpecialty]] = Query(None, alias="specialty"),
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
+):
+    async def build() -> Response:
+        after = decode_cursor(page.cursor, float, UUID) if page.cursor else None
+        nearby = await find_vets_near(
+            session=session, latitude=lat, longitude=lon, radius_km=radius,
+            limit=page.limit, specialties=specialties, after=after,
+        )
+        items, next_cursor = paginate(nearby, page.limit, lambda item: item)
+        rows = await get_directory_rows(session, [vet_id for _, vet_id in items])
+        response = rows_response(
+            {**rows[vet_id], "distance_km": round(distance, 3)} for distance, vet_id in items if vet_id in rows
+        )
+        set_next_cursor(response, next_cursor)
+        return response
+
+    return await response_cache.respond(request, [DIRECTORY_SCOPE], build)
 
 
 @router.get("/vets/me", response_model=VetResponse)
@@ -46,13 +124,71 @@ async def read_own_vet_profile(
 @router.get("/vets/{vet_id}", response_model=VetResponse)
 async def read_vet_by_id(
     vet_id: UUID,
-    session: Session = Depends(get_session),
-    current_user: Users = Depends(get_current_user),
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
+):
+    async def build() -> Response:
+        specific_vet = await get_vet_by_id(session=session, vet_id=vet_id)
+        if not specific_vet:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vet not found.")
+        return json_response(VetResponse, specific_vet)
+
+    return await response_cache.respond(request, [vet_scope(vet_id)], build)
+
+
+@router.get("/vets/{vet_id}/availability", response_model=VetAvailabilityResponse)
+async def read_vet_availability(
+    vet_id: UUID,
+    from_: datetime = Query(..., alias="from", description="Window start (naive values are UTC)"),
+    to: datetime = Query(..., description="Window end (naive values are UTC)"),
+    duration: int = Query(30, ge=5, le=480, description="Slot length in minutes"),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    specific_vet = get_vet_by_id(session=session, vet_id=vet_id)
-    if not specific_vet:
+    window_start, window_end = to_naive_utc(from_), to_naive_utc(to)
+    if window_start >= window_end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from must be before to.",
+        )
+    if window_end - window_start > MAX_AVAILABILITY_WINDOW:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Availability window cannot exceed 90 days.",
+        )
+
+    vet = await get_vet_by_id(session=session, vet_id=vet_id)
+    if not vet or not vet.is_active:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vet not found.")
-    return specific_vet
+
+    # One query per source; the calendar itself is merged in memory.
+    working_hours = await get_working_hours_by_vet(session=session, vet_id=vet_id)
+    time_off = await get_time_off_for_vet_between(
+        session=session, vet_id=vet_id, start_at=window_start, end_at=window_end
+    )
+    bookings = await list_active_bookings_for_vet_between(
+        session=session,
+        vet_id=vet_id,
+        start_at=window_start.replace(tzinfo=timezone.utc),
+        end_at=window_end.replace(tzinfo=timezone.utc),
+    )
+    busy = [(t.start_at, t.end_at) for t in time_off] + [(b.start_at, b.end_at) for b in bookings]
+    index = FreeSlotIndex.build(working_hours, busy, window_start, window_end)
+
+    return VetAvailabilityResponse(
+        vet_id=vet_id,
+        start_at=window_start.replace(tzinfo=timezone.utc),
+        end_at=window_end.replace(tzinfo=timezone.utc),
+        duration_minutes=duration,
+        slots=[
+            AvailabilitySlot(
+                start_at=start.replace(tzinfo=timezone.utc),
+                end_at=end.replace(tzinfo=timezone.utc),
+            )
+            for start, end in index.slots(timedelta(minutes=duration))
+        ],
+    )
 
 
 # ── Vet self-management ──────────────────────────────────────────────────────
@@ -61,44 +197,85 @@ async def read_vet_by_id(
 async def update_own_vet_profile(
     vet_data: VetUpdate,
     vet: Vets = Depends(get_current_vet_profile),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
-    return update_vet(session=session, vet=vet, vet_data=vet_data)
+    vet = await update_vet(session=session, vet=vet, vet_data=vet_data)
+    await commit(session)
+    return vet
 
 
 # ── Working Hours ────────────────────────────────────────────────────────────
 
+def _ensure_no_overlap(rules) -> None:
+    clash = find_overlapping_rules(rules)
+    if clash:
+        first, second = clash
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Working hours overlap: {DayOfWeek(first.day).value} {first.start_time}-{first.end_time} "
+                f"and {DayOfWeek(second.day).value} {second.start_time}-{second.end_time}."
+            ),
+        )
+
+
 @router.post("/vets/me/working-hours", response_model=VetWorkingHoursResponse, status_code=status.HTTP_201_CREATED)
 async def create_vet_working_hour(
     new_vet_time: VetWorkingHoursCreate,
-    vet: Vets = Depends(get_current_vet_profile),
-    session: Session = Depends(get_session),
+    vet_id: UUID = Depends(get_current_vet_id),
+    session: AsyncSession = Depends(get_session),
+):
+    existing = await get_working_hours_by_vet(session=session, vet_id=vet_id)
+    _ensure_no_overlap([*existing, new_vet_time])
+    working_hour = await create_working_hour(session=session, vet_working_time_create=new_vet_time, vet_id=vet_id)
+    await commit(session)
+    return working_hour
+
+
+@router.put("/vets/me/working-hours", response_model=List[VetWorkingHoursResponse])
+async def replace_vet_working_hours(
+    rules: List[VetWorkingHoursCreate],
+    vet_id: UUID = Depends(get_current_vet_id),
+    session: AsyncSession = Depends(get_session),
 ):
-    return create_working_hour(session=session, vet_working_time_create=new_vet_time, vet_id=vet.id)
+    if len(rules) > MAX_SCHEDULE_RULES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A schedule can have at most {MAX_SCHEDULE_RULES} rules.",
+        )
+    _ensure_no_overlap(rules)
+    new_rules = await replace_working_hours(session=session, vet_id=vet_id, rules=rules)
+    await commit(session)
+    return new_rules
 
 
 @router.get("/vets/{vet_id}/working-hours", response_model=List[VetWorkingHoursResponse])
 async def read_vet_working_hours(
     vet_id: UUID,
-    session: Session = Depends(get_session),
-    current_user: Users = Depends(get_current_user),
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    vet = get_vet_by_id(session=session, vet_id=vet_id)
-    if not vet:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vet not found.")
-    return get_working_hours_by_vet(session=session, vet_id=vet_id)
+    async def build() -> Response:
+        vet = await get_vet_by_id(session=session, vet_id=vet_id)
+        if not vet:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vet not found.")
+        return json_response(List[VetWorkingHoursResponse], await get_working_hours_by_vet(session=session, vet_id=vet_id))
+
+    return await response_cache.respond(request, [vet_scope(vet_id)], build)
 
 
 @router.delete("/vets/me/working-hours/{working_hour_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_vet_working_hour(
     working_hour_id: UUID,
-    vet: Vets = Depends(get_current_vet_profile),
-    session: Session = Depends(get_session),
+    vet_id: UUID = Depends(get_current_vet_id),
+    session: AsyncSession = Depends(get_session),
 ):
-    working_hour = get_working_hour_by_id(session=session, working_hour_id=working_hour_id)
-    if not working_hour or working_hour.vet_id != vet.id:
+    working_hour = await get_working_hour_by_id(session=session, working_hour_id=working_hour_id)
+    if not working_hour or working_hour.vet_id != vet_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Working hour not found.")
-    delete_working_hour(session=session, working_hour=working_hour)
+    await delete_working_hour(session=session, working_hour=working_hour)
+    await commit(session)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -107,37 +284,92 @@ async def delete_vet_working_hour(
 @router.post("/vets/me/time-off", response_model=VetTimeOffResponse, status_code=status.HTTP_201_CREATED)
 async def create_vet_time_off(
     time_off_data: VetTimeOffCreate,
-    vet: Vets = Depends(get_current_vet_profile),
-    session: Session = Depends(get_session),
+    vet_id: UUID = Depends(get_current_vet_id),
+    session: AsyncSession = Depends(get_session),
 ):
     if time_off_data.start_at >= time_off_data.end_at:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="start_at must be before end_at.",
         )
-    return create_time_off(session=session, time_off_data=time_off_data, vet_id=vet.id)
+    time_off = await create_time_off(session=session, time_off_data=time_off_data, vet_id=vet_id)
+    await commit(session)
+    return time_off
+
+
+@router.post("/vets/me/time-off/batch", response_model=List[VetTimeOffResponse], status_code=status.HTTP_201_CREATED)
+async def create_vet_time_off_batch(
+    periods: List[VetTimeOffCreate],
+    vet_id: UUID = Depends(get_current_vet_id),
+    session: AsyncSession = Depends(get_session),
+):
+    if not periods:
+        return []
+    if len(periods) > MAX_TIME_OFF_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_TIME_OFF_BATCH} periods can be added at once.",
+        )
+    if any(period.start_at >= period.end_at for period in periods):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_at must be before end_at.",
+        )
+
+    # Overlapping or touching periods become one row; their reasons are kept together.
+    normalised = [(to_naive_utc(p.start_at), to_naive_utc(p.end_at), p.reason) for p in periods]
+    merged = merge_intervals((start, end) for start, end, _ in normalised)
+    merged_starts = [start for start, _ in merged]
+    reasons: List[List[str]] = [[] for _ in merged]
+    for start, _, reason in normalised:
+        slot = reasons[bisect_right(merged_starts, start) - 1]
+        if reason and reason not in slot:
+            slot.append(reason)
+
+    conflicts = await find_bookings_overlapping(session=session, vet_id=vet_id, intervals=merged)
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=(
+                f"Time off overlaps {len(conflicts)} existing booking(s), "
+                f"the first starting at {conflicts[0].start_at.isoformat()}."
+            ),
+        )
+
+    new_time_off = await create_time_off_batch(
+        session=session,
+        vet_id=vet_id,
+        intervals=[(start, end, "; ".join(why) or None) for (start, end), why in zip(merged, reasons)],
+    )
+    await commit(session)
+    return new_time_off
 
 
 @router.get("/vets/{vet_id}/time-off", response_model=List[VetTimeOffResponse])
 async def read_vet_time_off(
     vet_id: UUID,
-    session: Session = Depends(get_session),
-    current_user: Users = Depends(get_current_user),
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    vet = get_vet_by_id(session=session, vet_id=vet_id)
-    if not vet:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vet not found.")
-    return get_time_off_by_vet(session=session, vet_id=vet_id)
+    async def build() -> Response:
+        vet = await get_vet_by_id(session=session, vet_id=vet_id)
+        if not vet:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vet not found.")
+        return json_response(List[VetTimeOffResponse], await get_time_off_by_vet(session=session, vet_id=vet_id))
+
+    return await response_cache.respond(request, [vet_scope(vet_id)], build)
 
 
 @router.delete("/vets/me/time-off/{time_off_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_vet_time_off(
     time_off_id: UUID,
-    vet: Vets = Depends(get_current_vet_profile),
-    session: Session = Depends(get_session),
+    vet_id: UUID = Depends(get_current_vet_id),
+    session: AsyncSession = Depends(get_session),
 ):
-    time_off = get_time_off_by_id(session=session, time_off_id=time_off_id)
-    if not time_off or time_off.vet_id != vet.id:
+    time_off = await get_time_off_by_id(session=session, time_off_id=time_off_id)
+    if not time_off or time_off.vet_id != vet_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Time off not found.")
-    delete_time_off(session=session, time_off=time_off)
+    await delete_time_off(session=session, time_off=time_off)
+    await commit(session)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
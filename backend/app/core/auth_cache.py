@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+from itertools import chain
+from typing import Any, Dict, Optional, Type, TypeVar
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlmodel import SQLModel
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.models.enums import UserRole
+from app.models.users import Users
+from app.models.vets import Vets
+
+M = TypeVar("M", bound=SQLModel)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller: enough for ownership and role checks without a user row."""
+
+    id: UUID
+    role: UserRole
+    vet_id: Optional[UUID] = None
+
+
+@dataclass(frozen=True)
+class CachedPrincipal:
+    principal: Principal
+    user: Dict[str, Any]
+    vet: Optional[Dict[str, Any]]
+
+    def build_user(self) -> Users:
+        return _detached(Users, self.user)
+
+    def build_vet(self) -> Optional[Vets]:
+        return _detached(Vets, self.vet) if self.vet is not None else None
+
+
+def _detached(model: Type[M], values: Dict[str, Any]) -> M:
+    # A fresh detached instance per request: it can be read without IO or
+    # session.add()-ed for an update, and never shares state with another request.
+    instance = model(**values)
+    make_transient_to_detached(instance)
+    return instance
+
+
+class PrincipalCache:
+    """Authenticated user (+ vet profile) keyed by user id and token."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries: TTLCache[tuple, CachedPrincipal] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, user_id: UUID, token: str) -> Optional[CachedPrincipal]:
+        return self._entries.get((user_id, token))
+
+    def put(self, token: str, user: Users, vet: Optional[Vets]) -> CachedPrincipal:
+        entry = CachedPrincipal(
+            principal=Principal(id=user.id, role=user.role, vet_id=vet.id if vet else None),
+            user=user.model_dump(),
+            vet=vet.model_dump() if vet else None,
+        )
+        if self._entries.ttl > 0:
+            self._entries.set((user.id, token), entry)
+        return entry
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        self._entries.discard_where(lambda key: key[0] == user_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+settings = get_settings()
+principal_cache = PrincipalCache(
+    maxsize=settings.auth_cache_max_entries,
+    ttl=settings.auth_cache_ttl_seconds,
+)
+
+
+# ── Invalidation ─────────────────────────────────────────────────────────────
+# Any flushed change to a Users or Vets row drops that user's cached principals
+# once the transaction commits, whichever code path made the change.
+
+_PENDING_KEY = "principal_cache_invalidations"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_principal_changes(session: Session, flush_context: Any) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Users):
+            pending.add(obj.id)
+        elif isinstance(obj, Vets):
+            pending.add(obj.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_principals(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        principal_cache.invalidate_user(user_id)
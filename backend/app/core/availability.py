@@ -0,0 +1,216 @@
+import heapq
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta, timezone
+from itertools import islice
+from typing import Dict, Hashable, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+from app.models.enums import DayOfWeek
+from app.models.vet_working_hours import VetWorkingHours
+
+Interval = Tuple[datetime, datetime]
+K = TypeVar("K", bound=Hashable)
+
+# date.weekday() -> DayOfWeek
+WEEKDAYS: Tuple[DayOfWeek, ...] = (
+    DayOfWeek.MON,
+    DayOfWeek.TUE,
+    DayOfWeek.WED,
+    DayOfWeek.THU,
+    DayOfWeek.FRI,
+    DayOfWeek.SAT,
+    DayOfWeek.SUN,
+)
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Normalise a datetime to naive UTC; naive inputs are assumed to already be UTC."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort intervals and collapse the overlapping or touching ones."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(base: Sequence[Interval], busy: Sequence[Interval]) -> List[Interval]:
+    """Remove ``busy`` from ``base``; both must be sorted and non-overlapping."""
+    free: List[Interval] = []
+    j = 0
+    for start, end in base:
+        cursor = start
+        while j < len(busy) and busy[j][1] <= cursor:
+            j += 1
+        k = j
+        while k < len(busy) and busy[k][0] < end:
+            if busy[k][0] > cursor:
+                free.append((cursor, busy[k][0]))
+            cursor = max(cursor, busy[k][1])
+            if cursor >= end:
+                break
+            k += 1
+        if cursor < end:
+            free.append((cursor, end))
+    return free
+
+
+def expand_working_hours(
+    working_hours: Iterable[VetWorkingHours],
+    window_start: datetime,
+    window_end: datetime,
+) -> List[Interval]:
+    """Turn weekly ``VetWorkingHours`` rules into concrete intervals clipped to the window.
+
+    Rules whose ``end_time`` is not after ``start_time`` are treated as running past midnight.
+    """
+    rules: Dict[DayOfWeek, List[Tuple[time, time]]] = {}
+    for rule in working_hours:
+        if rule.is_active:
+            rules.setdefault(DayOfWeek(rule.day), []).append((rule.start_time, rule.end_time))
+    if not rules:
+        return []
+
+    intervals: List[Interval] = []
+    # Start a day early so overnight rules from the previous day are picked up.
+    day: date = window_start.date() - timedelta(days=1)
+    last_day: date = window_end.date()
+    while day <= last_day:
+        for start_time, end_time in rules.get(WEEKDAYS[day.weekday()], ()):
+            start = datetime.combine(day, start_time)
+            end = datetime.combine(day, end_time)
+            if end <= start:
+                end += timedelta(days=1)
+            start, end = max(start, window_start), min(end, window_end)
+            if start < end:
+                intervals.append((start, end))
+        day += timedelta(days=1)
+    return merge_intervals(intervals)
+
+
+WEEK_SECONDS = 7 * 24 * 3600
+
+
+def _week_span(rule) -> Tuple[int, int]:
+    """Seconds from Monday 00:00 covered by a weekly rule (overnight rules run past midnight)."""
+    day_offset = WEEKDAYS.index(DayOfWeek(rule.day)) * 24 * 3600
+    start = day_offset + rule.start_time.hour * 3600 + rule.start_time.minute * 60 + rule.start_time.second
+    end = day_offset + rule.end_time.hour * 3600 + rule.end_time.minute * 60 + rule.end_time.second
+    if end <= start:
+        end += 24 * 3600
+    return start, end
+
+
+def find_overlapping_rules(rules: Sequence) -> Optional[Tuple]:
+    """Return the first pair of weekly rules whose hours overlap, or None.
+
+    Rules only need ``day``, ``start_time`` and ``end_time``. Touching rules are
+    fine; a Sunday overnight rule is checked against Monday morning.
+    """
+    spans = []
+    for rule in rules:
+        start, end = _week_span(rule)
+        spans.append((start, end, rule))
+        if end > WEEK_SECONDS:
+            spans.append((start - WEEK_SECONDS, end - WEEK_SECONDS, rule))
+    spans.sort(key=lambda span: span[:2])
+    furthest = None
+    for start, end, rule in spans:
+        if furthest is not None and start < furthest[0] and furthest[1] is not rule:
+            return furthest[1], rule
+        if furthest is None or end > furthest[0]:
+            furthest = (end, rule)
+    return None
+
+
+class FreeSlotIndex:
+    """Sorted, non-overlapping free intervals for a single vet.
+
+    Built once per request from working hours minus busy intervals (time off and
+    bookings); lookups are a binary search instead of a query per candidate slot.
+    """
+
+    __slots__ = ("_starts", "_ends")
+
+    def __init__(self, free: Sequence[Interval]):
+        self._starts: List[datetime] = [start for start, _ in free]
+        self._ends: List[datetime] = [end for _, end in free]
+
+    @classmethod
+    def build(
+        cls,
+        working_hours: Iterable[VetWorkingHours],
+        busy: Iterable[Interval],
+        window_start: datetime,
+        window_end: datetime,
+    ) -> "FreeSlotIndex":
+        window_start, window_end = to_naive_utc(window_start), to_naive_utc(window_end)
+        base = expand_working_hours(working_hours, window_start, window_end)
+        blocked = merge_intervals((to_naive_utc(start), to_naive_utc(end)) for start, end in busy)
+        return cls(subtract_intervals(base, blocked))
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    @property
+    def intervals(self) -> List[Interval]:
+        return list(zip(self._starts, self._ends))
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        """True when ``[start, end)`` lies entirely inside one free interval."""
+        start, end = to_naive_utc(start), to_naive_utc(end)
+        i = bisect_right(self._starts, start) - 1
+        return i >= 0 and end <= self._ends[i]
+
+    def slots(
+        self,
+        duration: timedelta,
+        step: Optional[timedelta] = None,
+        not_before: Optional[datetime] = None,
+    ) -> Iterator[Interval]:
+        """Yield bookable ``duration``-long slots in chronological order."""
+        step = step or duration
+        i = 0
+        if not_before is not None:
+            not_before = to_naive_utc(not_before)
+            i = max(bisect_right(self._starts, not_before) - 1, 0)
+        for start, end in zip(self._starts[i:], self._ends[i:]):
+            cursor = start
+            if not_before is not None and cursor < not_before:
+                cursor = not_before
+            while cursor + duration <= end:
+                yield cursor, cursor + duration
+                cursor += step
+
+    def first_slot(self, duration: timedelta, not_before: Optional[datetime] = None) -> Optional[Interval]:
+        return next(self.slots(duration, not_before=not_before), None)
+
+
+def _tagged(key: K, slots: Iterator[Interval]) -> Iterator[Tuple[datetime, datetime, K]]:
+    for start, end in slots:
+        yield start, end, key
+
+
+def earliest_slots(
+    indexes: Mapping[K, FreeSlotIndex],
+    duration: timedelta,
+    limit: int,
+    not_before: Optional[datetime] = None,
+) -> List[Tuple[datetime, datetime, K]]:
+    """The ``limit`` earliest slots across several calendars, as (start, end, key).
+
+    Each calendar's slots are generated lazily and merged through a heap, so only
+    about ``limit`` slots per calendar are produced, however long the window is.
+    Ties go to the smaller key.
+    """
+    streams = [_tagged(key, index.slots(duration, not_before=not_before)) for key, index in indexes.items()]
+    return list(islice(heapq.merge(*streams), limit))
@@ -0,0 +1,141 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+
+
+def _env_str(name: str, default: Optional[str] = None) -> Optional[str]:
+    value = os.getenv(name)
+    return value if value not in (None, "") else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = _env_str(name)
+    return int(value) if value is not None else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = _env_str(name)
+    return float(value) if value is not None else default
+
+
+def _env_list(name: str) -> Tuple[str, ...]:
+    value = _env_str(name)
+    return tuple(part.strip() for part in value.split(",") if part.strip()) if value else ()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = _env_str(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class Settings:
+    database_url: Optional[str]
+    frontend_url: Optional[str]     # allowed CORS origin besides the local dev servers
+
+    # Engine / pool tuning
+    db_pool: str                    # "queue" (default) or "null" for pgbouncer deployments
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout: float          # seconds to wait for a pooled connection
+    db_pool_recycle: int            # seconds; -1 disables recycling
+    db_pool_pre_ping: bool
+    db_statement_timeout_ms: int    # 0 disables; Postgres only
+    db_log_level: str               # sqlalchemy.engine logger: WARNING, INFO (SQL) or DEBUG (SQL + rows)
+
+    # Authentication
+    jwt_secret_key: Optional[str]
+    auth_cache_ttl_seconds: float   # 0 disables the principal cache
+    auth_cache_max_entries: int
+    auth_trust_token_claims: bool   # trust role / vet_id claims instead of loading the user
+
+    # Listings
+    page_size_default: int
+    page_size_max: int
+
+    # Response cache (ETag / 304 for read-mostly vet endpoints)
+    response_cache_backend: str     # "memory" (default), "redis" or "none"
+    response_cache_url: Optional[str]
+    response_cache_ttl_seconds: float
+    response_cache_max_entries: int
+
+    # Server-sent booking events
+    events_backend: str             # "local" (one worker) or "postgres" (LISTEN/NOTIFY across workers)
+    events_queue_size: int          # frames buffered per subscriber before it is disconnected
+    events_heartbeat_seconds: float
+
+    # Idempotency-Key replay for POSTs that create rows
+    idempotency_backend: str        # "memory" (default, one worker), "database" (shared) or "none"
+    idempotency_ttl_seconds: float  # how long a response can be replayed
+    idempotency_max_entries: int    # memory backend only
+    idempotency_wait_seconds: float # a duplicate waits this long for the first request, then gets 409
+
+    # Delta sync
+    sync_tombstone_retention_days: int  # older sync tokens get a 410 and must resync in full
+
+    # Request instrumentation
+    server_timing: bool             # add a Server-Timing header (total / db / pool) to responses
+    slow_request_ms: float          # log slower requests with their SQL; 0 disables
+
+    # Profiling (debug only): X-Profile requests from these users are profiled
+    profiling_enabled: bool
+    profiling_allowed_users: Tuple[str, ...]  # user ids
+    profiling_max_profiles: int     # reports kept in memory per worker
+
+    # Password hashing
+    bcrypt_rounds: int              # changing this rehashes passwords on their next login
+    password_hash_workers: int
+    password_hash_max_pending: int  # hash / verify calls beyond this get a 429
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        load_dotenv()
+        return cls(
+            database_url=_env_str("DATABASE_URL"),
+            frontend_url=_env_str("FRONTEND_URL"),
+            db_pool=_env_str("DB_POOL", "queue").lower(),
+            db_pool_size=_env_int("DB_POOL_SIZE", 5),
+            db_max_overflow=_env_int("DB_MAX_OVERFLOW", 10),
+            db_pool_timeout=_env_float("DB_POOL_TIMEOUT", 30.0),
+            db_pool_recycle=_env_int("DB_POOL_RECYCLE", 1800),
+            db_pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+            db_statement_timeout_ms=_env_int("DB_STATEMENT_TIMEOUT_MS", 15000),
+            db_log_level=_env_str("DB_LOG_LEVEL", "WARNING").upper(),
+            jwt_secret_key=_env_str("jwt_token_secret_key"),
+            auth_cache_ttl_seconds=_env_float("AUTH_CACHE_TTL_SECONDS", 60.0),
+            auth_cache_max_entries=_env_int("AUTH_CACHE_MAX_ENTRIES", 10000),
+            auth_trust_token_claims=_env_bool("AUTH_TRUST_TOKEN_CLAIMS", False),
+            page_size_default=_env_int("PAGE_SIZE_DEFAULT", 100),
+            page_size_max=_env_int("PAGE_SIZE_MAX", 500),
+            response_cache_backend=_env_str("RESPONSE_CACHE_BACKEND", "memory").lower(),
+            response_cache_url=_env_str("RESPONSE_CACHE_URL", "redis://localhost:6379/0"),
+            response_cache_ttl_seconds=_env_float("RESPONSE_CACHE_TTL_SECONDS", 300.0),
+            response_cache_max_entries=_env_int("RESPONSE_CACHE_MAX_ENTRIES", 5000),
+            events_backend=_env_str("EVENTS_BACKEND", "local").lower(),
+            events_queue_size=_env_int("EVENTS_QUEUE_SIZE", 100),
+            events_heartbeat_seconds=_env_float("EVENTS_HEARTBEAT_SECONDS", 15.0),
+            idempotency_backend=_env_str("IDEMPOTENCY_BACKEND", "memory").lower(),
+            idempotency_ttl_seconds=_env_float("IDEMPOTENCY_TTL_SECONDS", 86400.0),
+            idempotency_max_entries=_env_int("IDEMPOTENCY_MAX_ENTRIES", 10000),
+            idempotency_wait_seconds=_env_float("IDEMPOTENCY_WAIT_SECONDS", 10.0),
+            sync_tombstone_retention_days=_env_int("SYNC_TOMBSTONE_RETENTION_DAYS", 30),
+            server_timing=_env_bool("SERVER_TIMING", True),
+            slow_request_ms=_env_float("SLOW_REQUEST_MS", 500.0),
+            profiling_enabled=_env_bool("PROFILING_ENABLED", False),
+            profiling_allowed_users=_env_list("PROFILING_ALLOWED_USERS"),
+            profiling_max_profiles=_env_int("PROFILING_MAX_PROFILES", 50),
+            bcrypt_rounds=_env_int("BCRYPT_ROUNDS", 12),
+            password_hash_workers=_env_int("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)),
+            password_hash_max_pending=_env_int("PASSWORD_HASH_MAX_PENDING", 64),
+        )
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Settings are read from the environment (and .env) once per process."""
+    return Settings.from_env()
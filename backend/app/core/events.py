@@ -0,0 +1,234 @@
+"""Server-sent events: an in-process pub/sub hub with a cross-worker broker.
+
+Writers queue an event with :meth:`EventHub.publish_on_commit`. It is published
+once the transaction commits and never for a rolled-back one. The event is
+encoded as an SSE frame once, and the same bytes go to every subscriber of its
+topics. Each subscriber has a bounded queue. One that falls behind is
+disconnected rather than made to skip events, and its EventSource reconnects.
+
+With EVENTS_BACKEND=local, events only reach subscribers in the publishing
+process, which is enough for a single worker. With EVENTS_BACKEND=postgres,
+every worker LISTENs on one channel and publishing is a NOTIFY. Every worker,
+the publisher included, then delivers the event to its own subscribers.
+Subscribers that were connected while the listener was down miss those events.
+Clients should refetch their list after reconnecting.
+"""
+import asyncio
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Sequence, Set
+
+from sqlalchemy.engine import make_url
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import Settings, get_settings
+from app.core.metrics import CallbackGauge, register
+from app.core.unit_of_work import on_commit
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "petique_events"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_BYTES = 7900
+# Sent first: how long an EventSource waits before reconnecting (ms)
+RETRY_FRAME = b"retry: 3000\n\n"
+HEARTBEAT_FRAME = b": keepalive\n\n"
+
+Deliver = Callable[[Sequence[str], bytes], None]
+
+
+def sse_frame(event: str, data: str) -> bytes:
+    """One SSE message; ``data`` must be a single line (e.g. compact JSON)."""
+    return f"event: {event}\ndata: {data}\n\n".encode()
+
+
+def vet_topic(vet_id: Any) -> str:
+    return f"vet:{vet_id}"
+
+
+def user_topic(user_id: Any) -> str:
+    return f"user:{user_id}"
+
+
+class Subscription:
+    """Frames for a set of topics; ``None`` in the queue means it was dropped."""
+
+    def __init__(self, topics: Sequence[str], queue_size: int):
+        self.topics = tuple(topics)
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=queue_size)
+
+    def offer(self, frame: bytes) -> bool:
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def frames(self, heartbeat_seconds: float, until: Optional[float] = None) -> AsyncIterator[bytes]:
+        """Queued frames, with a heartbeat comment when nothing arrives for a while.
+
+        Ends at ``until`` (a ``time.time()`` value), if given.
+        """
+        while True:
+            timeout = heartbeat_seconds
+            if until is not None:
+                remaining = until - time.time()
+                if remaining <= 0:
+                    return
+                timeout = min(timeout, remaining)
+            try:
+                frame = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                if until is None or time.time() < until:
+                    yield HEARTBEAT_FRAME
+                continue
+            if frame is None:
+                return
+            yield frame
+
+
+class PostgresBroker:
+    """Fans frames out to every worker through Postgres LISTEN/NOTIFY."""
+
+    def __init__(self, dsn: str, channel: str = NOTIFY_CHANNEL, retry_seconds: float = 1.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.retry_seconds = retry_seconds
+        self._connection: Any = None
+        self._task: Optional[asyncio.Task] = None
+        # An asyncpg connection runs one statement at a time
+        self._lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed()
+
+    async def start(self, deliver: Deliver) -> None:
+        self._task = asyncio.create_task(self._listen(deliver))
+
+    async def _listen(self, deliver: Deliver) -> None:
+        import asyncpg
+
+        def on_notify(connection: Any, pid: int, channel: str, payload: str) -> None:
+            message = json.loads(payload)
+            deliver(message["topics"], message["frame"].encode())
+
+        while True:
+            lost = asyncio.Event()
+            try:
+                self._connection = await asyncpg.connect(self.dsn)
+                self._connection.add_termination_listener(lambda connection: lost.set())
+                await self._connection.add_listener(self.channel, on_notify)
+                await lost.wait()
+                logger.warning("Event listener connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Event listener could not connect", exc_info=True)
+            finally:
+                if self._connection is not None and not self._connection.is_closed():
+                    self._connection.terminate()
+                self._connection = None
+            await asyncio.sleep(self.retry_seconds)
+
+    async def publish(self, topics: Sequence[str], frame: bytes) -> bool:
+        """NOTIFY every worker; False when the frame could not be sent."""
+        payload = json.dumps({"topics": list(topics), "frame": frame.decode()})
+        if len(payload.encode()) > MAX_NOTIFY_BYTES or not self.connected:
+            return False
+        async with self._lock:
+            await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+        return True
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class EventHub:
+    def __init__(self, broker: Optional[PostgresBroker], queue_size: int, heartbeat_seconds: float):
+        self.broker = broker
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    @property
+    def subscriber_count(self) -> int:
+        return len({subscription for subscribers in self._subscribers.values() for subscription in subscribers})
+
+    async def start(self) -> None:
+        if self.broker is not None:
+            await self.broker.start(self._deliver)
+
+    async def stop(self) -> None:
+        if self.broker is not None:
+            await self.broker.stop()
+
+    @contextmanager
+    def subscribe(self, topics: Sequence[str]) -> Iterator[Subscription]:
+        subscription = Subscription(topics, self.queue_size)
+        for topic in subscription.topics:
+            self._subscribers.setdefault(topic, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._unsubscribe(subscription)
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        for topic in subscription.topics:
+            subscribers = self._subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    def _deliver(self, topics: Sequence[str], frame: bytes) -> None:
+        # A subscriber on several of the topics still gets the frame once
+        subscriptions = {subscription for topic in topics for subscription in self._subscribers.get(topic, ())}
+        for subscription in subscriptions:
+            if not subscription.offer(frame):
+                logger.warning("Dropping a slow event subscriber (%s)", ", ".join(subscription.topics))
+                self._unsubscribe(subscription)
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(None)
+
+    async def publish(self, topics: Sequence[str], frame: bytes) -> None:
+        if self.broker is not None:
+            try:
+                if await self.broker.publish(topics, frame):
+                    return
+            except Exception:
+                logger.warning("Event broadcast failed", exc_info=True)
+            # Without the broker, at least this worker's subscribers hear about it
+        self._deliver(topics, frame)
+
+    def publish_on_commit(self, session: AsyncSession, topics: Sequence[str], frame: bytes) -> None:
+        on_commit(session, lambda: self.publish(topics, frame))
+
+
+def _listen_dsn(url: str) -> str:
+    """The DATABASE_URL as a plain libpq DSN for asyncpg.connect"""
+    parsed = make_url(url)
+    query = {key: value for key, value in parsed.query.items() if key != "channel_binding"}
+    return parsed.set(drivername="postgresql", query=query).render_as_string(hide_password=False)
+
+
+def build_event_hub(settings: Settings) -> EventHub:
+    broker: Optional[PostgresBroker] = None
+    if settings.events_backend == "postgres":
+        broker = PostgresBroker(_listen_dsn(settings.database_url))
+    elif settings.events_backend != "local":
+        raise RuntimeError(f"Unknown EVENTS_BACKEND {settings.events_backend!r}; use 'local' or 'postgres'")
+    return EventHub(broker, queue_size=settings.events_queue_size, heartbeat_seconds=settings.events_heartbeat_seconds)
+
+
+event_hub = build_event_hub(get_settings())
+register(CallbackGauge("events_subscribers", "Open server-sent event streams.", lambda: event_hub.subscriber_count))
@@ -0,0 +1,84 @@
+"""Distances and the fixed grid used to find vets near a point.
+
+The globe is cut into CELL_DEGREES x CELL_DEGREES cells, numbered row by row
+from (-90, -180). ``Vets.grid_cell`` stores the cell of each geocoded clinic.
+Cells in a row have consecutive numbers, so the cells that touch a search
+circle form a few contiguous ranges, one per row. The ranges are then scanned
+through ix_vets_active_grid_cell. Exact distances are only computed for the
+vets in those cells, vectorized with numpy.
+"""
+import math
+from typing import List, Sequence, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+# About 11 km north-south; a 10 km search touches 3-4 rows
+CELL_DEGREES = 0.1
+GRID_ROWS = round(180 / CELL_DEGREES)
+GRID_COLUMNS = round(360 / CELL_DEGREES)
+
+
+def _row(latitude: float) -> int:
+    return min(int((latitude + 90) // CELL_DEGREES), GRID_ROWS - 1)
+
+
+def _column(longitude: float) -> int:
+    return int(((longitude + 180) % 360) // CELL_DEGREES)
+
+
+def grid_cell(latitude: float, longitude: float) -> int:
+    return _row(latitude) * GRID_COLUMNS + _column(longitude)
+
+
+def _bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lon, max_lon) around the circle; longitudes may pass ±180."""
+    lat_delta = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = max(latitude - lat_delta, -90.0), min(latitude + lat_delta, 90.0)
+    # The circle is widest at the latitude closest to a pole
+    widest = max(abs(min_lat), abs(max_lat))
+    cos_lat = math.cos(math.radians(widest))
+    if cos_lat * 360 * KM_PER_DEGREE_LAT <= 2 * radius_km:
+        return min_lat, max_lat, -180.0, 180.0
+    lon_delta = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    return min_lat, max_lat, longitude - lon_delta, longitude + lon_delta
+
+
+def cell_ranges(latitude: float, longitude: float, radius_km: float) -> List[Tuple[int, int]]:
+    """Inclusive ``grid_cell`` ranges covering every point within ``radius_km``."""
+    min_lat, max_lat, min_lon, max_lon = _bounding_box(latitude, longitude, radius_km)
+    if max_lon - min_lon >= 360 - CELL_DEGREES:
+        column_spans = [(0, GRID_COLUMNS - 1)]
+    else:
+        first, last = _column(min_lon), _column(max_lon)
+        # Crossing the antimeridian wraps the column numbers
+        column_spans = [(first, last)] if first <= last else [(first, GRID_COLUMNS - 1), (0, last)]
+    return [
+        (row * GRID_COLUMNS + first, row * GRID_COLUMNS + last)
+        for row in range(_row(min_lat), _row(max_lat) + 1)
+        for first, last in column_spans
+    ]
+
+
+def haversine_km(
+    latitude: float, longitude: float, latitudes: Sequence[float], longitudes: Sequence[float]
+) -> List[float]:
+    """Great-circle distances from one point to each of ``latitudes`` / ``longitudes``."""
+    # Imported here: numpy is only needed once a nearby search has candidates
+    import numpy
+
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    lat2 = numpy.radians(numpy.asarray(latitudes, dtype=float))
+    lon2 = numpy.radians(numpy.asarray(longitudes, dtype=float))
+    a = numpy.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * numpy.cos(lat2) * numpy.sin((lon2 - lon1) / 2) ** 2
+    return (2 * EARTH_RADIUS_KM * numpy.arcsin(numpy.sqrt(numpy.minimum(a, 1.0)))).tolist()
+
+
+def degree_weights(latitude: float) -> Tuple[float, float]:
+    """Kilometres per degree of latitude and of longitude along the parallel at ``latitude``.
+
+    Walking along that parallel and then along the other point's meridian is a
+    path between the two, so ``lat_km * |dlat| + lon_km * |dlon|`` is never
+    shorter than their great-circle distance. Both terms are plain arithmetic,
+    so the bound can be evaluated in SQL.
+    """
+    return KM_PER_DEGREE_LAT, KM_PER_DEGREE_LAT * math.cos(math.radians(latitude))
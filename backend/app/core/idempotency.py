@@ -0,0 +1,385 @@
+"""Idempotency-Key replay for the POST endpoints that create rows.
+
+A client that sends ``Idempotency-Key: <unique value>`` with one of these POSTs
+can retry it freely. The first request runs and its response is stored. A retry
+with the same key gets that response back, marked ``Idempotent-Replayed: true``,
+and the handler does not run again. Its validation queries and inserts happen
+once. A retry that arrives while the first request is still running waits for
+it, for up to IDEMPOTENCY_WAIT_SECONDS, instead of running alongside it.
+
+Keys are scoped to the caller (the user id of the verified bearer token) and
+the route. Two users, or one user on two routes, cannot collide, and a retry
+sent with a refreshed token still finds the first response. A request whose
+token does not verify bypasses the store and is rejected by the route. Reusing a key with a
+different body or query string gets 422. 5xx and 429 responses are not stored,
+so retrying one of those runs the request again.
+
+The memory store belongs to one worker. With several workers, set
+IDEMPOTENCY_BACKEND=database. All workers then share the idempotency_keys table,
+and inserting a key's row claims it.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+from app.core.config import Settings
+from app.core.metrics import Counter, register
+from app.core.security import verify_token
+from app.models.idempotency_keys import IdempotencyKeys
+from app.schema.database import get_engine
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+# A database claim lapses after this long, so a worker that died mid-request
+# does not block retries of it until the TTL runs out
+CLAIM_SECONDS = 60.0
+POLL_SECONDS = 0.05
+# The database store deletes expired keys on about one claim in this many
+PRUNE_EVERY = 100
+# Rate limited, so a retry is expected to run again
+_NOT_STORED = {429}
+
+IDEMPOTENCY_REQUESTS = Counter(
+    "idempotency_requests_total", "Requests sent with an Idempotency-Key, by outcome.", ("outcome",)
+)
+register(IDEMPOTENCY_REQUESTS)
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    status: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+
+
+@dataclass(frozen=True)
+class Entry:
+    """What a key holds: the first request's fingerprint and, once it finished, its response."""
+    fingerprint: str
+    response: Optional[StoredResponse]
+
+
+class IdempotencyStore(Protocol):
+    async def claim(self, key: str, fingerprint: str) -> Optional[Entry]:
+        """Take ``key`` for this request (None), or return what it already holds."""
+
+    async def wait(self, key: str, timeout: float) -> None:
+        """Return once the request holding ``key`` has finished, or after ``timeout``."""
+
+    async def complete(self, key: str, response: StoredResponse) -> None: ...
+
+    async def release(self, key: str) -> None:
+        """Drop a claim without a response, so a retry runs again."""
+
+
+class MemoryStore:
+    """Per-process store: finished responses in an LRU, running requests as futures."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._done: TTLCache[str, Entry] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._running: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[Entry]:
+        entry = self._done.get(key)
+        if entry is not None:
+            return entry
+        running = self._running.get(key)
+        if running is not None:
+            return Entry(fingerprint=running[0], response=None)
+        self._running[key] = (fingerprint, asyncio.get_running_loop().create_future())
+        return None
+
+    async def wait(self, key: str, timeout: float) -> None:
+        running = self._running.get(key)
+        if running is None:
+            return
+        try:
+            # Shielded: a waiter timing out must not cancel the future other waiters share
+            await asyncio.wait_for(asyncio.shield(running[1]), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def complete(self, key: str, response: StoredResponse) -> None:
+        running = self._running.get(key)
+        if running is not None:
+            self._done.set(key, Entry(fingerprint=running[0], response=response))
+        self._finish(key)
+
+    async def release(self, key: str) -> None:
+        self._finish(key)
+
+    def _finish(self, key: str) -> None:
+        running = self._running.pop(key, None)
+        if running is not None and not running[1].done():
+            running[1].set_result(None)
+
+
+class DatabaseStore:
+    """Store shared by every worker: one idempotency_keys row per key."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._claims = 0
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[Entry]:
+        table = IdempotencyKeys.__table__
+        engine = get_engine()
+        self._claims += 1
+        if self._claims % PRUNE_EVERY == 0:
+            await self.prune()
+        while True:
+            now = datetime.now()
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(insert(table).values(
+                        key=key, fingerprint=fingerprint, created_at=now,
+                        expires_at=now + timedelta(seconds=CLAIM_SECONDS),
+                    ))
+                return None
+            except IntegrityError:
+                pass
+            async with engine.begin() as conn:
+                row = (await conn.execute(
+                    select(table.c.fingerprint, table.c.status_code, table.c.headers, table.c.body, table.c.expires_at)
+                    .where(table.c.key == key)
+                )).first()
+                if row is not None and row.expires_at <= now:
+                    # Past its replay window, or claimed by a request that never finished
+                    await conn.execute(delete(table).where(table.c.key == key, table.c.expires_at <= now))
+                    continue
+            if row is None:
+                # Released between the insert and the read
+                continue
+            response = None
+            if row.status_code is not None:
+                response = StoredResponse(
+                    status=row.status_code,
+                    headers=[tuple(pair) for pair in json.loads(row.headers)],
+                    body=row.body,
+                )
+            return Entry(fingerprint=row.fingerprint, response=response)
+
+    async def wait(self, key: str, timeout: float) -> None:
+        table = IdempotencyKeys.__table__
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(POLL_SECONDS, max(deadline - time.monotonic(), 0)))
+            async with get_engine().connect() as conn:
+                row = (await conn.execute(select(table.c.status_code).where(table.c.key == key))).first()
+            if row is None or row.status_code is not None:
+                return
+
+    async def complete(self, key: str, response: StoredResponse) -> None:
+        table = IdempotencyKeys.__table__
+        async with get_engine().begin() as conn:
+            await conn.execute(update(table).where(table.c.key == key).values(
+                status_code=response.status,
+                headers=json.dumps(response.headers),
+                body=response.body,
+                expires_at=datetime.now() + timedelta(seconds=self.ttl),
+            ))
+
+    async def release(self, key: str) -> None:
+        table = IdempotencyKeys.__table__
+        async with get_engine().begin() as conn:
+            await conn.execute(delete(table).where(table.c.key == key, table.c.status_code.is_(None)))
+
+    async def prune(self) -> None:
+        table = IdempotencyKeys.__table__
+        async with get_engine().begin() as conn:
+            await conn.execute(delete(table).where(table.c.expires_at < datetime.now()))
+
+
+def _digest(*parts: Any) -> str:
+    sha = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode()
+        # Length-prefixed so ("ab", "c") and ("a", "bc") differ
+        sha.update(len(data).to_bytes(8, "big"))
+        sha.update(data)
+    return sha.hexdigest()
+
+
+def _caller(headers: Headers) -> Optional[str]:
+    """User id of the request's bearer token, or None when it has no valid one."""
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return verify_token(token).get("sub")
+    except HTTPException:
+        return None
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks: List[bytes] = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay_body(body: bytes, receive: Receive) -> Receive:
+    """A receive that hands the already-read body to the app once, then defers to ``receive``."""
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if sent:
+            return await receive()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replay
+
+
+async def _send_stored(response: StoredResponse, send: Send) -> None:
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in response.headers]
+    headers.append((REPLAYED_HEADER.lower().encode(), b"true"))
+    await send({"type": "http.response.start", "status": response.status, "headers": headers})
+    await send({"type": "http.response.body", "body": response.body})
+
+
+class IdempotencyMiddleware:
+    """Stores and replays responses of ``routes`` ((method, path) pairs) sent with an Idempotency-Key."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: Optional[IdempotencyStore],
+        routes: Sequence[Tuple[str, str]],
+        wait_seconds: float = 10.0,
+    ):
+        self.app = app
+        self.store = store
+        self.routes = frozenset(routes)
+        self.wait_seconds = wait_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.store is None or (scope["method"], scope["path"]) not in self.routes:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        caller = _caller(headers) if idempotency_key is not None else None
+        if caller is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": f"{IDEMPOTENCY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters."}, status_code=400
+            )
+            await response(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        receive = _replay_body(body, receive)
+        key = _digest(caller, scope["method"], scope["path"], idempotency_key)
+        fingerprint = _digest(scope.get("query_string", b""), body)
+
+        try:
+            entry = await self._claim(key, fingerprint)
+        except Exception:
+            logger.warning("Idempotency store unavailable, running the request without it", exc_info=True)
+            await self.app(scope, receive, send)
+            return
+
+        if entry is None:
+            IDEMPOTENCY_REQUESTS.inc("executed")
+            await self._run(scope, receive, send, key)
+            return
+        if entry.fingerprint != fingerprint:
+            IDEMPOTENCY_REQUESTS.inc("mismatch")
+            response = JSONResponse(
+                {"detail": f"This {IDEMPOTENCY_HEADER} was already used with a different request."}, status_code=422
+            )
+        elif entry.response is None:
+            IDEMPOTENCY_REQUESTS.inc("in_progress")
+            response = JSONResponse(
+                {"detail": f"A request with this {IDEMPOTENCY_HEADER} is still in progress; retry later."},
+                status_code=409,
+            )
+        else:
+            IDEMPOTENCY_REQUESTS.inc("replayed")
+            await _send_stored(entry.response, send)
+            return
+        await response(scope, receive, send)
+
+    async def _claim(self, key: str, fingerprint: str) -> Optional[Entry]:
+        """Claim ``key``, waiting out a request that holds it with the same body."""
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            entry = await self.store.claim(key, fingerprint)
+            remaining = deadline - time.monotonic()
+            if entry is None or entry.response is not None or entry.fingerprint != fingerprint or remaining <= 0:
+                return entry
+            await self.store.wait(key, remaining)
+
+    async def _run(self, scope: Scope, receive: Receive, send: Send, key: str) -> None:
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def send_and_capture(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_capture)
+        except BaseException:
+            await self._release(key)
+            raise
+        if start is None or start["status"] >= 500 or start["status"] in _NOT_STORED:
+            await self._release(key)
+            return
+        response = StoredResponse(
+            status=start["status"],
+            headers=[(name.decode("latin-1"), value.decode("latin-1")) for name, value in start.get("headers", [])],
+            body=b"".join(chunks),
+        )
+        try:
+            await self.store.complete(key, response)
+        except Exception:
+            logger.warning("Could not store the response for an idempotency key", exc_info=True)
+            await self._release(key)
+
+    async def _release(self, key: str) -> None:
+        try:
+            await self.store.release(key)
+        except Exception:
+            logger.warning("Could not release an idempotency key", exc_info=True)
+
+
+def build_idempotency_store(settings: Settings) -> Optional[IdempotencyStore]:
+    if settings.idempotency_backend == "memory":
+        return MemoryStore(maxsize=settings.idempotency_max_entries, ttl=settings.idempotency_ttl_seconds)
+    if settings.idempotency_backend == "database":
+        return DatabaseStore(ttl=settings.idempotency_ttl_seconds)
+    if settings.idempotency_backend == "none":
+        return None
+    raise RuntimeError(
+        f"Unknown IDEMPOTENCY_BACKEND {settings.idempotency_backend!r}; use 'memory', 'database' or 'none'"
+    )
@@ -0,0 +1,150 @@
+"""Per-request performance numbers: latency, SQL time, query and row counts, pool wait.
+
+RequestMetricsMiddleware opens a RequestStats for every HTTP request in a context
+variable. The engine events installed by instrument_engine and the timed pool in
+app.schema.database add to it. The response gets a Server-Timing header, the
+numbers go to the per-route series in app.core.metrics, and requests slower than
+SLOW_REQUEST_MS are logged with the SQL they issued.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import (
+    REQUEST_DB_TIME,
+    REQUEST_DURATION,
+    REQUEST_POOL_WAIT,
+    REQUEST_QUERIES,
+    REQUEST_ROWS,
+    REQUESTS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Statements kept per request for the slow-request log; later ones are only counted
+MAX_LOGGED_STATEMENTS = 50
+UNMATCHED_ROUTE = "<unmatched>"
+# Long-lived by design, so never reported as slow
+STREAMING_MEDIA_TYPES = ("text/event-stream",)
+_STARTED_KEY = "instrumentation_query_started"
+
+
+@dataclass
+class RequestStats:
+    started: float
+    queries: int = 0
+    rows: int = 0
+    db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+    statements: List[Tuple[float, str]] = field(default_factory=list)
+
+    def server_timing(self, now: float) -> str:
+        return (
+            f"total;dur={(now - self.started) * 1000:.1f}, "
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries, {self.rows} rows", '
+            f"pool;dur={self.pool_wait_seconds * 1000:.1f}"
+        )
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def record_pool_wait(seconds: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+
+def _rows_returned(cursor: Any) -> int:
+    # The async adapters buffer the whole result set on execute, so its size is
+    # already known here; server-side (streamed) results are not counted.
+    buffered = getattr(cursor, "_rows", None)
+    return len(buffered) if cursor.description is not None and buffered is not None else 0
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(_STARTED_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info[_STARTED_KEY].pop()
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.db_seconds += elapsed
+    stats.rows += _rows_returned(cursor)
+    if len(stats.statements) < MAX_LOGGED_STATEMENTS:
+        stats.statements.append((elapsed, statement))
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class RequestMetricsMiddleware:
+    """Times each request and reports it per route (the path template, not the raw path)."""
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True, slow_request_ms: float = 0):
+        self.app = app
+        self.server_timing = server_timing
+        self.slow_request_seconds = slow_request_ms / 1000
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(started=time.perf_counter())
+        token = _current.set(stats)
+        status_code = 500
+        streaming = False
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                streaming = Headers(raw=message["headers"]).get("content-type", "").startswith(STREAMING_MEDIA_TYPES)
+                if self.server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing", stats.server_timing(time.perf_counter()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self._record(scope, stats, status_code, time.perf_counter() - stats.started, streaming)
+
+    def _record(self, scope: Scope, stats: RequestStats, status_code: int, duration: float, streaming: bool) -> None:
+        route = scope.get("route")
+        labels = (scope["method"], getattr(route, "path", UNMATCHED_ROUTE))
+        REQUESTS.inc(*labels, str(status_code))
+        REQUEST_DURATION.observe(duration, *labels)
+        REQUEST_DB_TIME.observe(stats.db_seconds, *labels)
+        REQUEST_POOL_WAIT.observe(stats.pool_wait_seconds, *labels)
+        REQUEST_QUERIES.observe(stats.queries, *labels)
+        REQUEST_ROWS.observe(stats.rows, *labels)
+
+        if self.slow_request_seconds and duration >= self.slow_request_seconds and not streaming:
+            statements = "\n".join(
+                f"  {elapsed * 1000:8.1f}ms  {' '.join(statement.split())}" for elapsed, statement in stats.statements
+            )
+            if stats.queries > len(stats.statements):
+                statements += f"\n  ... {stats.queries - len(stats.statements)} more"
+            logger.warning(
+                "Slow request %s %s: %.1fms, %d queries (%.1fms SQL, %d rows), %.1fms pool wait\n%s",
+                scope["method"], scope["path"], duration * 1000, stats.queries, stats.db_seconds * 1000,
+                stats.rows, stats.pool_wait_seconds * 1000, statements,
+            )
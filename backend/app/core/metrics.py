@@ -0,0 +1,158 @@
+from bisect import bisect_left
+from threading import Lock
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+# Default latency buckets in seconds, roughly Prometheus' defaults with a finer low end.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# Buckets for per-request counts (queries issued, rows returned).
+COUNT_BUCKETS: Tuple[float, ...] = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000, 10000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_set(labelnames: Sequence[str], labelvalues: Sequence[str], le: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(labelnames, labelvalues)]
+    if le:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Cumulative-bucket histogram rendered in the Prometheus text format.
+
+    With ``labelnames`` each distinct tuple of label values passed to
+    :meth:`observe` is its own series.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        labelnames: Sequence[str] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        # label values -> [bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        if not self.labelnames:
+            self._series[()] = [[0] * (len(self.buckets) + 1), 0.0]
+        self._lock = Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labelvalues, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_label_set(self.labelnames, labelvalues, le=str(bound))} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{_label_set(self.labelnames, labelvalues, le="+Inf")} {cumulative}')
+            lines.append(f"{self.name}_sum{_label_set(self.labelnames, labelvalues)} {total}")
+            lines.append(f"{self.name}_count{_label_set(self.labelnames, labelvalues)} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter, one series per tuple of label values."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = list(self._values.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_label_set(self.labelnames, labels)} {value}" for labels, value in snapshot)
+        return lines
+
+
+class CallbackGauge:
+    """Gauge whose value is read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {self.callback()}",
+        ]
+
+
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a database connection from the pool.",
+)
+
+# Per-route request metrics, recorded by app.core.instrumentation
+ROUTE_LABELS = ("method", "route")
+REQUESTS = Counter("http_requests_total", "HTTP requests handled.", ROUTE_LABELS + ("status",))
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to handle a request.", labelnames=ROUTE_LABELS
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Time a request spent executing SQL.", labelnames=ROUTE_LABELS
+)
+REQUEST_POOL_WAIT = Histogram(
+    "http_request_pool_wait_seconds", "Time a request spent waiting for pooled connections.", labelnames=ROUTE_LABELS
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_queries", "SQL statements issued per request.", buckets=COUNT_BUCKETS, labelnames=ROUTE_LABELS
+)
+REQUEST_ROWS = Histogram(
+    "http_request_rows", "Rows returned by SQL per request.", buckets=COUNT_BUCKETS, labelnames=ROUTE_LABELS
+)
+
+Metric = Union[Histogram, Counter, CallbackGauge]
+
+REGISTRY: List[Metric] = [
+    POOL_CHECKOUT_WAIT,
+    REQUESTS,
+    REQUEST_DURATION,
+    REQUEST_DB_TIME,
+    REQUEST_POOL_WAIT,
+    REQUEST_QUERIES,
+    REQUEST_ROWS,
+]
+
+
+def register(metric: Metric) -> None:
+    # Replace by name so re-registering (e.g. a recreated engine) does not duplicate series.
+    REGISTRY[:] = [m for m in REGISTRY if m.name != metric.name]
+    REGISTRY.append(metric)
+
+
+def render_latest() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,173 @@
+"""Opt-in profiling of single requests (PROFILING_ENABLED, debug deployments only).
+
+A request with an ``X-Profile: 1`` header and a bearer token for a user in
+PROFILING_ALLOWED_USERS runs under pyinstrument when it is installed, otherwise
+under cProfile. The response carries ``X-Profile-Id``. The report is kept in
+memory in this worker and served by ``GET /api/v1/debug/profiles/{id}``. Its
+summary times the FastAPI phases (dependency resolution, the handler,
+response serialization) and the auth and session dependencies.
+
+pyinstrument follows only the profiled request's task and counts time spent
+awaiting. cProfile sees every task that runs on the event loop while the
+request is in flight, and excludes time spent suspended, so it profiles one
+request at a time.
+"""
+import asyncio
+import cProfile
+import io
+import pstats
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Tuple
+from uuid import uuid4
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.instrumentation import current_stats
+from app.core.security import verify_token
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_TTL_SECONDS = 3600
+
+# Functions whose cumulative time is reported as a span, by span name
+SPANS: Dict[str, str] = {
+    "dependencies": "solve_dependencies",
+    "auth": "get_auth_context",
+    "session": "get_session",
+    "handler": "run_endpoint_function",
+    "serialization": "serialize_response",
+}
+
+
+@dataclass(frozen=True)
+class Profile:
+    summary: Dict[str, Any]
+    report: str
+    media_type: str
+
+
+def _pyinstrument() -> Any:
+    try:
+        import pyinstrument
+    except ImportError:
+        return None
+    return pyinstrument
+
+
+def _pyinstrument_spans(root: Any) -> Dict[str, float]:
+    wanted = {function: span for span, function in SPANS.items()}
+    spans: Dict[str, float] = {}
+    stack = [root] if root is not None else []
+    while stack:
+        frame = stack.pop()
+        span = wanted.get(frame.function)
+        if span is not None:
+            # The outermost frame already includes any nested (recursive) ones
+            spans[span] = spans.get(span, 0.0) + frame.time
+            continue
+        stack.extend(frame.children)
+    return spans
+
+
+def _cprofile_spans(stats: pstats.Stats) -> Dict[str, float]:
+    wanted = {function: span for span, function in SPANS.items()}
+    spans: Dict[str, float] = {}
+    for (_, _, function), (_, _, _, cumulative, _) in stats.stats.items():
+        span = wanted.get(function)
+        if span is not None:
+            spans[span] = spans.get(span, 0.0) + cumulative
+    return spans
+
+
+class ProfilerMiddleware:
+    """Runs allow-listed ``X-Profile`` requests under a profiler and stores the result."""
+
+    def __init__(self, app: ASGIApp, allowed_users: Tuple[str, ...] = ()):
+        self.app = app
+        self.allowed_users = frozenset(allowed_users)
+        self._cprofile_lock = asyncio.Lock()
+
+    def _allowed(self, scope: Scope) -> bool:
+        headers = Headers(scope=scope)
+        if headers.get(PROFILE_HEADER, "").strip().lower() not in ("1", "true", "yes"):
+            return False
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return False
+        try:
+            return verify_token(token.strip()).get("sub") in self.allowed_users
+        except HTTPException:
+            return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._allowed(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex
+        status_code = 500
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, profile_id)
+            await send(message)
+
+        pyinstrument = _pyinstrument()
+        started = time.perf_counter()
+        if pyinstrument is not None:
+            profiler = pyinstrument.Profiler(async_mode="enabled")
+            profiler.start()
+            try:
+                await self.app(scope, receive, send_with_id)
+            finally:
+                session = profiler.stop()
+                duration = time.perf_counter() - started
+                spans = _pyinstrument_spans(session.root_frame())
+                report, media_type, tool = profiler.output_html(), "text/html", "pyinstrument"
+        elif not self._cprofile_lock.locked():
+            async with self._cprofile_lock:
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, send_with_id)
+                finally:
+                    profiler.disable()
+                    duration = time.perf_counter() - started
+                    output = io.StringIO()
+                    stats = pstats.Stats(profiler, stream=output)
+                    stats.sort_stats("cumulative").print_stats(80)
+                    spans = _cprofile_spans(stats)
+                    report, media_type, tool = output.getvalue(), "text/plain", "cProfile"
+        else:
+            # Another request holds cProfile; serve this one unprofiled
+            await self.app(scope, receive, send)
+            return
+
+        request_stats = current_stats()
+        profiles.set(profile_id, Profile(
+            summary={
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "profiler": tool,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "duration_ms": round(duration * 1000, 3),
+                "db_ms": round(request_stats.db_seconds * 1000, 3) if request_stats else None,
+                "queries": request_stats.queries if request_stats else None,
+                "spans_ms": {span: round(seconds * 1000, 3) for span, seconds in spans.items()},
+            },
+            report=report,
+            media_type=media_type,
+        ))
+
+
+profiles: TTLCache[str, Profile] = TTLCache(maxsize=get_settings().profiling_max_profiles, ttl=PROFILE_TTL_SECONDS)
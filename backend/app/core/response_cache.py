@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Optional, Protocol, Sequence
+from uuid import UUID
+
+from fastapi import Request, Response, status
+
+from app.core.cache import TTLCache
+from app.core.config import Settings, get_settings
+from app.core.unit_of_work import on_commit
+
+logger = logging.getLogger(__name__)
+
+DIRECTORY_SCOPE = "vets"
+CACHE_CONTROL = "private, no-cache"
+# Response headers that are recomputed rather than replayed from the cache
+_SKIPPED_HEADERS = {"content-length", "etag", "cache-control"}
+
+
+def vet_scope(vet_id: UUID) -> str:
+    return f"vet:{vet_id}"
+
+
+class CacheBackend(Protocol):
+    """The subset of a Redis client the response cache needs."""
+
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    async def set(self, key: str, value: bytes, ex: Optional[int] = None) -> Any: ...
+
+    async def incr(self, key: str) -> int: ...
+
+
+class MemoryBackend:
+    """Per-process backend: cached bodies in an LRU, version counters in a dict.
+
+    Other workers do not see this process's version bumps, so with several
+    workers their entries can be up to the TTL stale; use the Redis backend there.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries: TTLCache[str, bytes] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions: Dict[str, int] = {}
+        self._lock = Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if key in self._versions:
+            return str(self._versions[key]).encode()
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes, ex: Optional[int] = None) -> None:
+        self._entries.set(key, value, ttl=ex)
+
+    async def incr(self, key: str) -> int:
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            return self._versions[key]
+
+
+class RedisBackend:
+    """Adapter for redis.asyncio clients or anything with the same get/set/incr coroutines."""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ex: Optional[int] = None) -> None:
+        await self.client.set(key, value, ex=ex)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+class ResponseCache:
+    """Caches GET responses per scope version and answers If-None-Match with 304.
+
+    A scope (one vet, or the whole directory) has a version counter that writes
+    bump. Cached bodies are keyed by the current versions of their scopes, so a
+    bump makes every older entry unreachable. ETags are hashes of the body.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+    async def _versions(self, scopes: Sequence[str]) -> Optional[str]:
+        try:
+            values = [await self.backend.get(f"version:{scope}") for scope in scopes]
+        except Exception:
+            logger.warning("Response cache unavailable, serving uncached", exc_info=True)
+            return None
+        return ",".join(f"{scope}@{int(value or 0)}" for scope, value in zip(scopes, values))
+
+    async def bump(self, *scopes: str) -> None:
+        """Invalidate everything cached for ``scopes``; call after the write commits."""
+        if self.backend is None:
+            return
+        try:
+            for scope in scopes:
+                await self.backend.incr(f"version:{scope}")
+        except Exception:
+            logger.warning("Could not bump response cache versions %s", scopes, exc_info=True)
+
+    def bump_on_commit(self, session: Any, *scopes: str) -> None:
+        """Bump ``scopes`` once the session's pending write commits."""
+        on_commit(session, lambda: self.bump(*scopes))
+
+    async def respond(
+        self,
+        request: Request,
+        scopes: Sequence[str],
+        build: Callable[[], Awaitable[Response]],
+    ) -> Response:
+        versions = await self._versions(scopes) if self.backend is not None else None
+        key = None
+        if versions is not None:
+            query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+            key = f"response:{request.url.path}?{query}#{versions}"
+            cached = await self._load(key)
+            if cached is not None:
+                return self._finish(request, *cached)
+
+        response = await build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        headers = {k: v for k, v in response.headers.items() if k not in _SKIPPED_HEADERS}
+        etag = _etag(response.body)
+        if key is not None:
+            await self._store(key, etag, headers, response.body)
+        return self._finish(request, etag, headers, response.body)
+
+    def _finish(self, request: Request, etag: str, headers: Dict[str, str], body: bytes) -> Response:
+        headers = {**headers, "etag": etag, "cache-control": CACHE_CONTROL}
+        if _matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"etag": etag, "cache-control": CACHE_CONTROL})
+        return Response(content=body, headers=headers)
+
+    async def _load(self, key: str) -> Optional[tuple]:
+        try:
+            raw = await self.backend.get(key)
+        except Exception:
+            logger.warning("Response cache read failed", exc_info=True)
+            return None
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        return entry["etag"], entry["headers"], entry["body"].encode()
+
+    async def _store(self, key: str, etag: str, headers: Dict[str, str], body: bytes) -> None:
+        entry = json.dumps({"etag": etag, "headers": headers, "body": body.decode()})
+        try:
+            await self.backend.set(key, entry.encode(), ex=int(self.ttl))
+        except Exception:
+            logger.warning("Response cache write failed", exc_info=True)
+
+
+def build_response_cache(settings: Settings) -> ResponseCache:
+    backend: Optional[CacheBackend]
+    if settings.response_cache_backend == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis needs the 'redis' package installed") from exc
+        backend = RedisBackend(redis.from_url(settings.response_cache_url))
+    elif settings.response_cache_backend == "memory":
+        backend = MemoryBackend(maxsize=settings.response_cache_max_entries, ttl=settings.response_cache_ttl_seconds)
+    else:
+        backend = None
+    return ResponseCache(backend=backend, ttl=settings.response_cache_ttl_seconds)
+
+
+response_cache = build_response_cache(get_settings())
@@ -1,23 +1,35 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, Optional
+from uuid import UUID
 from jose import jwt, JWTError
-from fastapi import HTTPException,status, Depends
+from fastapi import HTTPException,status, Depends, Query
 from app.models.users import Users
 from app.models.vets import Vets
 from app.models.enums import UserRole
-from sqlmodel import Session,select
-from fastapi.security import HTTPBearer
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from app.schema.database import get_session
-import os
-from dotenv import load_dotenv
-load_dotenv()
+from app.core.auth_cache import CachedPrincipal, Principal, principal_cache
+from app.core.config import get_settings
 
-SECRET_KEY = os.getenv("jwt_token_secret_key")
+settings = get_settings()
+
+SECRET_KEY = settings.jwt_secret_key
 ALGORITHM = "HS256" #HMAC using SHA-256 hash algorithm
 EXP_TOKEN = 30 #30 minutes
 
 bearer_scheme = HTTPBearer()
 
+def principal_claims(user : Users, vet : Vets | None = None) -> dict:
+    """Claims that let AUTH_TRUST_TOKEN_CLAIMS resolve the caller without a DB hit"""
+    return {
+        "sub" : str(user.id),
+        "role" : UserRole(user.role).value,
+        "vet_id" : str(vet.id) if vet else None,
+    }
+
 def create_access_token(data : dict, expires_delta : timedelta | None = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -39,61 +51,149 @@ def verify_token(token : str) -> dict[str,Any]:
 
 
 
-def get_current_user(token:str = Depends(bearer_scheme),session : Session = Depends(get_session)):
+def _unauthorized(detail : str = "Could not validate credentials") -> HTTPException:
+    return HTTPException(status_code = status.HTTP_401_UNAUTHORIZED, detail = detail)
+
+
+@dataclass
+class AuthContext:
+    """Per-request authentication state shared by the dependencies below"""
+    user_id : UUID
+    token : str
+    expires_at : Optional[float] = None  # the token's exp claim, as a time.time() value
+    principal : Optional[Principal] = None
+    entry : Optional[CachedPrincipal] = None
+    user : Optional[Users] = None
+    vet : Optional[Vets] = None
+
+
+async def _resolve(ctx : AuthContext, session : AsyncSession) -> None:
+    """Fill user / vet for ctx from the principal cache, or with one joined query"""
+    if ctx.entry is not None or ctx.user is not None:
+        return
+
+    cached = principal_cache.get(ctx.user_id, ctx.token)
+    if cached is not None:
+        ctx.entry, ctx.principal = cached, cached.principal
+        return
+
+    row = (await session.exec(
+        select(Users, Vets)
+        .outerjoin(Vets, Vets.user_id == Users.id)
+        .where(Users.id == ctx.user_id)
+    )).first()
+    if row is None:
+        raise _unauthorized("User not found")
+
+    ctx.user, ctx.vet = row
+    ctx.entry = principal_cache.put(ctx.token, ctx.user, ctx.vet)
+    ctx.principal = ctx.entry.principal
+
+
+def _principal_from_claims(payload : dict[str, Any], user_id : UUID) -> Optional[Principal]:
+    role = payload.get("role")
+    if role is None:
+        return None  # token issued before role claims existed
+    vet_id = payload.get("vet_id")
     try:
-        token_string = token.credentials
+        return Principal(id = user_id, role = UserRole(role), vet_id = UUID(vet_id) if vet_id else None)
+    except ValueError:
+        raise _unauthorized()
+
 
+async def get_auth_context(
+    token : HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    session : AsyncSession = Depends(get_session),
+) -> AuthContext:
+    token_string = token.credentials
+    try:
         payload = jwt.decode(token_string,SECRET_KEY,algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-
-        if user_id is None:
-            raise HTTPException(
-                status_code = status.HTTP_401_UNAUTHORIZED,
-                detail = "Invalid authentication credentials"
-            ,)
-
-    #querying the db to get user object
-        user = session.exec(select(Users).where(Users.id == user_id)).first()
-        if user is None:
-                raise HTTPException(
-                    status_code = status.HTTP_401_UNAUTHORIZED,
-                    detail = "User not found"
-                ,)
-
-        return user
     except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-        )
+        raise _unauthorized()
 
+    user_id = payload.get("sub")
+    if user_id is None:
+        raise _unauthorized("Invalid authentication credentials")
+    try:
+        user_uuid = UUID(user_id)
+    except ValueError:
+        raise _unauthorized("Invalid authentication credentials")
 
-def require_owner(current_user: Users = Depends(get_current_user)):
-    if current_user.role != UserRole.OWNER:
+    ctx = AuthContext(user_id = user_uuid, token = token_string, expires_at = payload.get("exp"))
+    if settings.auth_trust_token_claims:
+        ctx.principal = _principal_from_claims(payload, user_uuid)
+    if ctx.principal is None:
+        await _resolve(ctx, session)
+    return ctx
+
+
+async def get_current_principal(ctx : AuthContext = Depends(get_auth_context)) -> Principal:
+    return ctx.principal
+
+
+async def get_stream_auth_context(
+    token : Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error = False)),
+    access_token : Optional[str] = Query(None, description = "Bearer token, for clients such as EventSource that cannot send headers"),
+    session : AsyncSession = Depends(get_session),
+) -> AuthContext:
+    """get_auth_context for long-lived streams: the token may also come as ?access_token=
+
+    The stream must end at ctx.expires_at, since the token is not checked again.
+    """
+    if token is None:
+        if not access_token:
+            raise _unauthorized("Not authenticated")
+        token = HTTPAuthorizationCredentials(scheme = "Bearer", credentials = access_token)
+    return await get_auth_context(token = token, session = session)
+
+
+async def get_current_user(
+    ctx : AuthContext = Depends(get_auth_context),
+    session : AsyncSession = Depends(get_session),
+) -> Users:
+    await _resolve(ctx, session)
+    return ctx.user if ctx.user is not None else ctx.entry.build_user()
+
+
+async def require_owner(principal: Principal = Depends(get_current_principal)) -> Principal:
+    if principal.role != UserRole.OWNER:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only pet owners can access this resource",
         )
-    return current_user
+    return principal
 
 
-def require_vet(current_user: Users = Depends(get_current_user)):
-    if current_user.role != UserRole.VET:
+async def require_vet(principal: Principal = Depends(get_current_principal)) -> Principal:
+    if principal.role != UserRole.VET:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only veterinarians can access this resource",
         )
-    return current_user
+    return principal
+
+
+def _vet_profile_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Vet profile not found",
+    )
+
 
+async def get_current_vet_id(principal: Principal = Depends(require_vet)) -> UUID:
+    """The caller's vet profile id, straight from the principal"""
+    if principal.vet_id is None:
+        raise _vet_profile_not_found()
+    return principal.vet_id
 
-def get_current_vet_profile(
-    current_user: Users = Depends(require_vet),
-    session: Session = Depends(get_session),
-):
-    vet = session.exec(select(Vets).where(Vets.user_id == current_user.id)).first()
+
+async def get_current_vet_profile(
+    principal: Principal = Depends(require_vet),
+    ctx: AuthContext = Depends(get_auth_context),
+    session: AsyncSession = Depends(get_session),
+) -> Vets:
+    await _resolve(ctx, session)
+    vet = ctx.vet if ctx.user is not None else ctx.entry.build_vet()
     if not vet:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vet profile not found",
-        )
+        raise _vet_profile_not_found()
     return vet
@@ -0,0 +1,49 @@
+"""JSON responses built without FastAPI's validate-then-encode pass.
+
+A route with a ``response_model`` validates whatever the handler returns against
+that model and then encodes it. For data read straight from the database the
+validation only repeats what the column types already guarantee. So the hot
+list endpoints select just the columns of their response schema and pass the
+rows to orjson (:func:`rows_response`), and ORM objects go through one cached
+pydantic adapter (:func:`json_response`). The ``response_model`` stays on the
+route for the OpenAPI schema.
+"""
+from functools import lru_cache
+from typing import Any, Iterable, Mapping, Tuple, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+# "Z" for UTC offsets, as pydantic writes them, so both paths produce the same timestamps
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def schema_columns(model: Any, schema: Type[BaseModel]) -> Tuple[Any, ...]:
+    """The ``model`` columns backing each field of ``schema``, in field order."""
+    return tuple(getattr(model, name) for name in schema.model_fields)
+
+
+def rows_response(rows: Iterable[Mapping[str, Any]]) -> Response:
+    """Encode database rows (mappings of column values) as a JSON list."""
+    return Response(
+        content=orjson.dumps([dict(row) for row in rows], option=ORJSON_OPTIONS),
+        media_type="application/json",
+    )
+
+
+@lru_cache(maxsize=None)
+def _adapter(model: Any) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def json_response(model: Any, content: Any, exclude_unset: bool = False) -> Response:
+    """Serialize ``content`` through ``model`` the way a route's response_model would."""
+    adapter = _adapter(model)
+    body = adapter.dump_json(adapter.validate_python(content, from_attributes=True), exclude_unset=exclude_unset)
+    return Response(content=body, media_type="application/json")
+
+
+def models_response(model: Any, content: Any) -> Response:
+    """Serialize already-built ``model`` instances without validating them again."""
+    return Response(content=_adapter(model).dump_json(content), media_type="application/json")
@@ -0,0 +1,30 @@
+"""One commit per request.
+
+CRUD helpers add and flush but never commit; the endpoint ends its unit of work
+with a single :func:`commit`. Work that must only happen once the data is
+durable, such as response cache invalidation, is queued with :func:`on_commit`
+and awaited right after the commit succeeds. A rollback discards it.
+"""
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+_CALLBACKS_KEY = "after_commit_callbacks"
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], Awaitable[Any]]) -> None:
+    """Run ``callback`` after the session's next successful :func:`commit`."""
+    session.info.setdefault(_CALLBACKS_KEY, []).append(callback)
+
+
+async def commit(session: AsyncSession) -> None:
+    await session.commit()
+    for callback in session.info.pop(_CALLBACKS_KEY, []):
+        await callback()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_callbacks(session: Session, previous_transaction: Any) -> None:
+    session.info.pop(_CALLBACKS_KEY, None)
@@ -1,57 +1,370 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 from uuid import UUID
 
-from sqlmodel import Session, select
+from sqlalchemy import Row, and_, bindparam, case, or_, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.events import event_hub, sse_frame, user_topic, vet_topic
+from app.crud.sync import BOOKINGS, record_tombstones, withdraw_tombstones
 from app.models.bookings import Bookings
-from app.schema.bookings import BookingCreate, BookingUpdate
+from app.models.enums import BookingStatus
+from app.models.pets import Pets
+from app.models.users import Users
+from app.schema.bookings import BookingCreate, BookingResponse, BookingUpdate
 
+# Postgres exclusion constraint added in the b7e1f04c9a2d migration.
+OVERLAP_CONSTRAINT = "ex_bookings_vet_no_overlap"
 
-def list_bookings_for_user(session: Session, user_id: UUID) -> List[Bookings]:
-    statement = select(Bookings).where(Bookings.user_id == user_id)
-    return session.exec(statement).all()
+# Server-sent event names, pushed to the booking's vet and owner after commit
+BOOKING_CREATED = "booking.created"
+BOOKING_UPDATED = "booking.updated"
+BOOKING_DELETED = "booking.deleted"
 
+# Columns of a booking export, joined with the pet and owner names
+EXPORT_COLUMNS = (
+    Bookings.id,
+    Bookings.start_at,
+    Bookings.end_at,
+    Bookings.booking_status,
+    Bookings.reason,
+    Bookings.pet_id,
+    Pets.name.label("pet_name"),
+    Pets.species.label("pet_species"),
+    Bookings.user_id.label("owner_id"),
+    Users.full_name.label("owner_name"),
+    Users.email.label("owner_email"),
+)
+EXPORT_BATCH_SIZE = 1000
 
-def list_bookings_for_vet(session: Session, vet_id: UUID) -> List[Bookings]:
-    statement = select(Bookings).where(Bookings.vet_id == vet_id)
-    return session.exec(statement).all()
 
+class BookingConflictError(Exception):
+    """The booking overlaps another active booking for the same vet."""
 
-def get_booking_by_id(session: Session, booking_id: UUID, user_id: UUID) -> Optional[Bookings]:
+
+def _is_active():
+    # Rendered inline rather than bound so the planner can match the predicate
+    # of the partial index ix_bookings_vet_active_start_at.
+    column = Bookings.__table__.c.booking_status
+    return column != bindparam(None, BookingStatus.CANCELLED, type_=column.type, literal_execute=True)
+
+
+def _select(columns: Optional[Sequence[Any]]):
+    return select(*columns) if columns else select(Bookings)
+
+
+def _with_related(statement, pet: bool, owner: bool):
+    # Both are many-to-one, so joining them in keeps one row per booking and
+    # LIMIT still counts bookings.
+    if pet:
+        statement = statement.options(joinedload(Bookings.pet))
+    if owner:
+        statement = statement.options(joinedload(Bookings.user))
+    return statement
+
+
+def _filtered_page(
+    statement,
+    statuses: Optional[Sequence[BookingStatus]],
+    start_from: Optional[datetime],
+    start_to: Optional[datetime],
+    after: Optional[Tuple[datetime, UUID]],
+    limit: int,
+):
+    # Keyset pagination on (start_at, id): each page is one seek on the
+    # (owner, start_at) index, however much history precedes it.
+    if statuses:
+        statement = statement.where(Bookings.booking_status.in_(statuses))
+    if start_from is not None:
+        statement = statement.where(Bookings.start_at >= start_from)
+    if start_to is not None:
+        statement = statement.where(Bookings.start_at < start_to)
+    if after is not None:
+        # Row-value comparison seeks straight to the cursor; an OR of the two
+        # cases makes some planners split it into two index ranges and re-sort.
+        statement = statement.where(tuple_(Bookings.start_at, Bookings.id) > tuple_(*after))
+    # One extra row tells the caller whether another page exists.
+    return statement.order_by(Bookings.start_at, Bookings.id).limit(limit + 1)
+
+
+async def list_bookings_for_user(
+    session: AsyncSession,
+    user_id: UUID,
+    limit: int,
+    statuses: Optional[Sequence[BookingStatus]] = None,
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, UUID]] = None,
+    with_pet: bool = False,
+    with_owner: bool = False,
+    columns: Optional[Sequence[Any]] = None,
+) -> List[Bookings]:
+    """Return up to ``limit + 1`` of the user's bookings ordered by (start_at, id).
+
+    With ``columns`` the result is rows of just those columns instead of ORM objects.
+    """
+    statement = _filtered_page(
+        _select(columns).where(Bookings.user_id == user_id), statuses, start_from, start_to, after, limit
+    )
+    statement = _with_related(statement, pet=with_pet, owner=with_owner)
+    return (await session.exec(statement)).all()
+
+
+async def list_bookings_for_vet(
+    session: AsyncSession,
+    vet_id: UUID,
+    limit: int,
+    statuses: Optional[Sequence[BookingStatus]] = None,
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, UUID]] = None,
+    with_pet: bool = False,
+    with_owner: bool = False,
+    columns: Optional[Sequence[Any]] = None,
+) -> List[Bookings]:
+    """Return up to ``limit + 1`` of the vet's bookings ordered by (start_at, id).
+
+    With ``columns`` the result is rows of just those columns instead of ORM objects.
+    """
+    statement = _filtered_page(
+        _select(columns).where(Bookings.vet_id == vet_id), statuses, start_from, start_to, after, limit
+    )
+    statement = _with_related(statement, pet=with_pet, owner=with_owner)
+    return (await session.exec(statement)).all()
+
+
+async def stream_bookings_for_vet(
+    session: AsyncSession,
+    vet_id: UUID,
+    statuses: Optional[Sequence[BookingStatus]] = None,
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+) -> AsyncIterator[Sequence[Row]]:
+    """Yield the vet's bookings as EXPORT_COLUMNS rows, EXPORT_BATCH_SIZE at a time.
+
+    The rows come from a server-side cursor, so memory use does not grow with
+    the number of bookings exported.
+    """
+    statement = (
+        select(*EXPORT_COLUMNS)
+        .join(Pets, Pets.id == Bookings.pet_id)
+        .join(Users, Users.id == Bookings.user_id)
+        .where(Bookings.vet_id == vet_id)
+    )
+    if statuses:
+        statement = statement.where(Bookings.booking_status.in_(statuses))
+    if start_from is not None:
+        statement = statement.where(Bookings.start_at >= start_from)
+    if start_to is not None:
+        statement = statement.where(Bookings.start_at < start_to)
+    statement = statement.order_by(Bookings.start_at, Bookings.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    result = await session.stream(statement)
+    async for batch in result.partitions():
+        yield batch
+
+
+async def list_active_bookings_for_vet_between(
+    session: AsyncSession, vet_id: UUID, start_at: datetime, end_at: datetime
+) -> List[Bookings]:
+    statement = (
+        select(Bookings)
+        .where(
+            Bookings.vet_id == vet_id,
+            _is_active(),
+            Bookings.start_at < end_at,
+            Bookings.end_at > start_at,
+        )
+        .order_by(Bookings.start_at)
+    )
+    return (await session.exec(statement)).all()
+
+
+async def list_active_bookings_for_vets_between(
+    session: AsyncSession, vet_ids: Sequence[UUID], start_at: datetime, end_at: datetime
+) -> List[Row]:
+    """(vet_id, start_at, end_at) of the vets' active bookings overlapping the window."""
+    statement = select(Bookings.vet_id, Bookings.start_at, Bookings.end_at).where(
+        Bookings.vet_id.in_(vet_ids),
+        _is_active(),
+        Bookings.start_at < end_at,
+        Bookings.end_at > start_at,
+    )
+    return (await session.exec(statement)).all()
+
+
+async def find_bookings_overlapping(
+    session: AsyncSession, vet_id: UUID, intervals: Sequence[Tuple[datetime, datetime]]
+) -> List[Bookings]:
+    """Active bookings of the vet that overlap any of ``intervals`` (merged, non-empty)."""
+    statement = (
+        select(Bookings)
+        .where(
+            Bookings.vet_id == vet_id,
+            _is_active(),
+            # The envelope keeps this a range seek on the partial index
+            Bookings.start_at < intervals[-1][1],
+            Bookings.end_at > intervals[0][0],
+            or_(*(and_(Bookings.start_at < end, Bookings.end_at > start) for start, end in intervals)),
+        )
+        .order_by(Bookings.start_at)
+    )
+    return (await session.exec(statement)).all()
+
+
+async def get_booking_by_id(session: AsyncSession, booking_id: UUID, user_id: UUID) -> Optional[Bookings]:
     statement = select(Bookings).where(
         Bookings.id == booking_id,
         Bookings.user_id == user_id,
     )
-    return session.exec(statement).first()
+    return (await session.exec(statement)).first()
 
 
-def get_booking_by_id_for_vet(session: Session, booking_id: UUID, vet_id: UUID) -> Optional[Bookings]:
+async def get_booking_by_id_for_vet(
+    session: AsyncSession, booking_id: UUID, vet_id: UUID, with_details: bool = False
+) -> Optional[Bookings]:
     statement = select(Bookings).where(
         Bookings.id == booking_id,
         Bookings.vet_id == vet_id,
     )
-    return session.exec(statement).first()
+    statement = _with_related(statement, pet=with_details, owner=with_details)
+    return (await session.exec(statement)).first()
+
+
+async def find_conflicting_booking(
+    session: AsyncSession,
+    vet_id: UUID,
+    start_at: datetime,
+    end_at: datetime,
+    exclude_id: Optional[UUID] = None,
+) -> Optional[Bookings]:
+    # Active bookings for a vet never overlap, so ordered by start_at their end_at is
+    # ordered too: only the latest one starting before end_at can reach past start_at.
+    # That is a single backwards seek on ix_bookings_vet_id_start_at, not a range scan.
+    predecessor = select(Bookings.id).where(
+        Bookings.vet_id == vet_id,
+        _is_active(),
+        Bookings.start_at < end_at,
+    )
+    if exclude_id is not None:
+        predecessor = predecessor.where(Bookings.id != exclude_id)
+    predecessor = predecessor.order_by(Bookings.start_at.desc()).limit(1).scalar_subquery()
+
+    statement = select(Bookings).where(Bookings.id == predecessor, Bookings.end_at > start_at)
+    return (await session.exec(statement)).first()
+
+
+async def _flush_without_overlap(session: AsyncSession, booking: Bookings) -> None:
+    # Writing the row first makes the check atomic: Postgres enforces the exclusion
+    # constraint on flush, and SQLite holds the write lock until we commit, so a
+    # concurrent insert for the same vet cannot slip in between check and commit.
+    try:
+        await session.flush()
+    except IntegrityError as exc:
+        await session.rollback()
+        if OVERLAP_CONSTRAINT in str(exc.orig):
+            raise BookingConflictError() from exc
+        raise
 
+    if booking.booking_status != BookingStatus.CANCELLED and await find_conflicting_booking(
+        session,
+        vet_id=booking.vet_id,
+        start_at=booking.start_at,
+        end_at=booking.end_at,
+        exclude_id=booking.id,
+    ):
+        await session.rollback()
+        raise BookingConflictError()
 
-def create_booking(session: Session, booking_in: BookingCreate, user_id: UUID) -> Bookings:
+
+def _publish(session: AsyncSession, event: str, booking: Bookings, *topics: str) -> None:
+    data = BookingResponse.model_validate(booking).model_dump_json()
+    topics = (vet_topic(booking.vet_id), user_topic(booking.user_id), *topics)
+    event_hub.publish_on_commit(session, topics, sse_frame(event, data))
+
+
+async def create_booking(session: AsyncSession, booking_in: BookingCreate, user_id: UUID) -> Bookings:
     booking = Bookings(user_id=user_id, **booking_in.model_dump())
     session.add(booking)
-    session.commit()
-    session.refresh(booking)
+    await _flush_without_overlap(session, booking)
+    _publish(session, BOOKING_CREATED, booking)
     return booking
 
 
-def update_booking(session: Session, booking: Bookings, booking_in: BookingUpdate) -> Bookings:
+async def update_booking(session: AsyncSession, booking: Bookings, booking_in: BookingUpdate) -> Bookings:
+    previous_vet_id = booking.vet_id
     update_data = booking_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(booking, field, value)
     session.add(booking)
-    session.commit()
-    session.refresh(booking)
+    await _flush_without_overlap(session, booking)
+    # A booking moved to another vet leaves the previous vet's dashboard and sync too
+    moved_from = ()
+    if previous_vet_id != booking.vet_id:
+        moved_from = (vet_topic(previous_vet_id),)
+        record_tombstones(session, BOOKINGS, [booking.id], vet_id=previous_vet_id)
+        await withdraw_tombstones(session, BOOKINGS, [booking.id], vet_id=booking.vet_id)
+    _publish(session, BOOKING_UPDATED, booking, *moved_from)
+    return booking
+
+
+async def update_booking_status(session: AsyncSession, booking: Bookings, booking_status: BookingStatus) -> Bookings:
+    booking.booking_status = booking_status
+    session.add(booking)
+    await _flush_without_overlap(session, booking)
+    _publish(session, BOOKING_UPDATED, booking)
     return booking
 
 
-def delete_booking(session: Session, booking: Bookings) -> None:
-    session.delete(booking)
-    session.commit()
+async def update_booking_statuses(
+    session: AsyncSession,
+    changes: Dict[UUID, BookingStatus],
+    vet_id: Optional[UUID] = None,
+    user_id: Optional[UUID] = None,
+) -> Tuple[Dict[UUID, BookingStatus], List[Bookings]]:
+    """Apply ``changes`` to the vet's (or owner's) bookings with one UPDATE.
+
+    Returns the current status of every booking found in scope and the rows that
+    were updated. Reactivating a cancelled booking is left out of the batch: it
+    has to pass the overlap check, which ``update_booking_status`` does per row.
+    """
+    scope = Bookings.vet_id == vet_id if vet_id is not None else Bookings.user_id == user_id
+    # Locking the rows keeps the reactivation check true until the UPDATE lands
+    current = dict((await session.exec(
+        select(Bookings.id, Bookings.booking_status)
+        .where(Bookings.id.in_(list(changes)), scope)
+        .with_for_update()
+    )).all())
+    applicable = {
+        booking_id: booking_status
+        for booking_id, booking_status in changes.items()
+        if booking_id in current
+        and not (current[booking_id] == BookingStatus.CANCELLED and booking_status != BookingStatus.CANCELLED)
+    }
+    if not applicable:
+        return current, []
+
+    column = Bookings.__table__.c.booking_status
+    statement = (
+        update(Bookings)
+        .where(Bookings.id.in_(list(applicable)), scope)
+        .values(booking_status=case(
+            {booking_id: bindparam(None, value, type_=column.type) for booking_id, value in applicable.items()},
+            value=Bookings.id,
+        ))
+        .returning(Bookings)
+    )
+    updated = (await session.exec(statement)).scalars().all()
+    for booking in updated:
+        _publish(session, BOOKING_UPDATED, booking)
+    return current, updated
+
+
+async def delete_booking(session: AsyncSession, booking: Bookings) -> None:
+    await session.delete(booking)
+    record_tombstones(session, BOOKINGS, [booking.id], user_id=booking.user_id, vet_id=booking.vet_id)
+    await session.flush()
+    _publish(session, BOOKING_DELETED, booking)
 
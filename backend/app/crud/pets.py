@@ -1,38 +1,42 @@
-from sqlmodel import select, Session
-from typing import List, Optional
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, List, Optional, Sequence
 from app.models.pets import Pets
+from app.crud.sync import PETS, record_tombstones
 from app.schema.pets import PetCreate, PetUpdate
 from uuid import UUID
 
-def create_pet(session : Session,pet_data : PetCreate, user_id : UUID):
+async def create_pet(session : AsyncSession,pet_data : PetCreate, user_id : UUID):
     new_pet = Pets(
         user_id = user_id,
         **pet_data.model_dump()
     )
 
     session.add(new_pet)
-    session.commit()
-    session.refresh(new_pet)
+    await session.flush()
 
     return new_pet
 
-def get_pets_by_user(session: Session, user_id: UUID) -> List[Pets]:
-    return session.exec(select(Pets).where(Pets.user_id == user_id)).all()
+async def get_pets_by_user(session: AsyncSession, user_id: UUID, columns: Optional[Sequence[Any]] = None) -> List[Pets]:
+    """The user's pets; rows of just ``columns`` when given."""
+    statement = select(*columns) if columns else select(Pets)
+    return (await session.exec(statement.where(Pets.user_id == user_id))).all()
 
-def get_pet_by_id(session: Session, pet_id: UUID, user_id: UUID) -> Optional[Pets]:
-    return session.exec(
+async def get_pet_by_id(session: AsyncSession, pet_id: UUID, user_id: UUID) -> Optional[Pets]:
+    result = await session.exec(
         select(Pets).where(Pets.id == pet_id, Pets.user_id == user_id)
-    ).first()
+    )
+    return result.first()
 
-def update_pet(session: Session, pet: Pets, pet_data: PetUpdate) -> Pets:
+async def update_pet(session: AsyncSession, pet: Pets, pet_data: PetUpdate) -> Pets:
     update_data = pet_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(pet, field, value)
     session.add(pet)
-    session.commit()
-    session.refresh(pet)
+    await session.flush()
     return pet
 
-def delete_pet(session: Session, pet: Pets) -> None:
-    session.delete(pet)
-    session.commit()
\ No newline at end of file
+async def delete_pet(session: AsyncSession, pet: Pets) -> None:
+    await session.delete(pet)
+    record_tombstones(session, PETS, [pet.id], user_id=pet.user_id)
+    await session.flush()
\ No newline at end of file
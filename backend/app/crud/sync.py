@@ -0,0 +1,80 @@
+"""Rows changed after a sync position, and tombstones for deleted rows.
+
+A position is an ``(updated_at, id)`` pair. Rows are read in that order,
+strictly after the position, so a page that stops partway through a group of
+rows sharing one timestamp resumes in the right place. Delete paths call
+:func:`record_tombstones` before they flush. The tombstone is then written in
+the same transaction as the delete.
+"""
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import Row, delete, tuple_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.tombstones import Tombstones
+
+# Names of the sync collections, as they appear in /sync responses and tombstones
+PETS = "pets"
+BOOKINGS = "bookings"
+WORKING_HOURS = "working_hours"
+TIME_OFF = "time_off"
+
+Position = Tuple[datetime, UUID]
+
+
+def record_tombstones(
+    session: AsyncSession,
+    collection: str,
+    entity_ids: Sequence[UUID],
+    user_id: Optional[UUID] = None,
+    vet_id: Optional[UUID] = None,
+) -> None:
+    session.add_all([
+        Tombstones(collection=collection, entity_id=entity_id, user_id=user_id, vet_id=vet_id)
+        for entity_id in entity_ids
+    ])
+
+
+async def withdraw_tombstones(
+    session: AsyncSession, collection: str, entity_ids: Sequence[UUID], vet_id: UUID
+) -> None:
+    """Drop the vet's tombstones for rows that are back in their scope; the rows sync again as updates."""
+    await session.execute(
+        delete(Tombstones).where(
+            Tombstones.collection == collection,
+            Tombstones.entity_id.in_(entity_ids),
+            Tombstones.vet_id == vet_id,
+        )
+    )
+
+
+async def get_changed_since(
+    session: AsyncSession,
+    columns: Sequence[Any],
+    changed_at: Any,
+    key: Any,
+    scope: Any,
+    after: Position,
+    limit: int,
+) -> List[Row]:
+    """Up to ``limit + 1`` rows in ``scope`` past ``after`` on (``changed_at``, ``key``).
+
+    Each row is ``columns`` followed by its ``changed_at`` and ``key``, which
+    give the position of the next page.
+    """
+    statement = (
+        select(*columns, changed_at.label("sync_changed_at"), key.label("sync_key"))
+        .where(scope, tuple_(changed_at, key) > tuple_(*after))
+        .order_by(changed_at, key)
+        .limit(limit + 1)
+    )
+    return (await session.exec(statement)).all()
+
+
+async def prune_tombstones(session: AsyncSession, before: datetime) -> int:
+    """Delete tombstones older than ``before``; returns how many went."""
+    result = await session.execute(delete(Tombstones).where(Tombstones.deleted_at < before))
+    return result.rowcount
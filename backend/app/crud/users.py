@@ -1,12 +1,13 @@
-from sqlmodel import Session,select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.users import Users
 from app.schema.users import UserCreate
 from app.models.enums import UserRole
 
-def get_user_by_email(session: Session,email : str):
-    return session.exec(select(Users).where(Users.email == email)).first()
+async def get_user_by_email(session: AsyncSession,email : str):
+    return (await session.exec(select(Users).where(Users.email == email))).first()
 
-def create_user(session:Session,user_data : UserCreate, password_hash : str, role : UserRole = UserRole.OWNER):
+async def create_user(session:AsyncSession,user_data : UserCreate, password_hash : str, role : UserRole = UserRole.OWNER):
     db_user = Users(
         email = user_data.email,
         full_name = user_data.full_name,
@@ -15,6 +16,5 @@ def create_user(session:Session,user_data : UserCreate, password_hash : str, rol
     )
 
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    await session.flush()
     return db_user
\ No newline at end of file
@@ -1,29 +1,74 @@
-from sqlmodel import Session, select
+from sqlmodel import select
+from app.core.response_cache import response_cache, vet_scope
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.vet_time_off import VetTimeOff
+from app.crud.sync import TIME_OFF, record_tombstones
 from app.schema.vet_time_off import VetTimeOffCreate
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 from uuid import UUID
+from datetime import datetime
 
-def create_time_off(session: Session, time_off_data: VetTimeOffCreate, vet_id: UUID) -> VetTimeOff:
+async def create_time_off(session: AsyncSession, time_off_data: VetTimeOffCreate, vet_id: UUID) -> VetTimeOff:
     new_time_off = VetTimeOff(
         vet_id=vet_id,
         **time_off_data.model_dump(),
     )
     session.add(new_time_off)
-    session.commit()
-    session.refresh(new_time_off)
+    await session.flush()
+    response_cache.bump_on_commit(session, vet_scope(vet_id))
     return new_time_off
 
-def get_time_off_by_vet(session: Session, vet_id: UUID) -> List[VetTimeOff]:
-    return session.exec(
+async def create_time_off_batch(
+    session: AsyncSession, vet_id: UUID, intervals: Sequence[Tuple[datetime, datetime, Optional[str]]]
+) -> List[VetTimeOff]:
+    """Insert several (start_at, end_at, reason) periods in one transaction."""
+    new_time_off = [
+        VetTimeOff(vet_id=vet_id, start_at=start_at, end_at=end_at, reason=reason)
+        for start_at, end_at, reason in intervals
+    ]
+    session.add_all(new_time_off)
+    await session.flush()
+    response_cache.bump_on_commit(session, vet_scope(vet_id))
+    return new_time_off
+
+async def get_time_off_by_vet(session: AsyncSession, vet_id: UUID) -> List[VetTimeOff]:
+    result = await session.exec(
         select(VetTimeOff).where(VetTimeOff.vet_id == vet_id)
-    ).all()
+    )
+    return result.all()
+
+async def get_time_off_for_vet_between(
+    session: AsyncSession, vet_id: UUID, start_at: datetime, end_at: datetime
+) -> List[VetTimeOff]:
+    result = await session.exec(
+        select(VetTimeOff).where(
+            VetTimeOff.vet_id == vet_id,
+            VetTimeOff.start_at < end_at,
+            VetTimeOff.end_at > start_at,
+        )
+    )
+    return result.all()
+
+async def get_time_off_for_vets_between(
+    session: AsyncSession, vet_ids: Sequence[UUID], start_at: datetime, end_at: datetime
+) -> List[VetTimeOff]:
+    result = await session.exec(
+        select(VetTimeOff).where(
+            VetTimeOff.vet_id.in_(vet_ids),
+            VetTimeOff.start_at < end_at,
+            VetTimeOff.end_at > start_at,
+        )
+    )
+    return result.all()
 
-def get_time_off_by_id(session: Session, time_off_id: UUID) -> Optional[VetTimeOff]:
-    return session.exec(
+async def get_time_off_by_id(session: AsyncSession, time_off_id: UUID) -> Optional[VetTimeOff]:
+    result = await session.exec(
         select(VetTimeOff).where(VetTimeOff.id == time_off_id)
-    ).first()
+    )
+    return result.first()
 
-def delete_time_off(session: Session, time_off: VetTimeOff) -> None:
-    session.delete(time_off)
-    session.commit()
+async def delete_time_off(session: AsyncSession, time_off: VetTimeOff) -> None:
+    await session.delete(time_off)
+    record_tombstones(session, TIME_OFF, [time_off.id], vet_id=time_off.vet_id)
+    await session.flush()
+    response_cache.bump_on_commit(session, vet_scope(time_off.vet_id))
@@ -1,30 +1,58 @@
 from app.schema.vet_working_hours import VetWorkingHoursCreate
-from sqlmodel import Session, select
+from sqlalchemy import delete
+from sqlmodel import select
+from app.core.response_cache import response_cache, vet_scope
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.vet_working_hours import VetWorkingHours
-from typing import List, Optional
+from app.crud.sync import WORKING_HOURS, record_tombstones
+from typing import List, Optional, Sequence
 from uuid import UUID
 
-def create_working_hour(session : Session, vet_working_time_create : VetWorkingHoursCreate, vet_id : UUID):
+async def create_working_hour(session : AsyncSession, vet_working_time_create : VetWorkingHoursCreate, vet_id : UUID):
     new_working_hour = VetWorkingHours(
         vet_id=vet_id,
         **vet_working_time_create.model_dump()
     )
     session.add(new_working_hour)
-    session.commit()
-    session.refresh(new_working_hour)
+    await session.flush()
+    response_cache.bump_on_commit(session, vet_scope(vet_id))
 
     return new_working_hour
 
-def get_working_hours_by_vet(session: Session, vet_id: UUID) -> List[VetWorkingHours]:
-    return session.exec(
+async def replace_working_hours(
+    session: AsyncSession, vet_id: UUID, rules: Sequence[VetWorkingHoursCreate]
+) -> List[VetWorkingHours]:
+    """Swap the vet's whole weekly schedule for ``rules`` in one transaction."""
+    removed = await session.execute(
+        delete(VetWorkingHours).where(VetWorkingHours.vet_id == vet_id).returning(VetWorkingHours.id)
+    )
+    record_tombstones(session, WORKING_HOURS, removed.scalars().all(), vet_id=vet_id)
+    new_rules = [VetWorkingHours(vet_id=vet_id, **rule.model_dump()) for rule in rules]
+    session.add_all(new_rules)
+    await session.flush()
+    response_cache.bump_on_commit(session, vet_scope(vet_id))
+    return new_rules
+
+async def get_working_hours_by_vet(session: AsyncSession, vet_id: UUID) -> List[VetWorkingHours]:
+    result = await session.exec(
         select(VetWorkingHours).where(VetWorkingHours.vet_id == vet_id)
-    ).all()
+    )
+    return result.all()
 
-def get_working_hour_by_id(session: Session, working_hour_id: UUID) -> Optional[VetWorkingHours]:
-    return session.exec(
+async def get_working_hours_for_vets(session: AsyncSession, vet_ids: Sequence[UUID]) -> List[VetWorkingHours]:
+    result = await session.exec(
+        select(VetWorkingHours).where(VetWorkingHours.vet_id.in_(vet_ids), VetWorkingHours.is_active == True)
+    )
+    return result.all()
+
+async def get_working_hour_by_id(session: AsyncSession, working_hour_id: UUID) -> Optional[VetWorkingHours]:
+    result = await session.exec(
         select(VetWorkingHours).where(VetWorkingHours.id == working_hour_id)
-    ).first()
+    )
+    return result.first()
 
-def delete_working_hour(session: Session, working_hour: VetWorkingHours) -> None:
-    session.delete(working_hour)
-    session.commit()
\ No newline at end of file
+async def delete_working_hour(session: AsyncSession, working_hour: VetWorkingHours) -> None:
+    await session.delete(working_hour)
+    record_tombstones(session, WORKING_HOURS, [working_hour.id], vet_id=working_hour.vet_id)
+    await session.flush()
+    response_cache.bump_on_commit(session, vet_scope(working_hour.vet_id))
\ No newline at end of file
@@ -1,19 +1,148 @@
-from sqlmodel import select, Session
-from typing import List,Optional
-from app.models.vets import Vets
+import heapq
+import re
+from sqlalchemy import RowMapping, and_, func, or_, text, tuple_, union_all
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.core.geo import cell_ranges, degree_weights, haversine_km
+from app.core.response_cache import DIRECTORY_SCOPE, response_cache, vet_scope
+from app.models.enums import VetSpecialty
+from app.models.vets import SEARCH_DOCUMENT, Vets
 from app.schema.vets import VetCreate, VetUpdate
 from uuid import UUID
 
-def get_vets(session : Session) -> List[Vets]:
-    return session.exec(select(Vets).where(Vets.is_active==True)).all()
+# Directory listing columns; bio is opt-in because it dominates the payload.
+DIRECTORY_COLUMNS = (
+    Vets.id, Vets.full_name, Vets.specialty, Vets.clinic_name,
+    Vets.city, Vets.state_region, Vets.postal_code, Vets.country,
+)
+MAX_SEARCH_TERMS = 8
+# Changing these invalidates the clinic's coordinates until it is geocoded again
+GEOCODED_FIELDS = ("postal_code", "country")
 
-def get_vet_by_id(session : Session, vet_id : UUID) -> Optional[Vets]:
-    return session.exec(select(Vets).where(Vets.id == vet_id)).first()
 
-def get_vet_by_user_id(session: Session, user_id: UUID) -> Optional[Vets]:
-    return session.exec(select(Vets).where(Vets.user_id == user_id)).first()
+def _search_terms(q: str) -> List[str]:
+    return re.findall(r"\w+", q.lower())[:MAX_SEARCH_TERMS]
 
-def create_vet(session: Session, vet_data: VetCreate, user_id: UUID, full_name: str, email: str) -> Vets:
+
+def _matches(dialect: str, terms: Sequence[str]):
+    """Every term must prefix-match a word in full_name, clinic_name or bio."""
+    if dialect == "postgresql":
+        query = " & ".join(f"{term}:*" for term in terms)
+        return text(f"{SEARCH_DOCUMENT} @@ to_tsquery('simple', :vet_search)").bindparams(vet_search=query)
+    if dialect == "sqlite":
+        query = " ".join(f'"{term}"*' for term in terms)
+        return Vets.id.in_(text("SELECT vet_id FROM vets_fts WHERE vets_fts MATCH :vet_search").bindparams(vet_search=query))
+    # No full-text support: substring match, unindexed
+    return and_(*(
+        or_(Vets.full_name.ilike(f"%{term}%"), Vets.clinic_name.ilike(f"%{term}%"), Vets.bio.ilike(f"%{term}%"))
+        for term in terms
+    ))
+
+
+async def search_vets(
+    session: AsyncSession,
+    limit: int,
+    q: Optional[str] = None,
+    specialties: Optional[Sequence[VetSpecialty]] = None,
+    city: Optional[str] = None,
+    state_region: Optional[str] = None,
+    postal_code: Optional[str] = None,
+    country: Optional[str] = None,
+    after: Optional[Tuple[str, UUID]] = None,
+    include_bio: bool = False,
+) -> List[RowMapping]:
+    """Up to ``limit + 1`` active vets ordered by (full_name, id), as directory rows."""
+    columns = DIRECTORY_COLUMNS + ((Vets.bio,) if include_bio else ())
+    statement = select(*columns).where(Vets.is_active == True)
+    if specialties:
+        statement = statement.where(Vets.specialty.in_(specialties))
+    for column, value in (
+        (Vets.city, city),
+        (Vets.state_region, state_region),
+        (Vets.postal_code, postal_code),
+        (Vets.country, country),
+    ):
+        if value:
+            statement = statement.where(func.lower(column) == value.strip().lower())
+    terms = _search_terms(q) if q else []
+    if terms:
+        statement = statement.where(_matches(session.bind.dialect.name, terms))
+    if after is not None:
+        statement = statement.where(tuple_(Vets.full_name, Vets.id) > tuple_(*after))
+    # (full_name, id) is the order of ix_vets_active_full_name, so a page is a short index walk
+    statement = statement.order_by(Vets.full_name, Vets.id).limit(limit + 1)
+    return (await session.exec(statement)).mappings().all()
+
+async def find_vets_near(
+    session: AsyncSession,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    limit: int,
+    specialties: Optional[Sequence[VetSpecialty]] = None,
+    after: Optional[Tuple[float, UUID]] = None,
+) -> List[Tuple[float, UUID]]:
+    """Up to ``limit + 1`` active geocoded vets within ``radius_km``, as (distance_km, id) nearest first."""
+    lat_km, lon_km = degree_weights(latitude)
+
+    def in_cells(first: int, last: int):
+        statement = (
+            select(Vets.id, Vets.latitude, Vets.longitude)
+            .where(Vets.is_active == True, Vets.grid_cell.between(first, last))
+        )
+        if specialties:
+            statement = statement.where(Vets.specialty.in_(specialties))
+        if after is not None:
+            # Skip vets provably nearer than the cursor: the bound is never below their distance
+            statement = statement.where(
+                lat_km * func.abs(Vets.latitude - latitude) + lon_km * func.abs(Vets.longitude - longitude)
+                >= after[0]
+            )
+        return statement
+
+    # One index range scan per grid row. A UNION ALL rather than OR-ed ranges,
+    # which SQLite does not match against the partial index.
+    ranges = cell_ranges(latitude, longitude, radius_km)
+    statement = in_cells(*ranges[0]) if len(ranges) == 1 else union_all(*(in_cells(*cells) for cells in ranges))
+    candidates = (await session.exec(statement)).all()
+    if not candidates:
+        return []
+
+    distances = haversine_km(latitude, longitude, [row[1] for row in candidates], [row[2] for row in candidates])
+    nearby = (
+        (distance, row[0]) for distance, row in zip(distances, candidates)
+        if distance <= radius_km and (after is None or (distance, row[0]) > after)
+    )
+    return heapq.nsmallest(limit + 1, nearby)
+
+async def get_directory_rows(session: AsyncSession, vet_ids: Sequence[UUID]) -> Dict[UUID, RowMapping]:
+    """Directory rows of the given vets, keyed by id."""
+    if not vet_ids:
+        return {}
+    rows = (await session.exec(select(*DIRECTORY_COLUMNS).where(Vets.id.in_(vet_ids)))).mappings().all()
+    return {row["id"]: row for row in rows}
+
+async def list_bookable_vets(
+    session: AsyncSession,
+    specialties: Optional[Sequence[VetSpecialty]] = None,
+    city: Optional[str] = None,
+) -> List[RowMapping]:
+    """Directory rows of the active vets matching the filters, for cross-vet availability."""
+    statement = select(*DIRECTORY_COLUMNS).where(Vets.is_active == True)
+    if specialties:
+        statement = statement.where(Vets.specialty.in_(specialties))
+    if city:
+        statement = statement.where(func.lower(Vets.city) == city.strip().lower())
+    return (await session.exec(statement)).mappings().all()
+
+async def get_vet_by_id(session : AsyncSession, vet_id : UUID) -> Optional[Vets]:
+    return (await session.exec(select(Vets).where(Vets.id == vet_id))).first()
+
+async def get_vet_by_user_id(session: AsyncSession, user_id: UUID) -> Optional[Vets]:
+    return (await session.exec(select(Vets).where(Vets.user_id == user_id))).first()
+
+async def create_vet(session: AsyncSession, vet_data: VetCreate, user_id: UUID, full_name: str, email: str) -> Vets:
     new_vet = Vets(
         user_id=user_id,
         full_name=full_name,
@@ -21,15 +150,17 @@ def create_vet(session: Session, vet_data: VetCreate, user_id: UUID, full_name:
         **vet_data.model_dump(),
     )
     session.add(new_vet)
-    session.commit()
-    session.refresh(new_vet)
+    await session.flush()
+    response_cache.bump_on_commit(session, DIRECTORY_SCOPE)
     return new_vet
 
-def update_vet(session: Session, vet: Vets, vet_data: VetUpdate) -> Vets:
+async def update_vet(session: AsyncSession, vet: Vets, vet_data: VetUpdate) -> Vets:
     update_data = vet_data.model_dump(exclude_unset=True)
+    if any(field in update_data and update_data[field] != getattr(vet, field) for field in GEOCODED_FIELDS):
+        vet.latitude = vet.longitude = vet.grid_cell = None
     for field, value in update_data.items():
         setattr(vet, field, value)
     session.add(vet)
-    session.commit()
-    session.refresh(vet)
+    await session.flush()
+    response_cache.bump_on_commit(session, vet_scope(vet.id), DIRECTORY_SCOPE)
     return vet
\ No newline at end of file
@@ -7,6 +7,8 @@ from .vet_working_hours import VetWorkingHours
 from .vet_time_off import VetTimeOff 
 from .pets import Pets
 from .bookings import Bookings
+from .tombstones import Tombstones
+from .idempotency_keys import IdempotencyKeys
 
 # Export all models
 __all__ = [
@@ -20,5 +22,7 @@ __all__ = [
     "VetWorkingHours",
     "VetTimeOff",
     "Pets", 
-    "Bookings"
+    "Bookings",
+    "Tombstones",
+    "IdempotencyKeys"
 ]
\ No newline at end of file
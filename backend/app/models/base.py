@@ -13,8 +13,10 @@ class BaseModel(SQLModel):
         default_factory= datetime.now
     )
 
+    # Maintained on every ORM or Core UPDATE; /sync reads changes by it
     updated_at : datetime = Field(
-        default_factory=datetime.now
+        default_factory=datetime.now,
+        sa_column_kwargs={"onupdate": datetime.now}
     )
 
 class ActiveBaseModel(BaseModel):
@@ -31,5 +33,6 @@ class TimestampMixin(SQLModel):
         default_factory=datetime.now
     )
     updated_at: datetime = Field(
-        default_factory=datetime.now
+        default_factory=datetime.now,
+        sa_column_kwargs={"onupdate": datetime.now}
     )
\ No newline at end of file
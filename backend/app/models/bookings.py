@@ -4,7 +4,7 @@ from uuid import UUID,uuid4
 from typing import TYPE_CHECKING
 from .base import BaseModel
 from .enums import BookingStatus
-from sqlalchemy import Column,TIMESTAMP
+from sqlalchemy import Column,TIMESTAMP,Index,text
 
 if TYPE_CHECKING:
     from .users import Users
@@ -13,6 +13,22 @@ if TYPE_CHECKING:
 
 class Bookings(BaseModel, table=True):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Backs the per-vet overlap check and calendar range scans.
+        Index("ix_bookings_vet_id_start_at", "vet_id", "start_at"),
+        # Backs the owner's paginated booking list.
+        Index("ix_bookings_user_id_start_at", "user_id", "start_at"),
+        # Active bookings only: overlap checks and availability never look at cancelled ones.
+        Index(
+            "ix_bookings_vet_active_start_at", "vet_id", "start_at", "end_at",
+            postgresql_where=text("booking_status <> 'CANCELLED'"),
+            sqlite_where=text("booking_status <> 'CANCELLED'"),
+        ),
+        Index("ix_bookings_pet_id", "pet_id"),
+        # Delta sync: the owner's and the vet's rows changed since a token.
+        Index("ix_bookings_user_id_updated_at", "user_id", "updated_at"),
+        Index("ix_bookings_vet_id_updated_at", "vet_id", "updated_at"),
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True, nullable=False)
     user_id: UUID = Field(foreign_key="users.id", description="User who made the booking")
@@ -0,0 +1,19 @@
+from sqlmodel import Field, SQLModel
+from datetime import datetime
+from sqlalchemy import Index, LargeBinary, Column
+
+class IdempotencyKeys(SQLModel, table=True):
+    """A request made with an Idempotency-Key and, once it finished, its response."""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # Expired keys are deleted in ranges of expires_at.
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    key: str = Field(primary_key=True, description="Hash of the caller, route and Idempotency-Key")
+    fingerprint: str = Field(description="Hash of the request body and query string")
+    status_code: int | None = Field(default=None, description="Null while the first request is running")
+    headers: str | None = Field(default=None, description="Response headers as a JSON list of pairs")
+    body: bytes | None = Field(default=None, sa_column=Column(LargeBinary, nullable=True))
+    created_at: datetime = Field(default_factory=datetime.now)
+    expires_at: datetime = Field(description="End of the claim while running, of the replay window once done")
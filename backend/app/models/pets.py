@@ -1,5 +1,6 @@
 from sqlmodel import Field, Relationship
 from .base import BaseModel
+from sqlalchemy import Index
 from datetime import date, datetime
 from uuid import UUID,uuid4
 from typing import List, TYPE_CHECKING
@@ -10,6 +11,10 @@ if TYPE_CHECKING:
 
 class Pets(BaseModel, table=True):
     __tablename__ = "pets"
+    __table_args__ = (
+        # Serves the owner's pet list and their delta sync.
+        Index("ix_pets_user_id_updated_at", "user_id", "updated_at"),
+    )
     id: UUID = Field(default_factory=uuid4, primary_key=True, nullable=False)
     name: str = Field(description="Pet's name")
     species: str = Field(description="Pet's species (dog, cat, etc.)")
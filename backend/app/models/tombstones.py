@@ -0,0 +1,21 @@
+from sqlmodel import Field, SQLModel
+from datetime import datetime
+from uuid import UUID, uuid4
+from sqlalchemy import Index
+
+class Tombstones(SQLModel, table=True):
+    """A deleted row, kept so /sync can tell clients to drop their copy."""
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        # Deletions a user or vet has not synced yet.
+        Index("ix_tombstones_user_id_deleted_at", "user_id", "deleted_at"),
+        Index("ix_tombstones_vet_id_deleted_at", "vet_id", "deleted_at"),
+        Index("ix_tombstones_deleted_at", "deleted_at"),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True, nullable=False)
+    collection: str = Field(description="Sync collection the row belonged to, e.g. 'bookings'")
+    entity_id: UUID = Field(description="Id of the deleted row")
+    user_id: UUID | None = Field(default=None, description="Owner who syncs the row")
+    vet_id: UUID | None = Field(default=None, description="Vet who syncs the row")
+    deleted_at: datetime = Field(default_factory=datetime.now)
@@ -3,12 +3,18 @@ from datetime import datetime
 from uuid import UUID
 from typing import TYPE_CHECKING
 from .base import BaseModel
+from sqlalchemy import Index
 
 if TYPE_CHECKING:
     from .vets import Vets
 
 class VetTimeOff(BaseModel, table=True):
     __tablename__ = "vet_time_off"
+    __table_args__ = (
+        # Time off overlapping a window: seek by vet, range on start_at.
+        Index("ix_vet_time_off_vet_id_start_at", "vet_id", "start_at"),
+        Index("ix_vet_time_off_vet_id_updated_at", "vet_id", "updated_at"),
+    )
     
     vet_id: UUID = Field(foreign_key="vets.id", description="Veterinarian ID")
     start_at: datetime = Field(description="Time off start")
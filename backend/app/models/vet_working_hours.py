@@ -3,6 +3,7 @@ from datetime import time
 from uuid import UUID
 from typing import TYPE_CHECKING
 from .base import BaseModel
+from sqlalchemy import Index
 from .enums import DayOfWeek
 
 if TYPE_CHECKING:
@@ -10,6 +11,10 @@ if TYPE_CHECKING:
 
 class VetWorkingHours(BaseModel, table=True):
     __tablename__ = "vet_working_hours"
+    __table_args__ = (
+        # Serves the vet's schedule and its delta sync.
+        Index("ix_vet_working_hours_vet_id_updated_at", "vet_id", "updated_at"),
+    )
     
     vet_id: UUID = Field(foreign_key="vets.id", description="Veterinarian ID")
     day: DayOfWeek = Field(description="Day of the week")
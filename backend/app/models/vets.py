@@ -1,6 +1,7 @@
 from sqlmodel import Field, Relationship
 from typing import List, TYPE_CHECKING
 from .base import ActiveBaseModel
+from sqlalchemy import DDL, Index, event, func, text
 from .enums import VetSpecialty
 from uuid import UUID
 
@@ -10,8 +11,34 @@ if TYPE_CHECKING:
     from .vet_time_off import VetTimeOff
     from .users import Users
 
+# Directory search document (Postgres). crud.vets.search_vets must use exactly
+# this expression for the planner to pick ix_vets_search. It is spelled the way
+# Postgres prints the index back, so autogenerate compares it as unchanged.
+SEARCH_DOCUMENT = (
+    "to_tsvector('simple'::regconfig, "
+    "(((COALESCE(full_name, ''::character varying)::text || ' '::text) "
+    "|| COALESCE(clinic_name, ''::character varying)::text) || ' '::text) "
+    "|| COALESCE(bio, ''::character varying)::text)"
+)
+
 class Vets(ActiveBaseModel, table=True):
     __tablename__ = "vets"
+    __table_args__ = (
+        # The public directory only ever lists active vets.
+        Index(
+            "ix_vets_active_full_name", "full_name", "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        # Nearby search scans a few grid_cell ranges (app.core.geo)
+        Index(
+            "ix_vets_active_grid_cell", "grid_cell",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        # Full-text search; Postgres only, SQLite uses vets_fts below
+        Index("ix_vets_search", text(SEARCH_DOCUMENT), postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
     
     user_id: UUID = Field(foreign_key="users.id", unique=True, description="Linked user account")
     full_name: str = Field(description="Veterinarian's full name")
@@ -25,9 +52,44 @@ class Vets(ActiveBaseModel, table=True):
     state_region: str | None = Field(default=None, description="State or region")
     postal_code: str | None = Field(default=None, description="Postal code")
     country: str | None = Field(default=None, description="Country")
+    # Filled by scripts/geocode_vets.py and cleared when the postal code or country changes
+    latitude: float | None = Field(default=None, description="Clinic latitude")
+    longitude: float | None = Field(default=None, description="Clinic longitude")
+    grid_cell: int | None = Field(default=None, description="app.core.geo grid cell of the clinic")
     
     # Relationships
     user: "Users" = Relationship(back_populates="vet_profile")
     bookings: List["Bookings"] = Relationship(back_populates="vet")
     working_hours: List["VetWorkingHours"] = Relationship(back_populates="vet")
     time_off: List["VetTimeOff"] = Relationship(back_populates="vet")
+
+
+
+# Cross-vet availability looks vets up by city (case-insensitively) and specialty
+Index(
+    "ix_vets_active_city_specialty", func.lower(Vets.__table__.c.city), Vets.__table__.c.specialty,
+    postgresql_where=text("is_active"),
+    sqlite_where=text("is_active = 1"),
+)
+
+
+# ── Directory search, SQLite ─────────────────────────────────────────────────
+# An FTS5 table kept in sync by triggers. The vet id is stored as a column
+# because an implicit rowid can change on VACUUM. The d8c61f3b4a70 migration
+# issues the same statements; alembic/env.py keeps autogenerate off vets_fts*.
+
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE vets_fts USING fts5(vet_id UNINDEXED, full_name, clinic_name, bio)",
+    "CREATE TRIGGER vets_fts_ai AFTER INSERT ON vets BEGIN "
+    "INSERT INTO vets_fts (vet_id, full_name, clinic_name, bio) "
+    "VALUES (new.id, new.full_name, new.clinic_name, new.bio); END",
+    "CREATE TRIGGER vets_fts_ad AFTER DELETE ON vets BEGIN "
+    "DELETE FROM vets_fts WHERE vet_id = old.id; END",
+    "CREATE TRIGGER vets_fts_au AFTER UPDATE OF full_name, clinic_name, bio ON vets BEGIN "
+    "UPDATE vets_fts SET full_name = new.full_name, clinic_name = new.clinic_name, bio = new.bio "
+    "WHERE vet_id = old.id; END",
+]
+
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(Vets.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(Vets.__table__, "before_drop", DDL("DROP TABLE IF EXISTS vets_fts").execute_if(dialect="sqlite"))
@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import List
+from uuid import UUID
+
+from sqlmodel import SQLModel
+
+from app.models.enums import VetSpecialty
+
+
+class AvailabilitySlot(SQLModel):
+    start_at: datetime
+    end_at: datetime
+
+
+class VetAvailabilityResponse(SQLModel):
+    vet_id: UUID
+    start_at: datetime
+    end_at: datetime
+    duration_minutes: int
+    slots: List[AvailabilitySlot]
+
+
+class EarliestSlot(SQLModel):
+    """A free slot found by the cross-vet search, with the vet it belongs to."""
+    vet_id: UUID
+    full_name: str
+    specialty: VetSpecialty
+    clinic_name: str | None = None
+    city: str | None = None
+    start_at: datetime
+    end_at: datetime
@@ -1,9 +1,9 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Any, List, Optional
 from uuid import UUID
 
 from sqlmodel import SQLModel, Field
-from pydantic import ConfigDict
+from pydantic import ConfigDict, field_validator
 
 from app.models.enums import BookingStatus
 
@@ -48,6 +48,11 @@ class PetSummary(SQLModel):
     sex: Optional[str] = None
     notes: Optional[str] = None
 
+    @field_validator("date_of_birth", mode="before")
+    @classmethod
+    def _date_as_str(cls, value: Any) -> Any:
+        return value.isoformat() if isinstance(value, date) else value
+
 
 class OwnerSummary(SQLModel):
     model_config = ConfigDict(from_attributes=True)
@@ -57,6 +62,13 @@ class OwnerSummary(SQLModel):
     email: str
 
 
+class BookingExpandedResponse(BookingResponse):
+    """A listed booking with the related rows requested through ``?expand=``."""
+
+    pet: Optional[PetSummary] = None
+    owner: Optional[OwnerSummary] = None
+
+
 class VetBookingDetailResponse(SQLModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -75,3 +87,21 @@ class VetBookingDetailResponse(SQLModel):
 class VetBookingStatusUpdate(SQLModel):
     booking_status: BookingStatus
 
+
+
+class BookingStatusChange(SQLModel):
+    booking_id: UUID
+    booking_status: BookingStatus
+
+
+class BookingBatchStatusUpdate(SQLModel):
+    items: List[BookingStatusChange]
+
+
+class BookingBatchItemResult(SQLModel):
+    """Outcome of one item in a batch: ``status_code`` is what the single-item endpoint would return."""
+
+    booking_id: UUID
+    status_code: int
+    detail: Optional[str] = None
+    booking: Optional[BookingResponse] = None
@@ -1,35 +1,148 @@
-import os
-from dotenv import load_dotenv
+import time
+from typing import Any, AsyncGenerator, Dict, Optional
 
-load_dotenv()
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+from app.core.config import Settings, get_settings
+from app.core.instrumentation import instrument_engine, record_pool_wait
+from app.core.metrics import POOL_CHECKOUT_WAIT, CallbackGauge, register
 
 
-from sqlmodel import create_engine, SQLModel, Session
-from typing import Generator
+# Database configuration
 
+settings = get_settings()
+DATABASE_URL = settings.database_url
+
+# Async drivers for the sync URLs in .env (alembic keeps using DATABASE_URL as-is)
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# DB_LOG_LEVEL -> create_engine echo; echo attaches a stdout handler, a bare logger level would print nothing
+ECHO_BY_LOG_LEVEL = {"INFO": True, "DEBUG": "debug"}
+
+
+def to_async_url(url: str) -> str:
+    """Rewrite a sync database URL to its asyncpg / aiosqlite equivalent"""
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    query = dict(parsed.query)
+    if drivername == "postgresql+asyncpg":
+        # asyncpg takes ssl=... and does not understand libpq-only options
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        query.pop("channel_binding", None)
+    return parsed.set(drivername=drivername, query=query).render_as_string(hide_password=False)
+
+
+class _TimedCheckoutMixin:
+    """Records how long each connection checkout waits on the pool"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            POOL_CHECKOUT_WAIT.observe(waited)
+            record_pool_wait(waited)
+
+
+class TimedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(_TimedCheckoutMixin, NullPool):
+    pass
+
+
+def create_engine_from_settings(settings: Settings, url: Optional[str] = None) -> AsyncEngine:
+    """Build the async engine from pool / timeout settings"""
+    url = url or to_async_url(settings.database_url)
+    backend = make_url(url).get_backend_name()
+    kwargs: Dict[str, Any] = {
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "echo": ECHO_BY_LOG_LEVEL.get(settings.db_log_level, False),
+    }
+    connect_args: Dict[str, Any] = {}
+
+    if settings.db_pool == "null":
+        # Let an external pooler (pgbouncer) own the connections. Transaction-mode
+        # pgbouncer cannot keep asyncpg's prepared statements alive across checkouts.
+        kwargs["poolclass"] = TimedNullPool
+        if backend == "postgresql":
+            connect_args["statement_cache_size"] = 0
+    elif ":memory:" not in url:
+        kwargs.update(
+            poolclass=TimedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+
+    if backend == "postgresql" and settings.db_statement_timeout_ms > 0:
+        connect_args["server_settings"] = {"statement_timeout": str(settings.db_statement_timeout_ms)}
+
+    new_engine = create_async_engine(url, connect_args=connect_args, **kwargs)
+    _register_pool_gauges(new_engine.pool)
+    instrument_engine(new_engine)
+    return new_engine
+
+
+def _register_pool_gauges(pool: Pool) -> None:
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return
+    register(CallbackGauge("db_pool_size", "Configured pool size.", pool.size))
+    register(CallbackGauge("db_pool_checked_out", "Connections currently checked out.", pool.checkedout))
+    register(CallbackGauge("db_pool_overflow", "Connections opened beyond pool_size.", pool.overflow))
+
+
+# The engine is created on first use, normally by the app's lifespan handler, so
+# importing the app (alembic, scripts, a worker booting) loads no driver and opens no pool
+_engine: Optional[AsyncEngine] = None
+
+# expire_on_commit=False: attribute access after commit must not trigger implicit IO.
+# Bound to the engine by get_engine().
+async_session_factory = async_sessionmaker(class_=AsyncSession, expire_on_commit=False)
+
+
+def get_engine() -> AsyncEngine:
+    """The process-wide engine, created on the first call"""
+    global _engine
+    if _engine is None:
+        _engine = create_engine_from_settings(settings)
+        async_session_factory.configure(bind=_engine)
+    return _engine
 
-# Database configuration
 
+async def dispose_engine() -> None:
+    """Close the pooled connections; the next get_engine() builds a new engine"""
+    global _engine
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
 
-# Create engine
-engine = create_engine(
-    DATABASE_URL,
-    echo=True,  # Set to False in production
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
 
-def create_db_and_tables():
+async def create_db_and_tables():
     """Create database tables"""
-    SQLModel.metadata.create_all(engine)
+    async with get_engine().begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
 
-def get_session() -> Generator[Session, None, None]:
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """Dependency to get database session"""
-    with Session(engine) as session:
+    get_engine()  # no-op once the lifespan handler has created it
+    async with async_session_factory() as session:
         yield session
 
 # Alternative function name for compatibility
-def get_db() -> Generator[Session, None, None]:
+def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Alias for get_session for backward compatibility"""
-    return get_session()
\ No newline at end of file
+    return get_session()
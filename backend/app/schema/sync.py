@@ -0,0 +1,30 @@
+from typing import List
+from uuid import UUID
+
+from sqlmodel import SQLModel
+
+from app.schema.bookings import BookingResponse
+from app.schema.pets import PetResponse
+from app.schema.vet_time_off import VetTimeOffResponse
+from app.schema.vet_working_hours import VetWorkingHoursResponse
+
+
+class SyncTombstone(SQLModel):
+    """A row deleted since the token; the client drops its copy."""
+    collection: str
+    id: UUID
+
+
+class SyncResponse(SQLModel):
+    """Rows created, updated or deleted since the token.
+
+    Owners get pets and bookings, and vets get bookings, working_hours and
+    time_off. Collections that do not apply to the caller stay empty.
+    """
+    pets: List[PetResponse] = []
+    bookings: List[BookingResponse] = []
+    working_hours: List[VetWorkingHoursResponse] = []
+    time_off: List[VetTimeOffResponse] = []
+    deleted: List[SyncTombstone] = []
+    next_token: str
+    has_more: bool
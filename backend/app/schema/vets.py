@@ -52,3 +52,27 @@ class VetResponse(SQLModel):
     state_region: str | None = None
     postal_code: str | None = None
     country: str | None = None
+
+class VetSummary(SQLModel):
+    """Vet directory entry; bio is only present when requested with include_bio."""
+    id: UUID
+    full_name: str
+    specialty: VetSpecialty
+    clinic_name: str | None = None
+    city: str | None = None
+    state_region: str | None = None
+    postal_code: str | None = None
+    country: str | None = None
+    bio: str | None = None
+
+class VetNearby(SQLModel):
+    """Vet directory entry with the distance from the searched point."""
+    id: UUID
+    full_name: str
+    specialty: VetSpecialty
+    clinic_name: str | None = None
+    city: str | None = None
+    state_region: str | None = None
+    postal_code: str | None = None
+    country: str | None = None
+    distance_km: float
@@ -1,24 +1,62 @@
-import os
+from contextlib import asynccontextmanager
 
+from app.api.v1.availability import router as availability_router
 from app.api.v1.bookings import router as bookings_router
+from app.api.v1.events import router as events_router
 from app.api.v1.pets import router as pets_router
+from app.api.v1.sync import router as sync_router
 from app.api.v1.users import router as users_router
 from app.api.v1.vets import router as vets_router
-from dotenv import load_dotenv
+from app.core.config import get_settings
+from app.core.events import event_hub
+from app.core.idempotency import REPLAYED_HEADER, IdempotencyMiddleware, build_idempotency_store
+from app.core.instrumentation import RequestMetricsMiddleware
+from app.core.metrics import render_latest
+from app.core.passwords import password_hasher
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.schema.database import dispose_engine, get_engine
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 
-load_dotenv()
-
-FRONTEND_URL = os.getenv("FRONTEND_URL")
+settings = get_settings()
 
 origins = [
-    FRONTEND_URL,
+    settings.frontend_url,
     "http://localhost:5173",   # Vite dev server
     "http://localhost:3000",   # alternate local dev
 ]
 
-app = FastAPI()
+# POSTs that create rows: a retry with the same Idempotency-Key gets the first response back
+IDEMPOTENT_ROUTES = (
+    ("POST", "/api/v1/bookings"),
+    ("POST", "/api/v1/pets/"),
+    ("POST", "/api/v1/vets/me/working-hours"),
+    ("POST", "/api/v1/vets/me/time-off"),
+    ("POST", "/api/v1/vets/me/time-off/batch"),
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the engine and pool before the first request rather than on import
+    get_engine()
+    await event_hub.start()
+    yield
+    await event_hub.stop()
+    password_hasher.shutdown()
+    await dispose_engine()
+
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Innermost, so a replayed response still gets fresh CORS and Server-Timing headers
+app.add_middleware(
+    IdempotencyMiddleware,
+    store=build_idempotency_store(settings),
+    routes=IDEMPOTENT_ROUTES,
+    wait_seconds=settings.idempotency_wait_seconds,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,9 +64,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, REPLAYED_HEADER, "Server-Timing"],
+)
+
+if settings.profiling_enabled:
+    from app.core.profiling import ProfilerMiddleware
+
+    # Inside the metrics middleware so a profile can report the request's SQL time
+    app.add_middleware(ProfilerMiddleware, allowed_users=settings.profiling_allowed_users)
+
+# Added last so it wraps everything else, CORS preflights included
+app.add_middleware(
+    RequestMetricsMiddleware,
+    server_timing=settings.server_timing,
+    slow_request_ms=settings.slow_request_ms,
 )
 
 app.include_router(users_router, prefix="/api/v1", tags=["users"])
 app.include_router(pets_router, prefix="/api/v1", tags=["pets"])
 app.include_router(vets_router, prefix="/api/v1", tags=["vets"])
-app.include_router(bookings_router, prefix="/api/v1", tags=["bookings"])
\ No newline at end of file
+app.include_router(bookings_router, prefix="/api/v1", tags=["bookings"])
+app.include_router(availability_router, prefix="/api/v1", tags=["availability"])
+app.include_router(events_router, prefix="/api/v1", tags=["events"])
+app.include_router(sync_router, prefix="/api/v1", tags=["sync"])
+if settings.profiling_enabled:
+    from app.api.v1.debug import router as debug_router
+
+    app.include_router(debug_router, prefix="/api/v1", tags=["debug"])
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render_latest(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,225 @@
+"""Benchmark the v1 API in-process and report latency percentiles per route as JSON.
+
+    python -m scripts.seed --scale 1 --create-schema      # 100k owners, 10k vets, 5M bookings
+    python -m scripts.benchmark --concurrency 32 --requests 2000 --output bench.json
+
+The FastAPI app is driven through httpx's ASGI transport, so no server or network
+is involved and the numbers are the app plus its database (DATABASE_URL). Each
+scenario runs on its own, so one route's load does not skew another's numbers.
+Compare two result files with any JSON diff; the keys are stable.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import func
+from sqlmodel import select
+
+from app.core.config import get_settings
+from app.core.passwords import password_hasher
+from app.models import Users
+from app.models.enums import UserRole
+from app.schema.database import async_session_factory, dispose_engine, get_engine
+from main import app
+from scripts.seed import OWNER_EMAIL, SEED_PASSWORD, VET_EMAIL, Volumes, seed
+
+BASE_URL = "http://benchmark/api/v1"
+
+
+@dataclass
+class Recorder:
+    """Collects per-route latencies for one scenario run."""
+
+    client: httpx.AsyncClient
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    async def request(self, route: str, method: str, url: str, expect: int = 200, **kwargs: Any) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.latencies[route].append(time.perf_counter() - started)
+        if response.status_code != expect:
+            self.errors[route] += 1
+        return response
+
+
+@dataclass
+class Context:
+    volumes: Volumes
+    owner_tokens: List[Dict[str, str]]
+    vet_tokens: List[Dict[str, str]]
+    rng: random.Random
+
+
+Scenario = Callable[[Recorder, Context], Awaitable[None]]
+
+
+async def login(rec: Recorder, ctx: Context) -> None:
+    email = OWNER_EMAIL.format(ctx.rng.randrange(ctx.volumes.owners))
+    await rec.request("POST /auth/login", "POST", "/auth/login", json={"email": email, "password": SEED_PASSWORD})
+
+
+async def owner_bookings(rec: Recorder, ctx: Context) -> None:
+    await rec.request("GET /bookings", "GET", "/bookings", headers=ctx.rng.choice(ctx.owner_tokens))
+
+
+async def vet_bookings(rec: Recorder, ctx: Context) -> None:
+    await rec.request("GET /bookings/vet", "GET", "/bookings/vet", headers=ctx.rng.choice(ctx.vet_tokens))
+
+
+async def list_vets(rec: Recorder, ctx: Context) -> None:
+    await rec.request("GET /vets", "GET", "/vets", headers=ctx.rng.choice(ctx.owner_tokens))
+
+
+async def pet_crud(rec: Recorder, ctx: Context) -> None:
+    headers = ctx.rng.choice(ctx.owner_tokens)
+    created = await rec.request(
+        "POST /pets", "POST", "/pets/", expect=201, headers=headers, json={"name": "Bench", "species": "dog"}
+    )
+    if created.status_code != 201:
+        return
+    pet_id = created.json()["id"]
+    await rec.request("GET /pets", "GET", "/pets", headers=headers)
+    await rec.request("GET /pets/{id}", "GET", f"/pets/{pet_id}", headers=headers)
+    await rec.request("PATCH /pets/{id}", "PATCH", f"/pets/{pet_id}", headers=headers, json={"notes": "benchmarked"})
+    await rec.request("DELETE /pets/{id}", "DELETE", f"/pets/{pet_id}", expect=204, headers=headers)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "login": login,
+    "owner_bookings": owner_bookings,
+    "vet_bookings": vet_bookings,
+    "vets": list_vets,
+    "pet_crud": pet_crud,
+}
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    # Nearest-rank percentile on an already sorted sample
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _summarise(rec: Recorder, wall: float) -> Dict[str, Dict[str, Any]]:
+    summary = {}
+    for route, samples in rec.latencies.items():
+        ordered = sorted(samples)
+        summary[route] = {
+            "requests": len(ordered),
+            "errors": rec.errors.get(route, 0),
+            "p50_ms": round(_percentile(ordered, 50) * 1000, 3),
+            "p95_ms": round(_percentile(ordered, 95) * 1000, 3),
+            "p99_ms": round(_percentile(ordered, 99) * 1000, 3),
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+            "throughput_rps": round(len(ordered) / wall, 2),
+        }
+    return summary
+
+
+async def _run(scenario: Scenario, client: httpx.AsyncClient, ctx: Context, iterations: int, concurrency: int):
+    rec = Recorder(client)
+    remaining = iter(range(iterations))
+
+    async def worker() -> None:
+        for _ in remaining:
+            await scenario(rec, ctx)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summarise(rec, time.perf_counter() - started)
+
+
+async def _seeded_volumes() -> Volumes:
+    get_engine()  # binds async_session_factory
+    async with async_session_factory() as session:
+        counts = dict((await session.exec(select(Users.role, func.count()).group_by(Users.role))).all())
+    owners, vets = counts.get(UserRole.OWNER, 0), counts.get(UserRole.VET, 0)
+    if not owners or not vets:
+        raise SystemExit("No seeded data found: run `python -m scripts.seed` first or pass --seed-scale.")
+    return Volumes(owners=owners, vets=vets, bookings=0)
+
+
+async def _tokens(client: httpx.AsyncClient, email: str, count: int, population: int) -> List[Dict[str, str]]:
+    tokens = []
+    for i in random.Random(1).sample(range(population), min(count, population)):
+        response = await client.post("/auth/login", json={"email": email.format(i), "password": SEED_PASSWORD})
+        response.raise_for_status()
+        tokens.append({"Authorization": f"Bearer {response.json()['access_token']}"})
+    return tokens
+
+
+async def benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.seed_scale is not None:
+        await seed(Volumes.at_scale(args.seed_scale), create_schema=True)
+    volumes = await _seeded_volumes()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url=BASE_URL, timeout=None) as client:
+        ctx = Context(
+            volumes=volumes,
+            owner_tokens=await _tokens(client, OWNER_EMAIL, args.sessions, volumes.owners),
+            vet_tokens=await _tokens(client, VET_EMAIL, args.sessions, volumes.vets),
+            rng=random.Random(args.random_seed),
+        )
+        routes: Dict[str, Any] = {}
+        for name in args.scenarios:
+            # Warm-up requests are not recorded
+            await _run(SCENARIOS[name], client, ctx, min(args.warmup, args.requests), args.concurrency)
+            results = await _run(SCENARIOS[name], client, ctx, args.requests, args.concurrency)
+            routes.update(results)
+            for route, stats in results.items():
+                print(f"{route}: p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms "
+                      f"{stats['throughput_rps']} req/s errors={stats['errors']}", file=sys.stderr)
+
+    settings = get_settings()
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "dialect": get_engine().dialect.name,
+            "owners": volumes.owners,
+            "vets": volumes.vets,
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "db_pool": settings.db_pool,
+            "db_pool_size": settings.db_pool_size,
+            "bcrypt_rounds": settings.bcrypt_rounds,
+        },
+        "routes": routes,
+    }
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        result = await benchmark(args)
+    finally:
+        await dispose_engine()
+        password_hasher.shutdown()
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight at once")
+    parser.add_argument("--requests", type=int, default=500, help="iterations per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="unrecorded iterations per scenario")
+    parser.add_argument("--sessions", type=int, default=20, help="logged-in owners / vets to spread load over")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--seed-scale", type=float, default=None, help="seed a fresh database at this scale first")
+    parser.add_argument("--random-seed", type=int, default=11)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    asyncio.run(_main(parser.parse_args()))
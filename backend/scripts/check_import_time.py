@@ -0,0 +1,78 @@
+"""Fail when importing the app takes longer than the startup budget.
+
+    python -m scripts.check_import_time                 # budget from IMPORT_BUDGET_MS
+    python -m scripts.check_import_time --budget-ms 900 --top 20
+
+``import main`` is timed with ``python -X importtime`` in fresh interpreters and
+the fastest run is compared against the budget. The modules with the largest
+self time are listed so a regression can be traced to its import. Modules that
+must not load at import time (the database drivers, which load when the
+lifespan handler creates the engine, and the profiler) fail the check too.
+The README has the baseline this budget was set from.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+IMPORT_BUDGET_MS = 1500.0
+# Top-level packages that should only load on first use
+DEFERRED_MODULES = ("asyncpg", "aiosqlite", "cProfile", "numpy", "pyinstrument")
+
+
+@dataclass(frozen=True)
+class ImportTimes:
+    total_ms: float
+    self_ms: Dict[str, float]
+
+
+def _measure() -> ImportTimes:
+    # Profiling off, so its middleware and router are not imported either
+    env = {**os.environ, "PROFILING_ENABLED": "false"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    self_ms: Dict[str, float] = {}
+    total_ms = 0.0
+    # Lines read "import time: <self us> | <cumulative us> | <indented name>"
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        self_ms[name] = int(own) / 1000
+        if name == "main":
+            total_ms = int(cumulative) / 1000
+    return ImportTimes(total_ms=total_ms, self_ms=self_ms)
+
+
+def main(args: argparse.Namespace) -> int:
+    runs: List[ImportTimes] = [_measure() for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times.total_ms)
+
+    print(f"import main: {best.total_ms:.0f}ms (best of {args.runs}, budget {args.budget_ms:.0f}ms)")
+    for name, ms in sorted(best.self_ms.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {ms:8.1f}ms  {name}")
+
+    failed = 0
+    deferred = sorted({name.split(".")[0] for name in best.self_ms} & set(DEFERRED_MODULES))
+    if deferred:
+        print("imported at startup but should load on first use: " + ", ".join(deferred))
+        failed = 1
+    if best.total_ms > args.budget_ms:
+        print(f"over budget by {best.total_ms - args.budget_ms:.0f}ms")
+        failed = 1
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time; the fastest counts")
+    parser.add_argument("--top", type=int, default=15, help="modules to list by self time")
+    sys.exit(main(parser.parse_args()))
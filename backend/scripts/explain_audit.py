@@ -0,0 +1,216 @@
+"""Fail when a query issued by app/crud plans a full table scan.
+
+    python -m scripts.seed --scale 0.05 --create-schema   # or against a migrated DB
+    python -m scripts.explain_audit
+
+Each CRUD read is run once against the seeded database (DATABASE_URL). Its SQL is
+captured and replayed under EXPLAIN, with EXPLAIN QUERY PLAN on SQLite. A
+``Seq Scan`` (Postgres) or a ``SCAN <table>`` step (SQLite) is reported, and the
+exit status is 1 if any are found.
+"""
+import argparse
+import asyncio
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import event, func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.crud import bookings, pets, sync, users, vet_time_off, vet_working_hours, vets
+from app.models import Bookings, Pets, Tombstones, Users, VetTimeOff, VetWorkingHours, Vets
+from app.schema.database import async_session_factory, dispose_engine, get_engine
+
+# Queries that read a whole table by design, with the reason.
+EXPECTED_SCANS = {
+    "vets.search_vets": "first directory page walks ix_vets_active_full_name in order; LIMIT stops it",
+    "vets.search_vets(q)": "same ordered walk, filtered by the full-text match",
+}
+
+# FTS5 lookups are reported as "SCAN <table> VIRTUAL TABLE INDEX ..." and are not scans
+SQLITE_SCAN = re.compile(r"\bSCAN (?!CONSTANT ROW)(\w+)\b(?! VIRTUAL TABLE)")
+POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+@dataclass
+class Sample:
+    """Ids of real rows that the CRUD calls are pointed at."""
+
+    user: Users
+    pet: Pets
+    vet: Vets
+    booking: Bookings
+    working_hour: VetWorkingHours
+    time_off: VetTimeOff
+
+
+@dataclass
+class Finding:
+    case: str
+    statement: str
+    plan: List[str]
+    scans: List[str] = field(default_factory=list)
+
+
+async def _sample(session: AsyncSession) -> Sample:
+    # The busiest vet and owner, so the planner sees realistic row counts
+    busiest_vet = (
+        select(Bookings.vet_id).group_by(Bookings.vet_id).order_by(func.count().desc()).limit(1).scalar_subquery()
+    )
+    booking = (await session.exec(select(Bookings).where(Bookings.vet_id == busiest_vet).limit(1))).one()
+    return Sample(
+        user=(await session.exec(select(Users).where(Users.id == booking.user_id))).one(),
+        pet=(await session.exec(select(Pets).where(Pets.id == booking.pet_id))).one(),
+        vet=(await session.exec(select(Vets).where(Vets.id == booking.vet_id))).one(),
+        booking=booking,
+        working_hour=(await session.exec(select(VetWorkingHours).limit(1))).one(),
+        time_off=(await session.exec(select(VetTimeOff).limit(1))).one(),
+    )
+
+
+Case = Callable[[AsyncSession, Sample], Awaitable[Any]]
+
+CASES: Dict[str, Case] = {
+    "users.get_user_by_email": lambda s, x: users.get_user_by_email(s, x.user.email),
+    "pets.get_pets_by_user": lambda s, x: pets.get_pets_by_user(s, x.user.id),
+    "pets.get_pet_by_id": lambda s, x: pets.get_pet_by_id(s, x.pet.id, x.user.id),
+    "vets.search_vets": lambda s, x: vets.search_vets(s, limit=50, city=x.vet.city),
+    "vets.search_vets(q)": lambda s, x: vets.search_vets(s, limit=50, q=x.vet.full_name.split()[-1]),
+    "vets.find_vets_near": lambda s, x: vets.find_vets_near(s, x.vet.latitude, x.vet.longitude, radius_km=10, limit=50),
+    "vets.find_vets_near(after)": lambda s, x: vets.find_vets_near(
+        s, x.vet.latitude, x.vet.longitude, radius_km=10, limit=50, after=(5.0, x.vet.id)
+    ),
+    "vets.get_directory_rows": lambda s, x: vets.get_directory_rows(s, [x.vet.id]),
+    "vets.list_bookable_vets": lambda s, x: vets.list_bookable_vets(s, specialties=[x.vet.specialty], city=x.vet.city),
+    "vets.get_vet_by_id": lambda s, x: vets.get_vet_by_id(s, x.vet.id),
+    "vets.get_vet_by_user_id": lambda s, x: vets.get_vet_by_user_id(s, x.vet.user_id),
+    "vet_working_hours.get_working_hours_by_vet": lambda s, x: vet_working_hours.get_working_hours_by_vet(s, x.vet.id),
+    "vet_working_hours.get_working_hours_for_vets": lambda s, x: vet_working_hours.get_working_hours_for_vets(
+        s, [x.vet.id, x.working_hour.vet_id]
+    ),
+    "vet_working_hours.get_working_hour_by_id": lambda s, x: vet_working_hours.get_working_hour_by_id(s, x.working_hour.id),
+    "vet_time_off.get_time_off_by_vet": lambda s, x: vet_time_off.get_time_off_by_vet(s, x.vet.id),
+    "vet_time_off.get_time_off_for_vet_between": lambda s, x: vet_time_off.get_time_off_for_vet_between(
+        s, x.vet.id, x.booking.start_at, x.booking.start_at + timedelta(days=7)
+    ),
+    "vet_time_off.get_time_off_for_vets_between": lambda s, x: vet_time_off.get_time_off_for_vets_between(
+        s, [x.vet.id, x.time_off.vet_id], x.booking.start_at, x.booking.start_at + timedelta(days=7)
+    ),
+    "vet_time_off.get_time_off_by_id": lambda s, x: vet_time_off.get_time_off_by_id(s, x.time_off.id),
+    "bookings.list_bookings_for_user": lambda s, x: bookings.list_bookings_for_user(
+        s, x.user.id, limit=50, after=(x.booking.start_at, x.booking.id), with_pet=True, with_owner=True
+    ),
+    "bookings.list_bookings_for_vet": lambda s, x: bookings.list_bookings_for_vet(
+        s, x.vet.id, limit=50, start_from=x.booking.start_at, with_pet=True, with_owner=True
+    ),
+    "bookings.list_active_bookings_for_vet_between": lambda s, x: bookings.list_active_bookings_for_vet_between(
+        s, x.vet.id, x.booking.start_at, x.booking.start_at + timedelta(days=7)
+    ),
+    "bookings.list_active_bookings_for_vets_between": lambda s, x: bookings.list_active_bookings_for_vets_between(
+        s, [x.vet.id, x.working_hour.vet_id], x.booking.start_at, x.booking.start_at + timedelta(days=7)
+    ),
+    "bookings.get_booking_by_id": lambda s, x: bookings.get_booking_by_id(s, x.booking.id, x.user.id),
+    "bookings.get_booking_by_id_for_vet": lambda s, x: bookings.get_booking_by_id_for_vet(
+        s, x.booking.id, x.vet.id, with_details=True
+    ),
+    "bookings.find_bookings_overlapping": lambda s, x: bookings.find_bookings_overlapping(
+        s, x.vet.id, [(x.booking.start_at, x.booking.end_at), (x.booking.start_at + timedelta(days=1), x.booking.start_at + timedelta(days=2))]
+    ),
+    "bookings.find_conflicting_booking": lambda s, x: bookings.find_conflicting_booking(
+        s, x.vet.id, x.booking.start_at, x.booking.end_at
+    ),
+    "sync.get_changed_since(pets)": lambda s, x: sync.get_changed_since(
+        s, [Pets.id], Pets.updated_at, Pets.id, Pets.user_id == x.user.id, (datetime.min, UUID(int=0)), limit=500
+    ),
+    "sync.get_changed_since(bookings)": lambda s, x: sync.get_changed_since(
+        s, [Bookings.id], Bookings.updated_at, Bookings.id, Bookings.vet_id == x.vet.id,
+        (x.booking.updated_at, x.booking.id), limit=500,
+    ),
+    "sync.get_changed_since(working_hours)": lambda s, x: sync.get_changed_since(
+        s, [VetWorkingHours.id], VetWorkingHours.updated_at, VetWorkingHours.id,
+        VetWorkingHours.vet_id == x.vet.id, (datetime.min, UUID(int=0)), limit=500,
+    ),
+    "sync.get_changed_since(time_off)": lambda s, x: sync.get_changed_since(
+        s, [VetTimeOff.id], VetTimeOff.updated_at, VetTimeOff.id, VetTimeOff.vet_id == x.vet.id,
+        (datetime.min, UUID(int=0)), limit=500,
+    ),
+    "sync.get_changed_since(deleted)": lambda s, x: sync.get_changed_since(
+        s, [Tombstones.entity_id], Tombstones.deleted_at, Tombstones.id, Tombstones.user_id == x.user.id,
+        (x.booking.updated_at, UUID(int=0)), limit=500,
+    ),
+    "sync.withdraw_tombstones": lambda s, x: sync.withdraw_tombstones(s, sync.BOOKINGS, [x.booking.id], vet_id=x.vet.id),
+}
+
+
+async def _capture(case: Case, sample: Sample) -> List[Tuple[str, Any]]:
+    captured: List[Tuple[str, Any]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    sync_engine = get_engine().sync_engine
+    event.listen(sync_engine, "before_cursor_execute", record)
+    try:
+        async with async_session_factory() as session:
+            await case(session, sample)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", record)
+    return captured
+
+
+async def _explain(statement: str, parameters: Any) -> List[str]:
+    engine = get_engine()
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    async with engine.connect() as conn:
+        result = await conn.exec_driver_sql(prefix + statement, parameters)
+        # SQLite rows are (id, parent, notused, detail); Postgres rows are one text column
+        return [str(row[-1]) for row in result]
+
+
+async def audit() -> List[Finding]:
+    pattern = SQLITE_SCAN if get_engine().dialect.name == "sqlite" else POSTGRES_SCAN
+    async with async_session_factory() as session:
+        sample = await _sample(session)
+
+    findings = []
+    for name, case in CASES.items():
+        for statement, parameters in await _capture(case, sample):
+            plan = await _explain(statement, parameters)
+            scans = [match.group(1) for line in plan for match in pattern.finditer(line)]
+            findings.append(Finding(case=name, statement=statement, plan=plan, scans=scans))
+    return findings
+
+
+async def _main(args: argparse.Namespace) -> int:
+    try:
+        findings = await audit()
+    finally:
+        await dispose_engine()
+
+    failed = 0
+    for finding in findings:
+        if not finding.scans:
+            label = "ok"
+        elif finding.case in EXPECTED_SCANS:
+            label = f"expected ({EXPECTED_SCANS[finding.case]})"
+        else:
+            label = "FULL SCAN of " + ", ".join(finding.scans)
+            failed += 1
+        print(f"{finding.case}: {label}")
+        if args.verbose or (finding.scans and finding.case not in EXPECTED_SCANS):
+            print("    " + " ".join(finding.statement.split()))
+            for line in finding.plan:
+                print("      " + line)
+
+    print(f"\n{len(findings)} statements checked, {failed} with unexpected full scans")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every plan")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
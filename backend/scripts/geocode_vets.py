@@ -0,0 +1,98 @@
+"""Fill in vet clinic coordinates from a local postal-code centroid table.
+
+    python -m scripts.geocode_vets postal_centroids.csv
+    python -m scripts.geocode_vets postal_centroids.csv --all   # redo geocoded vets too
+
+The table is a CSV with a header row and the columns ``country``,
+``postal_code``, ``latitude`` and ``longitude``. A vet is matched on postal code
+and country, both compared case-insensitively and ignoring spaces. A row with an
+empty country matches the postal code in any country. No network service is
+called. Matched vets get latitude, longitude and grid_cell
+(see app.core.geo). Vets whose postal code or country changes lose their
+coordinates (crud.vets.update_vet), so a periodic run picks them up again.
+"""
+import argparse
+import asyncio
+import csv
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import bindparam, update
+from sqlmodel import select
+
+from app.core.geo import grid_cell
+from app.core.response_cache import DIRECTORY_SCOPE, response_cache
+from app.models import Vets
+from app.schema.database import dispose_engine, get_engine
+
+BATCH_SIZE = 1000
+
+Centroids = Dict[Tuple[str, str], Tuple[float, float]]
+
+
+def _normalise(value: Optional[str]) -> str:
+    return "".join((value or "").split()).lower()
+
+
+def load_centroids(path: str) -> Centroids:
+    centroids: Centroids = {}
+    with open(path, newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            postal_code = _normalise(row["postal_code"])
+            if postal_code:
+                centroids[(_normalise(row.get("country")), postal_code)] = (
+                    float(row["latitude"]),
+                    float(row["longitude"]),
+                )
+    return centroids
+
+
+def _batches(items: List[dict]) -> Iterator[List[dict]]:
+    for start in range(0, len(items), BATCH_SIZE):
+        yield items[start:start + BATCH_SIZE]
+
+
+async def geocode(centroids: Centroids, redo: bool = False) -> Tuple[int, int]:
+    """Geocode vets with a postal code; returns (matched, unmatched)."""
+    statement = select(Vets.id, Vets.postal_code, Vets.country).where(Vets.postal_code.is_not(None))
+    if not redo:
+        statement = statement.where(Vets.latitude.is_(None))
+
+    engine = get_engine()
+    async with engine.connect() as conn:
+        vets = (await conn.execute(statement)).all()
+
+    matches: List[dict] = []
+    for vet_id, postal_code, country in vets:
+        postal_code = _normalise(postal_code)
+        point = centroids.get((_normalise(country), postal_code)) or centroids.get(("", postal_code))
+        if point is not None:
+            latitude, longitude = point
+            matches.append({"vet_id": vet_id, "lat": latitude, "lon": longitude, "cell": grid_cell(latitude, longitude)})
+
+    # One executemany per batch rather than an UPDATE per vet
+    set_coordinates = (
+        update(Vets.__table__)
+        .where(Vets.__table__.c.id == bindparam("vet_id"))
+        .values(latitude=bindparam("lat"), longitude=bindparam("lon"), grid_cell=bindparam("cell"))
+    )
+    for batch in _batches(matches):
+        async with engine.begin() as conn:
+            await conn.execute(set_coordinates, batch)
+    if matches:
+        await response_cache.bump(DIRECTORY_SCOPE)
+    return len(matches), len(vets) - len(matches)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        matched, unmatched = await geocode(load_centroids(args.centroids), redo=args.all)
+    finally:
+        await dispose_engine()
+    print(f"{matched} vets geocoded, {unmatched} postal codes not found in {args.centroids}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("centroids", help="CSV of country, postal_code, latitude, longitude")
+    parser.add_argument("--all", action="store_true", help="also re-geocode vets that already have coordinates")
+    asyncio.run(_main(parser.parse_args()))
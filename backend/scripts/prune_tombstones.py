@@ -0,0 +1,35 @@
+"""Delete sync tombstones older than the retention window.
+
+    python -m scripts.prune_tombstones                # SYNC_TOMBSTONE_RETENTION_DAYS
+    python -m scripts.prune_tombstones --days 60
+
+/sync answers a token older than SYNC_TOMBSTONE_RETENTION_DAYS with 410 and
+the client resyncs in full. Tombstones past the window are no longer read and
+can go. Run this daily from cron. Pruning with a longer window than the
+setting is harmless. A shorter one can drop deletions that an unexpired token
+still needs.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from app.core.config import get_settings
+from app.crud.sync import prune_tombstones
+from app.schema.database import async_session_factory, dispose_engine, get_engine
+
+
+async def _main(args: argparse.Namespace) -> None:
+    get_engine()
+    try:
+        async with async_session_factory() as session:
+            removed = await prune_tombstones(session, before=datetime.now() - timedelta(days=args.days))
+            await session.commit()
+    finally:
+        await dispose_engine()
+    print(f"{removed} tombstones older than {args.days} days deleted")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=get_settings().sync_tombstone_retention_days)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,203 @@
+"""Seed the configured database (DATABASE_URL) with a large synthetic dataset.
+
+    python -m scripts.seed --scale 0.05 --create-schema
+
+--scale 1 produces 100k owners, 10k vets and 5M bookings; smaller scales keep
+the same proportions. Every seeded account uses the password in SEED_PASSWORD.
+Used by scripts.explain_audit and scripts.benchmark.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time as clock
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterator, List
+from uuid import uuid4
+
+from sqlalchemy import Table
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import SQLModel
+
+from app.core.geo import grid_cell
+from app.core.passwords import password_hasher
+from app.models import Bookings, Pets, Users, VetTimeOff, VetWorkingHours, Vets
+from app.models.enums import BookingStatus, DayOfWeek, UserRole, VetSpecialty
+from app.schema.database import dispose_engine, get_engine
+
+SEED_PASSWORD = "petique-seed"
+OWNER_EMAIL = "owner{}@seed.petique.app"
+VET_EMAIL = "vet{}@seed.petique.app"
+
+FULL_OWNERS = 100_000
+FULL_VETS = 10_000
+FULL_BOOKINGS = 5_000_000
+PETS_PER_OWNER = 1.5
+BATCH_SIZE = 10_000
+
+WORKDAYS = [DayOfWeek.MON, DayOfWeek.TUE, DayOfWeek.WED, DayOfWeek.THU, DayOfWeek.FRI]
+OPEN, CLOSE = time(9, 0), time(17, 0)
+SLOT = timedelta(minutes=30)
+FIRST_DAY = date(2024, 1, 1)
+CITIES = ["Pune", "Mumbai", "Bengaluru", "Delhi", "Chennai", "Hyderabad", "Kolkata", "Jaipur"]
+# Clinics are scattered up to ~20 km around these (lat, lon) city centres
+CITY_CENTRES = {
+    "Pune": (18.52, 73.86), "Mumbai": (19.08, 72.88), "Bengaluru": (12.97, 77.59), "Delhi": (28.61, 77.21),
+    "Chennai": (13.08, 80.27), "Hyderabad": (17.39, 78.49), "Kolkata": (22.57, 88.36), "Jaipur": (26.91, 75.79),
+}
+CLINIC_SCATTER_DEGREES = 0.2
+SPECIES = ["dog", "cat", "rabbit", "bird", "hamster"]
+STATUS_WEIGHTS = {
+    BookingStatus.COMPLETED: 60,
+    BookingStatus.CONFIRMED: 15,
+    BookingStatus.PENDING: 10,
+    BookingStatus.CANCELLED: 10,
+    BookingStatus.NO_SHOW: 5,
+}
+
+
+@dataclass(frozen=True)
+class Volumes:
+    owners: int
+    vets: int
+    bookings: int
+
+    @classmethod
+    def at_scale(cls, scale: float) -> "Volumes":
+        return cls(
+            owners=max(1, int(FULL_OWNERS * scale)),
+            vets=max(1, int(FULL_VETS * scale)),
+            bookings=int(FULL_BOOKINGS * scale),
+        )
+
+
+def _working_slots() -> Iterator[datetime]:
+    """Consecutive 30 minute weekday slots from FIRST_DAY onwards."""
+    day = FIRST_DAY
+    while True:
+        if day.weekday() < len(WORKDAYS):
+            start = datetime.combine(day, OPEN)
+            while start + SLOT <= datetime.combine(day, CLOSE):
+                yield start
+                start += SLOT
+        day += timedelta(days=1)
+
+
+async def _insert(conn: AsyncConnection, table: Table, rows: Iterator[Dict[str, Any]]) -> int:
+    total = 0
+    batch: List[Dict[str, Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            await conn.execute(table.insert(), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        await conn.execute(table.insert(), batch)
+        total += len(batch)
+    return total
+
+
+async def seed(volumes: Volumes, create_schema: bool = False, random_seed: int = 7) -> Dict[str, int]:
+    rng = random.Random(random_seed)
+    password_hash = await password_hasher.hash(SEED_PASSWORD)
+    now = datetime.now()
+    stamps = {"created_at": now, "updated_at": now}
+
+    owner_ids = [uuid4() for _ in range(volumes.owners)]
+    vet_user_ids = [uuid4() for _ in range(volumes.vets)]
+    vet_ids = [uuid4() for _ in range(volumes.vets)]
+    pet_count = max(1, int(volumes.owners * PETS_PER_OWNER))
+    pet_owner = [(uuid4(), owner_ids[i % volumes.owners]) for i in range(pet_count)]
+
+    def users() -> Iterator[Dict[str, Any]]:
+        for i, user_id in enumerate(owner_ids):
+            yield dict(id=user_id, email=OWNER_EMAIL.format(i), full_name=f"Owner {i}",
+                       password_hash=password_hash, role=UserRole.OWNER, is_active=True, **stamps)
+        for i, user_id in enumerate(vet_user_ids):
+            yield dict(id=user_id, email=VET_EMAIL.format(i), full_name=f"Dr. Vet {i}",
+                       password_hash=password_hash, role=UserRole.VET, is_active=True, **stamps)
+
+    def vets() -> Iterator[Dict[str, Any]]:
+        specialties = list(VetSpecialty)
+        for i, (vet_id, user_id) in enumerate(zip(vet_ids, vet_user_ids)):
+            city = CITIES[i % len(CITIES)]
+            centre_lat, centre_lon = CITY_CENTRES[city]
+            latitude = centre_lat + rng.uniform(-CLINIC_SCATTER_DEGREES, CLINIC_SCATTER_DEGREES)
+            longitude = centre_lon + rng.uniform(-CLINIC_SCATTER_DEGREES, CLINIC_SCATTER_DEGREES)
+            yield dict(id=vet_id, user_id=user_id, full_name=f"Dr. Vet {i}", email=VET_EMAIL.format(i),
+                       phone=None, specialty=specialties[i % len(specialties)], bio=f"Seeded vet number {i}.",
+                       clinic_name=f"Clinic {i}", clinic_address=None, city=city,
+                       state_region=None, postal_code=None, country="India",
+                       latitude=latitude, longitude=longitude, grid_cell=grid_cell(latitude, longitude),
+                       is_active=rng.random() > 0.05, **stamps)
+
+    def working_hours() -> Iterator[Dict[str, Any]]:
+        for vet_id in vet_ids:
+            for day in WORKDAYS:
+                yield dict(id=uuid4(), vet_id=vet_id, day=day, start_time=OPEN, end_time=CLOSE,
+                           is_active=True, **stamps)
+
+    def time_off() -> Iterator[Dict[str, Any]]:
+        for vet_id in vet_ids:
+            start = datetime.combine(FIRST_DAY + timedelta(days=rng.randrange(365)), time(0, 0))
+            yield dict(id=uuid4(), vet_id=vet_id, start_at=start, end_at=start + timedelta(days=1),
+                       reason="Seeded leave", **stamps)
+
+    def pets() -> Iterator[Dict[str, Any]]:
+        for i, (pet_id, user_id) in enumerate(pet_owner):
+            yield dict(id=pet_id, user_id=user_id, name=f"Pet {i}", species=SPECIES[i % len(SPECIES)],
+                       breed=None, date_of_birth=None, sex=None, notes=None, **stamps)
+
+    def bookings() -> Iterator[Dict[str, Any]]:
+        statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+        per_vet, extra = divmod(volumes.bookings, volumes.vets)
+        for n, vet_id in enumerate(vet_ids):
+            slots = _working_slots()
+            for _ in range(per_vet + (1 if n < extra else 0)):
+                start = next(slots)
+                pet_id, user_id = pet_owner[rng.randrange(pet_count)]
+                yield dict(id=uuid4(), user_id=user_id, pet_id=pet_id, vet_id=vet_id,
+                           start_at=start, end_at=start + SLOT,
+                           booking_status=rng.choices(statuses, weights)[0], reason=None, **stamps)
+
+    counts: Dict[str, int] = {}
+    engine = get_engine()
+    async with engine.begin() as conn:
+        if create_schema:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        if engine.dialect.name == "sqlite":
+            await conn.exec_driver_sql("PRAGMA synchronous = OFF")
+        for model, rows in (
+            (Users, users()),
+            (Vets, vets()),
+            (VetWorkingHours, working_hours()),
+            (VetTimeOff, time_off()),
+            (Pets, pets()),
+            (Bookings, bookings()),
+        ):
+            started = clock.perf_counter()
+            counts[model.__tablename__] = await _insert(conn, model.__table__, rows)
+            print(f"{model.__tablename__}: {counts[model.__tablename__]} rows in {clock.perf_counter() - started:.1f}s",
+                  file=sys.stderr)
+    # Fresh statistics, otherwise the planner still sees empty tables
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("ANALYZE")
+    return counts
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        await seed(Volumes.at_scale(args.scale), create_schema=args.create_schema, random_seed=args.random_seed)
+    finally:
+        await dispose_engine()
+        password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=0.01, help="1.0 = 100k owners, 10k vets, 5M bookings")
+    parser.add_argument("--create-schema", action="store_true", help="create tables first (otherwise run alembic)")
+    parser.add_argument("--random-seed", type=int, default=7)
+    asyncio.run(_main(parser.parse_args()))
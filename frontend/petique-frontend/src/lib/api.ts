@@ -28,3 +28,31 @@ api.interceptors.response.use(
   },
 )
 
+
+// Backend list endpoints return one page at a time and put the next page's cursor in this header
+export const NEXT_CURSOR_HEADER = 'x-next-cursor'
+// The backend's default PAGE_SIZE_MAX
+const PAGE_LIMIT = 500
+
+/** GET every page of a cursor-paginated list endpoint. */
+export async function getAllPages<T>(url: string, params: Record<string, unknown> = {}): Promise<T[]> {
+  const items: T[] = []
+  let cursor: string | undefined
+  do {
+    const response = await api.get<T[]>(url, {
+      params: { ...params, limit: PAGE_LIMIT, cursor },
+      // Repeat list params as status=a&status=b, which is what FastAPI reads
+      paramsSerializer: { indexes: null },
+    })
+    items.push(...response.data)
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+  } while (cursor)
+  return items
+}
+
+/** Midnight today in the browser's time zone, as an ISO timestamp. */
+export const startOfToday = () => {
+  const today = new Date()
+  today.setHours(0, 0, 0, 0)
+  return today.toISOString()
+}
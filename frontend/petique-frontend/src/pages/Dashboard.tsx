@@ -1,5 +1,5 @@
 import { useQuery } from '@tanstack/react-query'
-import { api } from '../lib/api'
+import { api, getAllPages, startOfToday } from '../lib/api'
 import { PawPrint, CalendarCheck } from 'lucide-react'
 import StatCard from '../components/ui/StatCard'
 import StatusBadge from '../components/ui/StatusBadge'
@@ -24,8 +24,9 @@ const DashboardPage = () => {
   })
 
   const { data: bookings = [] } = useQuery<Booking[]>({
-    queryKey: ['bookings'],
-    queryFn: async () => (await api.get('/bookings')).data,
+    queryKey: ['bookings', 'upcoming'],
+    queryFn: () =>
+      getAllPages<Booking>('/bookings', { from: startOfToday(), status: ['pending', 'confirmed'] }),
   })
 
   const upcomingBookings = bookings
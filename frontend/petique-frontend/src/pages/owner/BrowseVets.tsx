@@ -1,8 +1,9 @@
-import { useQuery } from '@tanstack/react-query'
-import { api } from '../../lib/api'
+import { useInfiniteQuery } from '@tanstack/react-query'
+import { api, NEXT_CURSOR_HEADER } from '../../lib/api'
 import { Link } from 'react-router-dom'
 import { Stethoscope, MapPin } from 'lucide-react'
 import EmptyState from '../../components/ui/EmptyState'
+import { useState, type FormEvent } from 'react'
 
 type Vet = {
     id: string
@@ -13,13 +14,51 @@ type Vet = {
     city: string | null
 }
 
+type Filters = {
+    q: string
+    specialty: string
+    city: string
+}
+
+const specialties = [
+    'general_practice', 'surgery', 'dentistry', 'dermatology',
+    'cardiology', 'orthopedics', 'ophthalmology', 'exotics',
+]
+
 const specialtyLabel = (s: string) => s.replace(/_/g, ' ').replace(/\b\w/g, (c) => c.toUpperCase())
 
+const EMPTY_FILTERS: Filters = { q: '', specialty: '', city: '' }
+
 const BrowseVetsPage = () => {
-    const { data: vets = [], isLoading } = useQuery<Vet[]>({
-        queryKey: ['vets'],
-        queryFn: async () => (await api.get('/vets')).data,
+    // Edited in the form, applied on submit so typing does not fire a request per key
+    const [form, setForm] = useState<Filters>(EMPTY_FILTERS)
+    const [filters, setFilters] = useState<Filters>(EMPTY_FILTERS)
+
+    const { data, isLoading, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery({
+        queryKey: ['vets', filters],
+        queryFn: async ({ pageParam }) => {
+            // Filtering, search and paging all happen on the server
+            const response = await api.get<Vet[]>('/vets', {
+                params: {
+                    include_bio: true,
+                    q: filters.q.trim() || undefined,
+                    specialty: filters.specialty || undefined,
+                    city: filters.city.trim() || undefined,
+                    cursor: pageParam,
+                },
+            })
+            return { vets: response.data, nextCursor: response.headers[NEXT_CURSOR_HEADER] as string | undefined }
+        },
+        initialPageParam: undefined as string | undefined,
+        getNextPageParam: (lastPage) => lastPage.nextCursor,
     })
+    const vets = data?.pages.flatMap((page) => page.vets) ?? []
+    const filtered = filters.q !== '' || filters.specialty !== '' || filters.city !== ''
+
+    const handleSubmit = (e: FormEvent) => {
+        e.preventDefault()
+        setFilters(form)
+    }
 
     return (
         <div className="space-y-6">
@@ -28,15 +67,37 @@ const BrowseVetsPage = () => {
                 <p className="page-sub">Find a vet for your pet and book an appointment.</p>
             </div>
 
+            <form onSubmit={handleSubmit} className="grid grid-cols-1 gap-3 sm:grid-cols-4">
+                <input
+                    value={form.q}
+                    onChange={(e) => setForm({ ...form, q: e.target.value })}
+                    placeholder="Search name, clinic or bio"
+                    className="sm:col-span-2"
+                />
+                <select value={form.specialty} onChange={(e) => setForm({ ...form, specialty: e.target.value })}>
+                    <option value="">All specialties</option>
+                    {specialties.map((s) => (
+                        <option key={s} value={s}>{specialtyLabel(s)}</option>
+                    ))}
+                </select>
+                <div className="flex gap-2">
+                    <input value={form.city} onChange={(e) => setForm({ ...form, city: e.target.value })} placeholder="City" />
+                    <button type="submit" className="btn-primary !w-auto px-5">Search</button>
+                </div>
+            </form>
+
             {isLoading ? (
                 <div className="py-12 text-center text-ink/40">Loading...</div>
             ) : vets.length === 0 ? (
                 <EmptyState
                     icon={Stethoscope}
-                    title="No vets available"
-                    description="Check back later — vets will appear here once they register."
+                    title={filtered ? 'No matching vets' : 'No vets available'}
+                    description={filtered
+                        ? 'Try a different search, specialty or city.'
+                        : 'Check back later — vets will appear here once they register.'}
                 />
             ) : (
+                <>
                 <div className="grid grid-cols-1 gap-4 sm:grid-cols-2 lg:grid-cols-3">
                     {vets.map((vet) => (
                         <Link
@@ -69,6 +130,18 @@ const BrowseVetsPage = () => {
                         </Link>
                     ))}
                 </div>
+                {hasNextPage && (
+                    <div className="flex justify-center">
+                        <button
+                            onClick={() => fetchNextPage()}
+                            className="btn-secondary !w-auto px-6"
+                            disabled={isFetchingNextPage}
+                        >
+                            {isFetchingNextPage ? 'Loading…' : 'Load more'}
+                        </button>
+                    </div>
+                )}
+                </>
             )}
         </div>
     )
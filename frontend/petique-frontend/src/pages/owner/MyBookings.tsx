@@ -1,5 +1,5 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
-import { api } from '../../lib/api'
+import { api, getAllPages } from '../../lib/api'
 import { toast } from 'sonner'
 import { CalendarCheck } from 'lucide-react'
 import StatusBadge from '../../components/ui/StatusBadge'
@@ -21,7 +21,7 @@ const MyBookingsPage = () => {
 
     const { data: bookings = [], isLoading } = useQuery<Booking[]>({
         queryKey: ['bookings'],
-        queryFn: async () => (await api.get('/bookings')).data,
+        queryFn: () => getAllPages<Booking>('/bookings'),
     })
 
     const cancelMut = useMutation({
@@ -1,5 +1,5 @@
 import { useQuery } from '@tanstack/react-query'
-import { api } from '../../lib/api'
+import { getAllPages } from '../../lib/api'
 import { CalendarCheck, ChevronRight } from 'lucide-react'
 import StatusBadge from '../../components/ui/StatusBadge'
 import EmptyState from '../../components/ui/EmptyState'
@@ -26,7 +26,7 @@ const VetBookingsPage = () => {
         queryKey: ['vet-bookings'],
         queryFn: async () => {
             try {
-                return (await api.get('/bookings/vet')).data
+                return await getAllPages<Booking>('/bookings/vet')
             } catch {
                 return []
             }
@@ -1,5 +1,5 @@
 import { useQuery } from '@tanstack/react-query'
-import { api } from '../../lib/api'
+import { api, getAllPages, startOfToday } from '../../lib/api'
 import { CalendarCheck, Clock } from 'lucide-react'
 import StatCard from '../../components/ui/StatCard'
 import StatusBadge from '../../components/ui/StatusBadge'
@@ -27,10 +27,10 @@ const VetDashboardPage = () => {
     // Vets can see bookings via the general endpoint (the backend filters by user)
     // For now, we'll show a simple view of the vet's schedule
     const { data: bookings = [] } = useQuery<Booking[]>({
-        queryKey: ['vet-bookings'],
+        queryKey: ['vet-bookings', 'upcoming'],
         queryFn: async () => {
             try {
-                return (await api.get('/bookings/vet')).data
+                return await getAllPages<Booking>('/bookings/vet', { from: startOfToday() })
             } catch {
                 return []
             }